@@ -2,11 +2,12 @@
 API Routes for Creative Master
 """
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Form
-from fastapi.responses import FileResponse
-from typing import List, Optional, Dict
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from typing import List, Optional, Dict, Tuple
 from pydantic import BaseModel, Field
 from pathlib import Path
+import asyncio
 import time
 
 from ..models import (
@@ -16,6 +17,15 @@ from ..models import (
     DEFAULT_RELATION_TYPES
 )
 from ..core import InspirationManager, AISummarizer, CreativeGenerator, PromptGenerator, FileTypeManager, ConfigManager
+from ..core.llm_scheduler import chat_completion, scheduler_stats
+from ..core.llm_cache import get_response_cache
+from ..core.jobs import JobManager, SUCCEEDED
+from ..core.watcher import InspirationWatcher
+from ..core.inspiration import display_file_name
+from ..core.streaming import format_sse
+from ..core.executors import run_io, run_cpu, executor_stats
+from ..core.extraction import get_extraction_service
+from ..core.dir_scanner import directory_scanner, get_snapshot, tree_node, tree_level, ScanEntry, TREE_PAGE_LIMIT
 
 
 router = APIRouter()
@@ -24,6 +34,7 @@ config_manager = ConfigManager()
 file_type_manager = FileTypeManager()
 inspiration_manager = InspirationManager(file_type_manager=file_type_manager)
 ai_summarizer = AISummarizer()
+job_manager = JobManager("./storage/jobs.db")
 creative_generator = None
 prompt_generator = None
 
@@ -99,6 +110,11 @@ class ConfigModelRequest(BaseModel):
     is_relation_completer: bool = False
     is_topology_generator: bool = False
     is_inspiration_generator: bool = False
+    rpm_limit: Optional[int] = None
+    tpm_limit: Optional[int] = None
+    max_concurrency: int = 10
+    context_window: Optional[int] = None
+    source_token_budget: Optional[int] = None
 
 
 class AddFileTypeRequest(BaseModel):
@@ -210,7 +226,8 @@ async def update_file_type(type_id: str, request: UpdateFileTypeRequest):
                 }
             raise HTTPException(status_code=404, detail="File type not found")
         
-        updated_count = inspiration_manager.refresh_all_types(
+        updated_count = await run_io(
+            inspiration_manager.refresh_all_types,
             lambda p: file_type_manager.detect_type(p)
         )
         
@@ -250,7 +267,8 @@ async def add_extension_to_type(type_name: str, request: AddExtensionRequest):
                 }
             raise HTTPException(status_code=404, detail="File type not found")
         
-        updated_count = inspiration_manager.refresh_all_types(
+        updated_count = await run_io(
+            inspiration_manager.refresh_all_types,
             lambda p: file_type_manager.detect_type(p)
         )
         
@@ -269,7 +287,8 @@ async def remove_extension_from_type(type_name: str, extension: str):
     if not ft:
         raise HTTPException(status_code=404, detail="File type not found")
     
-    updated_count = inspiration_manager.refresh_all_types(
+    updated_count = await run_io(
+        inspiration_manager.refresh_all_types,
         lambda p: file_type_manager.detect_type(p)
     )
     
@@ -283,7 +302,8 @@ async def remove_extension_from_type(type_name: str, extension: str):
 async def reset_file_types():
     result = file_type_manager.reset_to_default()
     
-    updated_count = inspiration_manager.refresh_all_types(
+    updated_count = await run_io(
+        inspiration_manager.refresh_all_types,
         lambda p: file_type_manager.detect_type(p)
     )
     
@@ -296,18 +316,44 @@ async def reset_file_types():
 @router.post("/inspirations", response_model=Inspiration)
 async def add_inspiration(request: AddInspirationRequest):
     try:
-        inspiration = inspiration_manager.add_inspiration(
+        # Copying a folder and measuring its size can take seconds; keep it off the event loop
+        inspiration = await run_io(
+            inspiration_manager.add_inspiration,
             source_path=request.source_path,
             name=request.name,
             tags=request.tags,
             copy_file=request.copy_file,
             file_type=request.file_type
         )
+        if not request.copy_file:
+            inspiration_watcher.request_resync()
         return inspiration
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+async def _stream_into_blob(filename: str, chunks):
+    writer = await run_io(inspiration_manager.open_upload, filename)
+    try:
+        async for chunk in chunks:
+            await run_io(writer.write, chunk)
+        return await run_io(writer.commit)
+    except BaseException:
+        writer.abort()
+        raise
+
+
+async def _iter_upload(file: UploadFile):
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+
 @router.post("/inspirations/upload", response_model=Inspiration)
 async def upload_inspiration(
     file: UploadFile = File(...),
@@ -315,11 +361,14 @@ async def upload_inspiration(
     tags: Optional[str] = Form(None),
     file_type: Optional[str] = Form(None)
 ):
-    content = await file.read()
-    
-    inspiration = inspiration_manager.add_inspiration_from_upload(
-        file_content=content,
-        filename=file.filename or "unknown",
+    filename = file.filename or "unknown"
+    blob = await _stream_into_blob(filename, _iter_upload(file))
+    
+    # Adopting the blob and writing the record touch disk and the store; keep them off the event loop
+    inspiration = await run_io(
+        inspiration_manager.add_inspiration_from_blob,
+        blob,
+        filename=filename,
         name=name,
         tags=tags.split(",") if tags else [],
         file_type=file_type
@@ -327,6 +376,27 @@ async def upload_inspiration(
     return inspiration
 
 
+@router.post("/inspirations/upload-stream", response_model=Inspiration)
+async def upload_inspiration_stream(
+    request: Request,
+    filename: str = Query(...),
+    name: Optional[str] = Query(None),
+    tags: Optional[str] = Query(None),
+    file_type: Optional[str] = Query(None)
+):
+    # Raw request body (no multipart), written once straight into the blob store
+    blob = await _stream_into_blob(filename, request.stream())
+    
+    return await run_io(
+        inspiration_manager.add_inspiration_from_blob,
+        blob,
+        filename=filename,
+        name=name,
+        tags=tags.split(",") if tags else [],
+        file_type=file_type
+    )
+
+
 @router.post("/inspirations/upload-batch", response_model=List[Inspiration])
 async def upload_inspirations_batch(
     files: List[UploadFile] = File(...),
@@ -336,52 +406,154 @@ async def upload_inspirations_batch(
     results = []
     
     if folder_name:
-        import tempfile
-        import shutil
-        
-        temp_dir = Path(tempfile.gettempdir()) / "creative_master_folder_upload" / folder_name
-        if temp_dir.exists():
-            shutil.rmtree(temp_dir)
-        temp_dir.mkdir(parents=True, exist_ok=True)
-        
+        # Same path as the ingest session API: files land in the final folder once, stats accumulate as they arrive
+        session = inspiration_manager.folder_ingest.open_session(folder_name, tags.split(",") if tags else [])
         try:
             for file in files:
-                file_path = temp_dir / file.filename
-                file_path.parent.mkdir(parents=True, exist_ok=True)
-                content = await file.read()
-                with open(file_path, 'wb') as f:
-                    f.write(content)
-            
-            inspiration = inspiration_manager.add_inspiration(
-                source_path=str(temp_dir),
-                name=folder_name,
-                tags=tags.split(",") if tags else [],
-                copy_file=True
-            )
-            results.append(inspiration)
+                await _stream_into_session(session.session_id, file.filename or "unknown", _iter_upload(file))
+            results.append(await run_io(inspiration_manager.commit_folder_ingest, session.session_id))
         except Exception as e:
-            if temp_dir.exists():
-                shutil.rmtree(temp_dir)
+            inspiration_manager.folder_ingest.abort(session.session_id)
             raise HTTPException(status_code=500, detail=str(e))
     else:
         for file in files:
-            content = await file.read()
-            inspiration = inspiration_manager.add_inspiration_from_upload(
-                file_content=content,
-                filename=file.filename or "unknown",
+            filename = file.filename or "unknown"
+            blob = await _stream_into_blob(filename, _iter_upload(file))
+            inspiration = await run_io(
+                inspiration_manager.add_inspiration_from_blob,
+                blob,
+                filename=filename,
                 tags=tags.split(",") if tags else []
             )
             results.append(inspiration)
     return results
 
 
-@router.get("/inspirations", response_model=List[Inspiration])
+class OpenIngestSessionRequest(BaseModel):
+    name: str
+    tags: Optional[List[str]] = None
+
+
+async def _stream_into_session(session_id: str, rel_path: str, chunks):
+    writer = inspiration_manager.folder_ingest.open_file(session_id, rel_path)
+    try:
+        async for chunk in chunks:
+            await run_io(writer.write, chunk)
+        return await run_io(writer.commit)
+    except BaseException:
+        writer.abort()
+        raise
+
+
+@router.post("/inspirations/ingest")
+async def open_ingest_session(request: OpenIngestSessionRequest):
+    try:
+        session = inspiration_manager.folder_ingest.open_session(request.name, request.tags)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return session.to_dict()
+
+
+@router.get("/inspirations/ingest")
+async def list_ingest_sessions():
+    return inspiration_manager.folder_ingest.list_sessions()
+
+
+@router.get("/inspirations/ingest/{session_id}")
+async def get_ingest_session(session_id: str):
+    session = inspiration_manager.folder_ingest.get_session(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Ingest session not found")
+    # The received file list lets a client resume by sending only what is missing
+    return session.to_dict(include_files=True)
+
+
+@router.put("/inspirations/ingest/{session_id}/files")
+async def put_ingest_file(session_id: str, request: Request, path: str = Query(...)):
+    try:
+        return await _stream_into_session(session_id, path, request.stream())
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Ingest session not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/inspirations/ingest/{session_id}/files")
+async def upload_ingest_files(session_id: str, files: List[UploadFile] = File(...)):
+    # Multipart variant for browsers; each part's filename carries its path relative to the folder root
+    received = []
+    for file in files:
+        try:
+            received.append(await _stream_into_session(session_id, file.filename or "unknown", _iter_upload(file)))
+        except KeyError:
+            raise HTTPException(status_code=404, detail="Ingest session not found")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return received
+
+
+@router.post("/inspirations/ingest/{session_id}/commit", response_model=Inspiration)
+async def commit_ingest_session(session_id: str):
+    try:
+        return await run_io(inspiration_manager.commit_folder_ingest, session_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Ingest session not found")
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.delete("/inspirations/ingest/{session_id}")
+async def abort_ingest_session(session_id: str):
+    if not inspiration_manager.folder_ingest.abort(session_id):
+        raise HTTPException(status_code=404, detail="Ingest session not found")
+    return {"status": "aborted"}
+
+
+@router.get("/inspirations")
 async def list_inspirations(
     type: Optional[str] = None,
-    tags: Optional[str] = None
+    tags: Optional[str] = None,
+    tag_mode: str = Query("any", pattern="^(any|all)$"),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    fields: Optional[str] = None,
+    sort: Optional[str] = Query(None, pattern="^(created_at|updated_at|name|size)$"),
+    order: str = Query("desc", pattern="^(asc|desc)$")
 ):
     tag_list = tags.split(",") if tags else None
-    return inspiration_manager.list_inspirations(type_filter=type, tags=tag_list)
+    
+    # Without paging/projection/sort parameters keep returning the plain list the UI expects
+    if cursor is None and limit is None and fields is None and sort is None:
+        return inspiration_manager.list_inspirations(type_filter=type, tags=tag_list, tag_mode=tag_mode)
+    
+    try:
+        return inspiration_manager.list_inspirations_page(
+            type_filter=type,
+            tags=tag_list,
+            tag_mode=tag_mode,
+            sort=sort or "created_at",
+            order=order,
+            cursor=cursor,
+            limit=limit,
+            fields=[f.strip() for f in fields.split(",") if f.strip()] if fields else None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/inspirations/storage/dedup-report")
+async def get_storage_dedup_report(top: int = Query(10, ge=1, le=100)):
+    return inspiration_manager.blob_store.dedup_report(top=top)
+
+
+@router.post("/inspirations/storage/gc")
+async def collect_storage_garbage():
+    return inspiration_manager.blob_store.gc()
+
+
+@router.get("/inspirations/summary-cache/stats")
+async def get_summary_cache_stats():
+    return ai_summarizer.summary_cache.stats()
 
 
 @router.get("/inspirations/{inspiration_id}", response_model=Inspiration)
@@ -392,27 +564,358 @@ async def get_inspiration(inspiration_id: str):
     return inspiration
 
 
-@router.post("/inspirations/{inspiration_id}/summarize")
-async def summarize_inspiration(inspiration_id: str, background_tasks: BackgroundTasks):
-    inspiration = inspiration_manager.get_inspiration(inspiration_id)
-    if not inspiration:
-        raise HTTPException(status_code=404, detail="Inspiration not found")
-    
+def _ensure_summarizer(inspiration: Inspiration):
     if not ai_summarizer.get_summarizer(inspiration.type):
         # Try to re-initialize default model if not set
         init_default_model()
         if not ai_summarizer.get_summarizer(inspiration.type) and not ai_summarizer.default_config:
             print(f"[ERROR] No AI model configured for type: {inspiration.type}. Default config: {ai_summarizer.default_config}")
             raise HTTPException(status_code=400, detail=f"No AI model configured for type '{inspiration.type}'")
-    
+
+
+# Folder entries are merged into metadata.file_summaries in chunks as they are produced
+FILE_SUMMARY_PERSIST_BATCH = 50
+FILE_SUMMARY_PERSIST_SECONDS = 2.0
+
+
+def _split_folder_summary(summary: str) -> Tuple[str, Optional[List[Dict]], Dict]:
+    """
+    Take the flat entry list out of a folder summary's ``_context``; it is stored once, in
+    metadata.file_summaries. Returns the summary to store, the entries and the cache stats.
+    """
+    import json
+    try:
+        data = json.loads(summary)
+    except (json.JSONDecodeError, TypeError):
+        return summary, None, {}
+    context = data.get("_context") if isinstance(data, dict) else None
+    if not isinstance(context, dict):
+        return summary, None, {}
+    file_summaries = context.pop("file_summaries", None)
+    return json.dumps(data, ensure_ascii=False), file_summaries, context.get("cache_stats", {})
+
+
+async def _summarize_and_store(inspiration: Inspiration, progress=None, on_summary=None) -> Dict:
     ignored_paths = inspiration.metadata.get('ignored_paths', []) if inspiration.metadata else []
+    pending: List[Dict] = []
+    last_flush = [time.monotonic()]
+    writes: List[asyncio.Future] = []
+    
+    def flush(index_search: bool = False):
+        # Written on the I/O pool, each batch after the previous one; only the last write re-indexes search
+        entries = list(pending)
+        pending.clear()
+        last_flush[0] = time.monotonic()
+        previous = writes[-1] if writes else None
+        
+        async def write():
+            if previous is not None:
+                await previous
+            try:
+                await run_io(inspiration_manager.merge_file_summaries, inspiration.id, entries, index_search=index_search)
+            except Exception as e:
+                print(f"Error saving partial summaries for {inspiration.id}: {e}")
+        
+        writes.append(asyncio.ensure_future(write()))
+    
+    def on_entry(entry: Dict):
+        pending.append(entry)
+        if len(pending) >= FILE_SUMMARY_PERSIST_BATCH or time.monotonic() - last_flush[0] >= FILE_SUMMARY_PERSIST_SECONDS:
+            flush()
+        if on_summary:
+            on_summary(entry)
+    
     try:
-        summary = await ai_summarizer.summarize_inspiration(inspiration, ignored_paths=ignored_paths)
-        inspiration_manager.update_inspiration(inspiration_id, summary=summary)
-        return {"inspiration_id": inspiration_id, "summary": summary}
-    except Exception as e:
-        print(f"Error in summarize_inspiration: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        summary = await ai_summarizer.summarize_inspiration(inspiration, ignored_paths=ignored_paths, progress=progress, on_summary=on_entry)
+    except BaseException:
+        # A cancelled run keeps every summary that was finished
+        flush(index_search=True)
+        await asyncio.shield(writes[-1])
+        raise
+    
+    result = {"inspiration_id": inspiration.id}
+    file_summaries = None
+    if inspiration.type == "folder":
+        summary, file_summaries, result["cache_stats"] = _split_folder_summary(summary)
+    if writes:
+        await writes[-1]
+    # A complete run replaces the merged list, dropping entries for files that are gone; a failed
+    # one keeps what was finished. Either way the summary goes in the same, indexed, write.
+    await run_io(
+        inspiration_manager.merge_file_summaries,
+        inspiration.id,
+        file_summaries or list(pending),
+        replace=bool(file_summaries),
+        summary=summary
+    )
+    result["summary"] = summary
+    return result
+
+
+async def _summarize_job(job, report):
+    inspiration = inspiration_manager.get_inspiration(job.params["inspiration_id"])
+    if not inspiration:
+        raise ValueError("Inspiration not found")
+    try:
+        _ensure_summarizer(inspiration)
+    except HTTPException as e:
+        raise ValueError(e.detail)
+    result = await _summarize_and_store(inspiration, progress=report)
+    # The summary itself lives on the inspiration; keep the job row small
+    result.pop("summary", None)
+    return result
+
+
+job_manager.register_handler("summarize", _summarize_job)
+
+
+def _resummarize_linked(inspiration: Inspiration, changed_paths: List[str]):
+    try:
+        _ensure_summarizer(inspiration)
+    except HTTPException:
+        return
+    # Unchanged files are summary-cache hits, so the rebuild only sends the changed ones to the model.
+    # A running job may have read the files before this change; queue a follow-up instead of joining it.
+    job_manager.submit(
+        "summarize",
+        {"inspiration_id": inspiration.id, "trigger": "watcher", "changed_paths": changed_paths},
+        dedup_key=f"summarize:{inspiration.id}",
+        dedup_running=False
+    )
+
+
+inspiration_watcher = InspirationWatcher(inspiration_manager, on_change=_resummarize_linked)
+
+
+@router.post("/inspirations/{inspiration_id}/summarize")
+async def summarize_inspiration(inspiration_id: str, background: bool = Query(False)):
+    inspiration = inspiration_manager.get_inspiration(inspiration_id)
+    if not inspiration:
+        raise HTTPException(status_code=404, detail="Inspiration not found")
+    
+    _ensure_summarizer(inspiration)
+    
+    # Always runs as a job, so a dropped connection does not lose the work; the inline form starts
+    # it right away, ahead of queued bulk jobs, and waits for it
+    job = job_manager.submit(
+        "summarize",
+        {"inspiration_id": inspiration_id},
+        dedup_key=f"summarize:{inspiration_id}",
+        interactive=not background
+    )
+    if background:
+        return {"job_id": job.id, "status": job.status}
+    
+    job = await job_manager.wait(job.id)
+    if job is None or job.status != SUCCEEDED:
+        error = job.error if job and job.error else "总结任务未完成"
+        print(f"Error in summarize_inspiration: {error}")
+        raise HTTPException(status_code=500, detail=error)
+    
+    inspiration = inspiration_manager.get_inspiration(inspiration_id)
+    return {**(job.result or {}), "summary": inspiration.summary if inspiration else None, "job_id": job.id}
+
+
+@router.post("/inspirations/{inspiration_id}/summarize/stream")
+async def stream_summarize_inspiration(inspiration_id: str):
+    """
+    SSE variant of /summarize. Events: ``summary`` ({"path", "name", "summary", "type"}) for each
+    file and folder as soon as it is summarized, folders after their contents and the root ("")
+    last; ``progress`` with file counts; then ``done`` with the stored result.
+    """
+    inspiration = inspiration_manager.get_inspiration(inspiration_id)
+    if not inspiration:
+        raise HTTPException(status_code=404, detail="Inspiration not found")
+    
+    _ensure_summarizer(inspiration)
+    
+    async def events():
+        queue: asyncio.Queue = asyncio.Queue()
+        task = asyncio.create_task(_summarize_and_store(
+            inspiration,
+            progress=lambda **fields: queue.put_nowait(("progress", fields)),
+            on_summary=lambda entry: queue.put_nowait(("summary", entry))
+        ))
+        task.add_done_callback(lambda _: queue.put_nowait(None))
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                yield format_sse(*item)
+            yield format_sse("done", task.result())
+        finally:
+            # Client went away: stop the run; finished summaries are already stored
+            if not task.done():
+                task.cancel()
+    
+    return _sse_response(events())
+
+
+class SummarizeBatchRequest(BaseModel):
+    ids: Optional[List[str]] = None
+    type: Optional[str] = None
+    tags: Optional[List[str]] = None
+    tag_mode: str = "any"
+    missing_summary: bool = False
+    limit: Optional[int] = Field(None, ge=1)
+    background: bool = False
+
+
+# Summaries are written to the store in chunks of this size as results come in
+SUMMARY_PERSIST_BATCH = 50
+
+
+def _select_for_batch(request: SummarizeBatchRequest) -> List[Inspiration]:
+    if request.ids is not None:
+        inspirations = [inspiration_manager.get_inspiration(i) for i in dict.fromkeys(request.ids)]
+        inspirations = [i for i in inspirations if i]
+        if request.type:
+            inspirations = [i for i in inspirations if i.type == request.type]
+        if request.tags:
+            wanted = set(request.tags)
+            match = wanted.issubset if request.tag_mode == "all" else wanted.intersection
+            inspirations = [i for i in inspirations if match(i.tags)]
+    else:
+        inspirations = inspiration_manager.list_inspirations(
+            type_filter=request.type,
+            tags=request.tags,
+            tag_mode=request.tag_mode
+        )
+    if request.missing_summary:
+        inspirations = [i for i in inspirations if not i.summary]
+    if request.limit:
+        inspirations = inspirations[:request.limit]
+    return inspirations
+
+
+async def _summarize_batch(inspirations: List[Inspiration], progress=None, owner: Optional[str] = None) -> Dict:
+    pending: Dict[str, Dict] = {}
+    counts = {"succeeded": 0, "failed": 0}
+    folder_ids = {inspiration.id for inspiration in inspirations if inspiration.type == "folder"}
+    last_write: List[Optional[asyncio.Future]] = [None]
+    
+    def write(fn, *args, **kwargs):
+        # Stores are written on the I/O pool, each write after the previous one
+        previous = last_write[0]
+        
+        async def run():
+            if previous is not None:
+                await previous
+            try:
+                await run_io(fn, *args, **kwargs)
+            except Exception as e:
+                print(f"Error saving batch summaries: {e}")
+        
+        last_write[0] = asyncio.ensure_future(run())
+    
+    def flush():
+        if pending:
+            write(inspiration_manager.update_inspirations, dict(pending))
+            pending.clear()
+    
+    def on_result(inspiration_id: str, summary: Optional[str], error: Optional[str]):
+        if error is None:
+            counts["succeeded"] += 1
+            file_summaries = None
+            if inspiration_id in folder_ids:
+                summary, file_summaries, _ = _split_folder_summary(summary)
+            if file_summaries:
+                # Merged under the manager's lock, so concurrent metadata edits are kept
+                write(inspiration_manager.merge_file_summaries, inspiration_id, file_summaries, replace=True, summary=summary)
+            else:
+                pending[inspiration_id] = {"summary": summary}
+                if len(pending) >= SUMMARY_PERSIST_BATCH:
+                    flush()
+        else:
+            counts["failed"] += 1
+        if progress:
+            progress(
+                files_done=counts["succeeded"] + counts["failed"],
+                files_total=len(inspirations),
+                current_id=inspiration_id,
+                **counts
+            )
+    
+    try:
+        results = await ai_summarizer.batch_summarize(inspirations, on_result=on_result, owner=owner)
+    finally:
+        # Keep whatever finished even if the batch itself was cancelled
+        flush()
+        if last_write[0] is not None:
+            await asyncio.shield(last_write[0])
+    
+    items = []
+    for inspiration in inspirations:
+        item = {"inspiration_id": inspiration.id, **results.get(inspiration.id, {"status": "error", "error": "cancelled"})}
+        # Summaries are already stored; the per-item report only says what happened
+        item.pop("summary", None)
+        items.append(item)
+    return {"total": len(inspirations), **counts, "items": items}
+
+
+async def _summarize_batch_job(job, report):
+    inspirations = _select_for_batch(SummarizeBatchRequest(**job.params))
+    if not ai_summarizer.default_config and not ai_summarizer.summarizers:
+        init_default_model()
+    return await _summarize_batch(inspirations, progress=report, owner=f"job:{job.id}")
+
+
+job_manager.register_handler("summarize_batch", _summarize_batch_job)
+
+
+@router.post("/inspirations/summarize-batch")
+async def summarize_inspirations_batch(request: SummarizeBatchRequest):
+    if request.ids is None and not (request.type or request.tags or request.missing_summary):
+        raise HTTPException(status_code=400, detail="请提供 ids 或筛选条件 (type / tags / missing_summary)")
+    if request.tag_mode not in ("any", "all"):
+        raise HTTPException(status_code=400, detail=f"Invalid tag_mode: {request.tag_mode}")
+    
+    if not ai_summarizer.default_config and not ai_summarizer.summarizers:
+        init_default_model()
+        if not ai_summarizer.default_config and not ai_summarizer.summarizers:
+            raise HTTPException(status_code=400, detail="No AI model configured")
+    
+    if request.background:
+        params = request.model_dump(exclude={"background"})
+        job = job_manager.submit("summarize_batch", params)
+        return {"job_id": job.id, "status": job.status}
+    
+    inspirations = _select_for_batch(request)
+    return await _summarize_batch(inspirations, owner="summarize-batch")
+
+
+@router.get("/jobs")
+async def list_jobs(status: Optional[str] = None, limit: int = Query(50, ge=1, le=500)):
+    return job_manager.list(status=status, limit=limit)
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    if not job_manager.get(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(
+        job_manager.events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    if not job_manager.get(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not job_manager.cancel(job_id):
+        raise HTTPException(status_code=409, detail="任务已结束，无法取消")
+    return {"message": "Job cancelled", "job_id": job_id}
 
 
 class RegenerateSectionRequest(BaseModel):
@@ -442,13 +945,16 @@ async def regenerate_summary_section(inspiration_id: str, request: RegenerateSec
              raise HTTPException(status_code=400, detail="No summary exists. Please generate summary first.")
              
         current_summary = json.loads(inspiration.summary)
-        context = current_summary.get("_context", {})
+        context = dict(current_summary.get("_context") or {})
         # Ensure tree is in context
         if "tree" not in context and "tree" in current_summary:
             context["tree"] = current_summary["tree"]
             
-        # Ensure file_summaries are in context
-        if "file_summaries" not in context:
+        # Entries live in metadata; older summaries also carried a copy in _context
+        file_summaries = (inspiration.metadata or {}).get("file_summaries") or context.get("file_summaries")
+        if file_summaries:
+            context["file_summaries"] = file_summaries
+        else:
              # Fallback: cannot regenerate without context
              raise HTTPException(status_code=400, detail="Missing context for regeneration. Please regenerate full summary.")
 
@@ -504,8 +1010,24 @@ async def update_inspiration(inspiration_id: str, request: UpdateInspirationRequ
     return inspiration_manager.get_inspiration(inspiration_id)
 
 
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
 @router.get("/inspirations/{inspiration_id}/tree")
-async def get_inspiration_tree(inspiration_id: str):
+async def get_inspiration_tree(
+    inspiration_id: str,
+    request: Request,
+    response: Response,
+    path: Optional[str] = None,
+    depth: Optional[int] = Query(None, ge=1, le=10),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000)
+):
     inspiration = inspiration_manager.get_inspiration(inspiration_id)
     if not inspiration:
         raise HTTPException(status_code=404, detail="Inspiration not found")
@@ -513,47 +1035,61 @@ async def get_inspiration_tree(inspiration_id: str):
     if inspiration.type != "folder":
         raise HTTPException(status_code=400, detail="Not a folder type inspiration")
     
-    from pathlib import Path
+    folder_path = Path(inspiration.path)
+    if not folder_path.exists():
+        raise HTTPException(status_code=404, detail="Folder not found")
     
-    def build_tree(path: Path, relative_path: str = "") -> List[Dict]:
-        items = []
-        try:
-            for item in sorted(path.iterdir(), key=lambda x: (not x.is_dir(), x.name.lower())):
-                if item.name.startswith('.') or item.name in ['node_modules', '__pycache__', '.git', 'venv', 'build', 'dist', '.venv']:
-                    continue
-                
-                item_relative = f"{relative_path}/{item.name}" if relative_path else item.name
-                
+    def locate() -> Optional[ScanEntry]:
+        entry = get_snapshot(str(folder_path)).find(path or "")
+        if entry is not None and entry.is_dir:
+            # Hashing a large subtree the first time is real work; keep it off the event loop
+            entry.fingerprint
+            return entry
+        return None
+    
+    entry = await run_io(locate)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Path not found")
+    
+    # The fingerprint covers the whole subtree, so an unchanged folder answers 304 at any depth
+    etag = f'"{entry.fingerprint}"'
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    
+    # Without lazy-loading parameters keep returning the full nested list the UI expects
+    if path is None and depth is None and cursor is None and limit is None:
+        def build_tree(entry: ScanEntry) -> List[Dict]:
+            items = []
+            for item in entry.visible_children():
                 node = {
                     "name": item.name,
-                    "path": item_relative,
-                    "is_dir": item.is_dir()
+                    "path": item.path,
+                    "is_dir": item.is_dir
                 }
-                
-                if item.is_file():
-                    node["size"] = item.stat().st_size
-                else:
-                    children = build_tree(item, item_relative)
+                if item.is_dir:
+                    children = build_tree(item)
                     if children:
                         node["children"] = children
-                
+                else:
+                    node["size"] = item.size
                 items.append(node)
-        except PermissionError:
-            pass
+            return items
         
-        return items
+        return await run_cpu(build_tree, entry)
     
-    folder_path = Path(inspiration.path)
-    if not folder_path.exists():
-        raise HTTPException(status_code=404, detail="Folder not found")
-    
-    return build_tree(folder_path)
+    try:
+        page = tree_level(entry, depth or 1, cursor, limit or TREE_PAGE_LIMIT)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"node": tree_node(entry), **page}
 
 
 @router.delete("/inspirations/{inspiration_id}")
 async def delete_inspiration(inspiration_id: str):
-    if not inspiration_manager.delete_inspiration(inspiration_id):
+    if not await run_io(inspiration_manager.delete_inspiration, inspiration_id):
         raise HTTPException(status_code=404, detail="Inspiration not found")
+    inspiration_watcher.request_resync()
     return {"status": "deleted"}
 
 
@@ -793,13 +1329,6 @@ async def ai_complete_relations(request: AICompleteRelationsRequest):
     if len(inspirations) < 2:
         raise HTTPException(status_code=400, detail="At least 2 inspirations required")
     
-    from openai import AsyncOpenAI
-    
-    client = AsyncOpenAI(
-        api_key=ai_summarizer.default_config.api_key,
-        base_url=ai_summarizer.default_config.base_url
-    )
-    
     insp_info = []
     for insp in inspirations:
         summary_preview = (insp.summary[:500] + "...") if insp.summary and len(insp.summary) > 500 else (insp.summary or "无总结")
@@ -833,7 +1362,8 @@ async def ai_complete_relations(request: AICompleteRelationsRequest):
 3. 关系应该是双向思考的，比如A支撑B，则B依赖A
 """
 
-    response = await client.chat.completions.create(
+    response = await chat_completion(
+        ai_summarizer.default_config,
         model=ai_summarizer.default_config.model_name,
         messages=[
             {"role": "system", "content": "你是一个创意分析专家，擅长分析内容之间的关系。请只返回JSON格式数据，不要有其他文字。"},
@@ -856,8 +1386,15 @@ async def ai_complete_relations(request: AICompleteRelationsRequest):
 
 
 @router.get("/inspirations/search/{query}", response_model=List[Inspiration])
-async def search_inspirations(query: str):
-    return inspiration_manager.search_inspirations(query)
+async def search_inspirations(
+    query: str,
+    response: Response,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=500)
+):
+    results, total = inspiration_manager.search_inspirations_ranked(query, offset=offset, limit=limit)
+    response.headers["X-Total-Count"] = str(total)
+    return results
 
 
 # ==================== Combinations API ====================
@@ -1062,7 +1599,6 @@ async def generate_topology_variants(request: GenerateTopologyVariantsRequest):
 - 只返回JSON数组，不要有其他文字"""
 
     try:
-        from openai import AsyncOpenAI
         import json
         import re
         import uuid
@@ -1071,12 +1607,9 @@ async def generate_topology_variants(request: GenerateTopologyVariantsRequest):
         if not default_config:
             raise HTTPException(status_code=400, detail="No default AI model configured")
         
-        client = AsyncOpenAI(
-            api_key=default_config['api_key'],
-            base_url=default_config.get('base_url')
-        )
-        
-        response = await client.chat.completions.create(
+        response = await chat_completion(
+            default_config,
+            use_cache=False,
             model=default_config['model_name'],
             messages=[
                 {"role": "system", "content": "你是一个专业的创意拓扑分析专家，擅长分析元素之间的关系并生成有启发性的拓扑变体。只返回JSON，不要有其他文字。"},
@@ -1177,10 +1710,24 @@ def _get_relation_label(relation_type: str):
 
 # ==================== Creatives API ====================
 
-@router.post("/creatives/generate", response_model=List[Creative])
-async def generate_creatives(request: GenerateCreativesRequest):
-    global creative_generator
-    
+def _sse_response(events) -> StreamingResponse:
+    async def guarded():
+        try:
+            async for chunk in events:
+                yield chunk
+        except Exception as e:
+            # Headers are already sent, so failures are reported in-band
+            print(f"Error in streaming response: {e}")
+            yield format_sse("error", {"detail": str(e)})
+    
+    return StreamingResponse(
+        guarded(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _creative_inputs(request: GenerateCreativesRequest):
     if not creative_generator:
         raise HTTPException(status_code=400, detail="No AI model configured")
     
@@ -1198,6 +1745,12 @@ async def generate_creatives(request: GenerateCreativesRequest):
         for insp_id in combination.inspirations
     ]
     inspirations = [i for i in inspirations if i]
+    return combination, inspirations
+
+
+@router.post("/creatives/generate", response_model=List[Creative])
+async def generate_creatives(request: GenerateCreativesRequest):
+    combination, inspirations = _creative_inputs(request)
     
     creatives = await creative_generator.generate_creatives(
         inspirations=inspirations,
@@ -1205,13 +1758,38 @@ async def generate_creatives(request: GenerateCreativesRequest):
         count=request.count
     )
     
-    saved_creatives = []
-    for creative in creatives:
-        creative_dict = creative.model_dump() if hasattr(creative, 'model_dump') else creative
-        saved = config_manager.save_creative(creative_dict)
-        saved_creatives.append(Creative(**saved))
+    saved = config_manager.save_creatives([
+        creative.model_dump() if hasattr(creative, 'model_dump') else creative
+        for creative in creatives
+    ])
+    return [Creative(**c) for c in saved]
+
+
+@router.post("/creatives/generate/stream")
+async def stream_generate_creatives(request: GenerateCreativesRequest):
+    """
+    SSE variant of /creatives/generate. Events: ``token`` ({"text"}) for each model delta,
+    ``creative`` (the saved creative) as soon as one is complete, then ``done`` ({"count"}).
+    """
+    combination, inspirations = _creative_inputs(request)
+    generator = creative_generator
+    
+    async def events():
+        count = 0
+        async for kind, value in generator.stream_creatives(
+            inspirations=inspirations,
+            combination=combination,
+            count=request.count
+        ):
+            if kind == "token":
+                yield format_sse("token", {"text": value})
+            else:
+                saved = config_manager.save_creative(value.model_dump())
+                count += 1
+                yield format_sse("creative", saved)
+        yield format_sse("done", {"count": count})
     
-    return saved_creatives
+    return _sse_response(events())
 
 
 @router.post("/creatives/regenerate", response_model=List[Creative])
@@ -1245,13 +1823,11 @@ async def regenerate_creatives(request: RegenerateRequest):
         count=request.count
     )
     
-    saved_creatives = []
-    for creative in creatives:
-        creative_dict = creative.model_dump() if hasattr(creative, 'model_dump') else creative
-        saved = config_manager.save_creative(creative_dict)
-        saved_creatives.append(Creative(**saved))
-    
-    return saved_creatives
+    saved = config_manager.save_creatives([
+        creative.model_dump() if hasattr(creative, 'model_dump') else creative
+        for creative in creatives
+    ])
+    return [Creative(**c) for c in saved]
 
 
 @router.get("/creatives", response_model=List[Creative])
@@ -1280,10 +1856,7 @@ async def delete_creative(creative_id: str):
 
 # ==================== Prompts API ====================
 
-@router.post("/prompts/generate", response_model=GeneratedPrompt)
-async def generate_prompt(request: GeneratePromptRequest):
-    global prompt_generator
-    
+def _prompt_inputs(request: GeneratePromptRequest):
     if not prompt_generator:
         raise HTTPException(status_code=400, detail="No AI model configured")
     
@@ -1297,6 +1870,12 @@ async def generate_prompt(request: GeneratePromptRequest):
         for insp_id in request.inspiration_ids
     ]
     inspirations = [i for i in inspirations if i]
+    return creative, inspirations
+
+
+@router.post("/prompts/generate", response_model=GeneratedPrompt)
+async def generate_prompt(request: GeneratePromptRequest):
+    creative, inspirations = _prompt_inputs(request)
     
     prompt = await prompt_generator.generate_prompt(
         creative=creative,
@@ -1312,15 +1891,40 @@ async def generate_prompt(request: GeneratePromptRequest):
     return GeneratedPrompt(**saved_prompt)
 
 
+@router.post("/prompts/generate/stream")
+async def stream_generate_prompt(request: GeneratePromptRequest):
+    """SSE variant of /prompts/generate: ``token`` events while the model writes, then ``done`` with the saved prompt."""
+    creative, inspirations = _prompt_inputs(request)
+    generator = prompt_generator
+    
+    async def events():
+        parts = []
+        async for delta in generator.stream_prompt(
+            creative=creative,
+            inspirations=inspirations,
+            output_format=request.output_format
+        ):
+            parts.append(delta)
+            yield format_sse("token", {"text": delta})
+        prompt = await run_io(
+            generator.build_prompt,
+            creative,
+            inspirations,
+            "".join(parts),
+            organize_files=request.organize_files,
+            output_folder=request.output_folder
+        )
+        yield format_sse("done", config_manager.save_prompt(prompt.model_dump()))
+    
+    return _sse_response(events())
+
+
 class GeneratePromptFromCreativeRequest(BaseModel):
     creative_id: str
     regenerate: bool = False
 
 
-@router.post("/prompts/generate-from-creative")
-async def generate_prompt_from_creative(request: GeneratePromptFromCreativeRequest):
-    global prompt_generator
-    
+def _creative_prompt_inputs(request: GeneratePromptFromCreativeRequest):
     if not prompt_generator:
         raise HTTPException(status_code=400, detail="No AI model configured")
     
@@ -1330,12 +1934,6 @@ async def generate_prompt_from_creative(request: GeneratePromptFromCreativeReque
     
     creative = Creative(**creative_dict)
     
-    if creative.prompt and not request.regenerate:
-        return {
-            "prompt": creative.prompt,
-            "aggregated_path": creative.aggregated_path
-        }
-    
     combination_dict = config_manager.get_combination(creative.combination_id)
     inspirations = []
     if combination_dict:
@@ -1343,6 +1941,18 @@ async def generate_prompt_from_creative(request: GeneratePromptFromCreativeReque
             insp = inspiration_manager.get_inspiration(insp_id)
             if insp:
                 inspirations.append(insp)
+    return creative_dict, creative, inspirations
+
+
+@router.post("/prompts/generate-from-creative")
+async def generate_prompt_from_creative(request: GeneratePromptFromCreativeRequest):
+    creative_dict, creative, inspirations = _creative_prompt_inputs(request)
+    
+    if creative.prompt and not request.regenerate:
+        return {
+            "prompt": creative.prompt,
+            "aggregated_path": creative.aggregated_path
+        }
     
     aggregated_path = creative.aggregated_path
     
@@ -1352,7 +1962,8 @@ async def generate_prompt_from_creative(request: GeneratePromptFromCreativeReque
         output_format="detailed",
         organize_files=False,
         output_folder=None,
-        aggregated_path=aggregated_path
+        aggregated_path=aggregated_path,
+        use_cache=not request.regenerate
     )
     
     creative_dict['prompt'] = prompt.content
@@ -1364,11 +1975,63 @@ async def generate_prompt_from_creative(request: GeneratePromptFromCreativeReque
     }
 
 
+@router.post("/prompts/generate-from-creative/stream")
+async def stream_generate_prompt_from_creative(request: GeneratePromptFromCreativeRequest):
+    """SSE variant of /prompts/generate-from-creative; a stored prompt is sent as a single ``done`` event."""
+    creative_dict, creative, inspirations = _creative_prompt_inputs(request)
+    generator = prompt_generator
+    
+    async def events():
+        if creative.prompt and not request.regenerate:
+            yield format_sse("done", {"prompt": creative.prompt, "aggregated_path": creative.aggregated_path})
+            return
+        parts = []
+        async for delta in generator.stream_prompt(
+            creative=creative,
+            inspirations=inspirations,
+            output_format="detailed",
+            aggregated_path=creative.aggregated_path
+        ):
+            parts.append(delta)
+            yield format_sse("token", {"text": delta})
+        creative_dict['prompt'] = "".join(parts)
+        config_manager.save_creative(creative_dict)
+        yield format_sse("done", {"prompt": creative_dict['prompt'], "aggregated_path": creative.aggregated_path})
+    
+    return _sse_response(events())
+
+
 class AggregateFilesRequest(BaseModel):
     creative_id: str
     output_folder: str
 
 
+def _copy_into_type_folders(inspirations: List[Inspiration], output_path: Path) -> List[str]:
+    import shutil
+    
+    copied_files = []
+    
+    for insp in inspirations:
+        source = Path(insp.path)
+        if not source.exists():
+            continue
+        
+        type_folder = output_path / insp.type
+        type_folder.mkdir(parents=True, exist_ok=True)
+        
+        # The stored path may be a content-hash blob; copy under the user's file name
+        dest = type_folder / display_file_name(insp)
+        
+        if source.is_file():
+            shutil.copy2(source, dest)
+            copied_files.append(str(dest))
+        else:
+            shutil.copytree(source, dest, dirs_exist_ok=True)
+            copied_files.append(str(dest))
+    
+    return copied_files
+
+
 @router.post("/creatives/aggregate-files")
 async def aggregate_creative_files(request: AggregateFilesRequest):
     creative_dict = config_manager.get_creative(request.creative_id)
@@ -1401,25 +2064,7 @@ async def aggregate_creative_files(request: AggregateFilesRequest):
     output_path = Path(request.output_folder) / folder_name
     output_path.mkdir(parents=True, exist_ok=True)
     
-    copied_files = []
-    
-    for insp in inspirations:
-        source = Path(insp.path)
-        if not source.exists():
-            continue
-        
-        type_folder = output_path / insp.type
-        type_folder.mkdir(parents=True, exist_ok=True)
-        
-        dest = type_folder / source.name
-        
-        import shutil
-        if source.is_file():
-            shutil.copy2(source, dest)
-            copied_files.append(str(dest))
-        else:
-            shutil.copytree(source, dest, dirs_exist_ok=True)
-            copied_files.append(str(dest))
+    copied_files = await run_io(_copy_into_type_folders, inspirations, output_path)
     
     creative_dict['aggregated_path'] = str(output_path)
     config_manager.save_creative(creative_dict)
@@ -1458,13 +2103,6 @@ async def export_prompt(prompt_id: str, format: str = "markdown"):
 
 @router.post("/config/models", response_model=AIModelConfig)
 async def add_model_config(request: ConfigModelRequest):
-    if request.is_relation_completer:
-        config_manager.clear_relation_completer()
-    if request.is_topology_generator:
-        config_manager.clear_topology_generator()
-    if request.is_inspiration_generator:
-        config_manager.clear_inspiration_generator()
-    
     config_dict = {
         "name": request.name,
         "provider": request.provider,
@@ -1475,10 +2113,23 @@ async def add_model_config(request: ConfigModelRequest):
         "is_default": request.is_default,
         "is_relation_completer": request.is_relation_completer,
         "is_topology_generator": request.is_topology_generator,
-        "is_inspiration_generator": request.is_inspiration_generator
+        "is_inspiration_generator": request.is_inspiration_generator,
+        "rpm_limit": request.rpm_limit,
+        "tpm_limit": request.tpm_limit,
+        "max_concurrency": request.max_concurrency,
+        "context_window": request.context_window,
+        "source_token_budget": request.source_token_budget
     }
     
-    saved_config = config_manager.save_model_config(config_dict)
+    # Clearing the old role holders and saving the new config land as one journal entry
+    with config_manager.batch():
+        if request.is_relation_completer:
+            config_manager.clear_relation_completer()
+        if request.is_topology_generator:
+            config_manager.clear_topology_generator()
+        if request.is_inspiration_generator:
+            config_manager.clear_inspiration_generator()
+        saved_config = config_manager.save_model_config(config_dict)
     config = AIModelConfig(**saved_config)
     ai_summarizer.register_model(config)
     
@@ -1513,7 +2164,12 @@ async def update_model_config(model_id: str, request: ConfigModelRequest):
         "api_key": request.api_key,
         "base_url": request.base_url,
         "file_types": request.file_types,
-        "is_default": request.is_default
+        "is_default": request.is_default,
+        "rpm_limit": request.rpm_limit,
+        "tpm_limit": request.tpm_limit,
+        "max_concurrency": request.max_concurrency,
+        "context_window": request.context_window,
+        "source_token_budget": request.source_token_budget
     }
     
     saved_config = config_manager.update_model_config(model_id, updates)
@@ -1531,6 +2187,41 @@ async def update_model_config(model_id: str, request: ConfigModelRequest):
     return config
 
 
+@router.get("/config/models/scheduler/stats")
+async def get_llm_scheduler_stats():
+    return scheduler_stats()
+
+
+@router.get("/config/executors/stats")
+async def get_executor_stats():
+    return executor_stats()
+
+
+@router.get("/config/extraction/stats")
+async def get_extraction_stats():
+    return await run_io(get_extraction_service().cache_stats)
+
+
+@router.get("/config/watcher/stats")
+async def get_watcher_stats():
+    return inspiration_watcher.status()
+
+
+@router.get("/config/scanner/stats")
+async def get_scanner_stats():
+    return directory_scanner.cache_stats()
+
+
+@router.get("/config/llm-cache/stats")
+async def get_llm_cache_stats():
+    return get_response_cache().stats()
+
+
+@router.delete("/config/llm-cache")
+async def clear_llm_cache():
+    return {"removed": get_response_cache().clear()}
+
+
 @router.delete("/config/models/{model_id}")
 async def delete_model_config(model_id: str):
     if not config_manager.delete_model_config(model_id):
@@ -7,10 +7,17 @@ import base64
 import os
 import json
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Callable, AsyncIterator
 from abc import ABC, abstractmethod
 
 from ..models import Inspiration, InspirationType, AIModelConfig
+from .summary_cache import SummaryCache
+from .llm_scheduler import chat_completion, INTERACTIVE, BULK
+from .executors import run_io, run_cpu
+from .extraction import get_extraction_service, ExtractionError, SUPPORTED_SUFFIXES as EXTRACTABLE_SUFFIXES
+from .dir_scanner import get_snapshot, ScanEntry, SYSTEM_FILES, format_size
+from .context_packer import get_tokenizer, pack_text, pack_lines, input_budget, PackedContent
+from .chunked_summary import MapReduceSummarizer, iter_text_file
 
 
 TEXT_MODE_TYPES = [
@@ -20,13 +27,95 @@ TEXT_MODE_TYPES = [
     InspirationType.FOLDER, InspirationType.CONFIG
 ]
 
+# Bump when the file/folder prompts change so cached summaries from the old prompt are not reused
+FILE_PROMPT_VERSION = "file-v1"
+# Batched summaries come from a different prompt, so they are cached apart from single-file ones
+FILE_BATCH_PROMPT_VERSION = FILE_PROMPT_VERSION + ":batch"
+FOLDER_PROMPT_VERSION = "folder-v1"
+
+FOLDER_REQUEST_TIMEOUT = 120.0
+FILE_SYSTEM_PROMPT = "你是一个文件分析专家，请简要分析文件内容并总结其功能和用途。"
+# Input token budgets per call; each is capped further by the model's context window
+CONTENT_TOKENS = 4000
+FILE_CONTENT_TOKENS = 1000
+FOLDER_CHILDREN_TOKENS = 2500
+FOLDER_CHILD_MIN_TOKENS = 40
+# Characters read from a file before packing, so signatures past the head can still be picked
+FILE_READ_CHARS = 100000
+# Rows per sheet or table when a single document is streamed for summarizing
+DOCUMENT_MAX_ROWS = 50
+# Files inlined into a folder read as a single document, in this extension order
+DOCUMENT_FOLDER_EXTENSIONS = ['.txt', '.md', '.py', '.js', '.ts', '.json', '.yaml', '.yml', '.xml', '.html', '.css', '.vue', '.jsx', '.tsx', '.java', '.go', '.rs', '.c', '.cpp', '.h', '.hpp', '.sh', '.bat', '.ps1', '.env', '.ini', '.cfg', '.toml']
+DOCUMENT_FOLDER_MAX_FILES = 14
+# Files listed when a folder is summarized as text, code before documents
+TEXT_FOLDER_CODE_EXTENSIONS = ('.py', '.js', '.ts', '.json', '.yaml', '.yml', '.xml', '.html', '.css', '.vue', '.jsx', '.tsx', '.java', '.go', '.rs', '.c', '.cpp', '.h', '.hpp', '.sh', '.bat', '.ps1', '.env', '.ini', '.cfg', '.toml')
+TEXT_FOLDER_DOC_EXTENSIONS = ('.txt', '.md', '.doc', '.docx', '.pdf', '.rst')
+# Small sibling files are summarized together in one call answering with a JSON map of name -> summary
+FILE_BATCH_MAX_BYTES = 4096
+FILE_BATCH_FILE_TOKENS = 800
+FILE_BATCH_INPUT_TOKENS = 6000
+FILE_BATCH_MAX_FILES = 20
+FILE_BATCH_SUMMARY_TOKENS = 150
+FILE_BATCH_SYSTEM_PROMPT = "你是一个文件分析专家，请分别简要分析每个文件的内容并总结其功能和用途，只输出JSON。"
+# Inspirations summarized at once by batch_summarize; the scheduler still enforces the model's rate limits
+BATCH_CONCURRENCY = 16
+MISSING_API_KEY_MESSAGE = "错误：未配置 API Key。请在设置中配置 AI 模型。"
+
 
 class BaseSummarizer(ABC):
+    
+    def _pack_content(
+        self,
+        content: str,
+        prompt_text: str,
+        max_output_tokens: int,
+        label: str,
+        desired_tokens: int = CONTENT_TOKENS,
+        stats: Optional[Dict[str, int]] = None
+    ) -> PackedContent:
+        budget = input_budget(self.config, desired_tokens, max_output_tokens, prompt_text)
+        packed = pack_text(content, budget, self.config)
+        if packed.truncated:
+            if stats is not None:
+                # Folder runs report the count once in their summary line
+                stats["packed_files"] = stats.get("packed_files", 0) + 1
+            else:
+                print(f"Packed {label}: {packed.tokens}/{packed.source_tokens} tokens (budget {budget}{'' if packed.exact else ', estimated'})")
+        return packed
+    
+    def _format_folder_structure(self, entry: ScanEntry, max_depth: int = 3, current_depth: int = 0) -> str:
+        if current_depth >= max_depth:
+            return ""
+        
+        structure_lines = []
+        indent = "  " * current_depth
+        for item in entry.children[:50]:
+            if item.excluded:
+                continue
+            if item.is_dir:
+                structure_lines.append(f"{indent}+ {item.name}/")
+                sub_structure = self._format_folder_structure(item, max_depth, current_depth + 1)
+                if sub_structure:
+                    structure_lines.append(sub_structure)
+            else:
+                structure_lines.append(f"{indent}- {item.name} ({format_size(item.size)})")
+        
+        return "\n".join(structure_lines)
     @abstractmethod
     async def summarize(self, content: Any, **kwargs) -> str:
         pass
 
 
+def missing_api_key_summary() -> str:
+    return json.dumps({
+        "tree": "",
+        "overview": MISSING_API_KEY_MESSAGE,
+        "important_docs": "",
+        "secondary_docs": "",
+        "_context": {}
+    }, ensure_ascii=False)
+
+
 class ImageSummarizer(BaseSummarizer):
     def __init__(self, config: AIModelConfig):
         self.config = config
@@ -36,26 +125,16 @@ class ImageSummarizer(BaseSummarizer):
             return base64.b64encode(f.read()).decode("utf-8")
     
     async def summarize(self, image_path: str, **kwargs) -> str:
-        from openai import AsyncOpenAI
-        
-        client = AsyncOpenAI(
-            api_key=self.config.api_key,
-            base_url=self.config.base_url
-        )
-        
         # Check if model config is valid
         if not self.config.api_key:
-             return json.dumps({
-                "tree": "",
-                "overview": "错误：未配置 API Key。请在设置中配置 AI 模型。",
-                "important_docs": "",
-                "secondary_docs": "",
-                "_context": {}
-            }, ensure_ascii=False)
+            return missing_api_key_summary()
         
-        base64_image = self._encode_image(image_path)
+        base64_image = await run_cpu(self._encode_image, image_path)
         
-        response = await client.chat.completions.create(
+        response = await chat_completion(
+            self.config,
+            priority=kwargs.get("priority", INTERACTIVE),
+            owner=kwargs.get("owner"),
             model=self.config.model_name,
             messages=[
                 {
@@ -84,45 +163,10 @@ class DocumentSummarizer(BaseSummarizer):
     def __init__(self, config: AIModelConfig):
         self.config = config
     
-    def _read_docx(self, file_path: str) -> str:
-        try:
-            from docx import Document
-            doc = Document(file_path)
-            content = []
-            for para in doc.paragraphs:
-                if para.text.strip():
-                    content.append(para.text)
-            for table in doc.tables:
-                for row in table.rows:
-                    row_text = ' | '.join(cell.text for cell in row.cells)
-                    if row_text.strip():
-                        content.append(row_text)
-            return '\n'.join(content)
-        except Exception as e:
-            return f"[无法解析Word文档: {str(e)}]"
-    
-    def _read_pdf(self, file_path: str) -> str:
-        try:
-            from PyPDF2 import PdfReader
-            reader = PdfReader(file_path)
-            content = []
-            for page in reader.pages:
-                text = page.extract_text()
-                if text and text.strip():
-                    content.append(text)
-            return '\n'.join(content)
-        except Exception as e:
-            return f"[无法解析PDF文档: {str(e)}]"
-    
     def _read_content(self, file_path: str) -> str:
         path = Path(file_path)
-        ext = path.suffix.lower()
         
-        if ext == '.docx':
-            return self._read_docx(file_path)
-        elif ext == '.pdf':
-            return self._read_pdf(file_path)
-        elif path.is_file():
+        if path.is_file():
             try:
                 with open(path, 'r', encoding='utf-8', errors='ignore') as f:
                     return f.read()
@@ -137,68 +181,28 @@ class DocumentSummarizer(BaseSummarizer):
                 except Exception:
                     return ""
         elif path.is_dir():
-            content_parts = []
-            
-            tree_structure = self._get_folder_structure(path)
-            content_parts.append(f"=== 文件夹结构 ===\n{tree_structure}\n")
+            snapshot = get_snapshot(file_path)
+            content_parts = [f"=== 文件夹结构 ===\n{self._format_folder_structure(snapshot.entry)}\n"]
             
-            for ext in ['.txt', '.md', '.py', '.js', '.ts', '.json', '.yaml', '.yml', '.xml', '.html', '.css', '.vue', '.jsx', '.tsx', '.java', '.go', '.rs', '.c', '.cpp', '.h', '.hpp', '.sh', '.bat', '.ps1', '.env', '.ini', '.cfg', '.toml']:
-                for file_path in path.rglob(f'*{ext}'):
-                    try:
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            relative_path = file_path.relative_to(path)
-                            content_parts.append(f"=== {relative_path} ===\n{f.read()[:3000]}")
-                    except Exception:
-                        continue
+            # Pick the files first, then open only those instead of reading every match
+            ranked = []
+            for entry in snapshot.entry.files():
+                for rank, ext in enumerate(DOCUMENT_FOLDER_EXTENSIONS):
+                    if entry.name.endswith(ext):
+                        ranked.append((rank, entry))
+                        break
+            ranked.sort(key=lambda item: item[0])
             
-            return "\n\n".join(content_parts[:15])
-    
-    def _get_folder_structure(self, folder_path: Path, prefix: str = "", max_depth: int = 3, current_depth: int = 0) -> str:
-        if current_depth >= max_depth:
-            return ""
-        
-        structure_lines = []
-        try:
-            items = sorted(folder_path.iterdir(), key=lambda x: (not x.is_dir(), x.name.lower()))
-            for item in items[:50]:
-                if item.name.startswith('.') or item.name in ['node_modules', '__pycache__', '.git', 'venv', 'build', 'dist', '.venv']:
+            for _, entry in ranked[:DOCUMENT_FOLDER_MAX_FILES]:
+                try:
+                    with open(snapshot.full_path(entry), 'r', encoding='utf-8', errors='ignore') as f:
+                        content_parts.append(f"=== {entry.path} ===\n{f.read(3000)}")
+                except Exception:
                     continue
-                indent = "  " * current_depth
-                if item.is_dir():
-                    structure_lines.append(f"{indent}+ {item.name}/")
-                    sub_structure = self._get_folder_structure(item, prefix, max_depth, current_depth + 1)
-                    if sub_structure:
-                        structure_lines.append(sub_structure)
-                else:
-                    size = item.stat().st_size
-                    if size < 1024:
-                        size_str = f"{size}B"
-                    elif size < 1024 * 1024:
-                        size_str = f"{size / 1024:.1f}KB"
-                    else:
-                        size_str = f"{size / (1024 * 1024):.1f}MB"
-                    structure_lines.append(f"{indent}- {item.name} ({size_str})")
-        except PermissionError:
-            pass
-        
-        return "\n".join(structure_lines)
+            
+            return "\n\n".join(content_parts)
     
     async def summarize(self, file_path: str, file_type: str = "document", **kwargs) -> str:
-        from openai import AsyncOpenAI
-        
-        client = AsyncOpenAI(
-            api_key=self.config.api_key,
-            base_url=self.config.base_url
-        )
-        
-        content = self._read_content(file_path)
-        
-        if not content:
-            return "无法读取文件内容"
-        
-        if len(content) > 10000:
-            content = content[:10000] + "\n... (内容已截断)"
-        
         type_prompts = {
             "code": "你是一个代码分析专家，请分析代码并总结其功能、结构和特点。",
             "text": "你是一个文本分析专家，请提取文本的关键信息。",
@@ -234,72 +238,79 @@ class DocumentSummarizer(BaseSummarizer):
         }
         
         system_prompt = type_prompts.get(file_type, "你是一个内容分析专家，请分析并总结内容。")
-        
-        user_prompt = f"请分析以下内容并总结：\n\n1. 主要内容和主题\n2. 关键信息和要点\n3. 结构和特点\n4. 可用于创意的灵感点\n\n内容：\n{content}"
-        
-        if file_type == "folder":
-            user_prompt = f"请分析以下文件夹内容并生成详细的项目结构总结：\n\n{content}"
-        
         max_tokens_value = 10000 if file_type == "folder" else 2000
+        priority = kwargs.get("priority", INTERACTIVE)
         
-        response = await client.chat.completions.create(
-            model=self.config.model_name,
-            messages=[
-                {
-                    "role": "system",
-                    "content": system_prompt
-                },
-                {
-                    "role": "user",
-                    "content": user_prompt
-                }
-            ],
-            max_tokens=max_tokens_value
-        )
+        async def summarize_content(content: str) -> str:
+            if not content:
+                return "无法读取文件内容"
+            
+            content = self._pack_content(content, system_prompt, max_tokens_value, file_path).text
+            
+            user_prompt = f"请分析以下内容并总结：\n\n1. 主要内容和主题\n2. 关键信息和要点\n3. 结构和特点\n4. 可用于创意的灵感点\n\n内容：\n{content}"
+            
+            if file_type == "folder":
+                user_prompt = f"请分析以下文件夹内容并生成详细的项目结构总结：\n\n{content}"
+            
+            response = await chat_completion(
+                self.config,
+                model=self.config.model_name,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": system_prompt
+                    },
+                    {
+                        "role": "user",
+                        "content": user_prompt
+                    }
+                ],
+                max_tokens=max_tokens_value,
+                priority=priority,
+                owner=kwargs.get("owner")
+            )
+            
+            return response.choices[0].message.content
         
-        return response.choices[0].message.content
+        if not Path(file_path).is_file():
+            return await summarize_content(await run_io(self._read_content, file_path))
+        
+        # Stream the file: short ones go out in one call, long ones are chunked and merged
+        if Path(file_path).suffix.lower() in EXTRACTABLE_SUFFIXES:
+            pages = get_extraction_service().iter_pages(file_path, max_rows=DOCUMENT_MAX_ROWS)
+        else:
+            pages = iter_text_file(file_path)
+        chunked = MapReduceSummarizer(self.config, priority, kwargs.get("owner"))
+        try:
+            return await chunked.run(pages, summarize_content, input_budget(self.config, CONTENT_TOKENS, max_tokens_value, system_prompt), file_path)
+        except ExtractionError as e:
+            return await summarize_content(f"[无法解析文档: {e}]")
 
 
 class FolderSummarizer(BaseSummarizer):
-    def __init__(self, config: AIModelConfig):
+    def __init__(self, config: AIModelConfig, summary_cache: Optional[SummaryCache] = None):
         self.config = config
+        self.summary_cache = summary_cache
     
-    def _get_folder_tree(self, folder_path: Path, prefix: str = "", max_depth: int = 10, current_depth: int = 0, ignored_paths: List[str] = None) -> str:
-        if current_depth >= max_depth:
-            return ""
-        
-        ignored_paths = ignored_paths or []
-        
-        def is_ignored(item_path: Path) -> bool:
-            try:
-                relative = str(item_path.relative_to(folder_path))
-                for ignored in ignored_paths:
-                    if relative == ignored or relative.startswith(ignored + '/'):
-                        return True
-            except ValueError:
-                pass
-            return False
-        
-        structure_lines = []
-        try:
-            items = sorted(folder_path.iterdir(), key=lambda x: (not x.is_dir(), x.name.lower()))
-            for item in items:
-                if item.name.startswith('.') or item.name in ['node_modules', '__pycache__', '.git', 'venv', 'build', 'dist', '.venv', '__init__.py', 'package-lock.json', 'yarn.lock']:
-                    continue
-                if is_ignored(item):
+    def _get_folder_tree(self, folder_path: Path, max_depth: int = 10, ignored_paths: List[str] = None) -> str:
+        hidden = SYSTEM_FILES | {'__init__.py'}
+        
+        def render(entry: ScanEntry, depth: int) -> List[str]:
+            if depth >= max_depth:
+                return []
+            lines = []
+            indent = "  " * depth
+            for item in entry.visible_children(ignored_paths):
+                if item.name in hidden:
                     continue
-                indent = "  " * current_depth
-                if item.is_dir():
-                    structure_lines.append(f"{indent}+ {item.name}/")
-                    sub_structure = self._get_folder_tree(item, prefix, max_depth, current_depth + 1, ignored_paths)
-                    if sub_structure:
-                        structure_lines.append(sub_structure)
+                if item.is_dir:
+                    lines.append(f"{indent}+ {item.name}/")
+                    lines.extend(render(item, depth + 1))
                 else:
-                    structure_lines.append(f"{indent}- {item.name}")
-        except PermissionError:
-            pass
+                    lines.append(f"{indent}- {item.name}")
+            return lines
         
-        return "\n".join(structure_lines)
+        return "\n".join(render(get_snapshot(str(folder_path)).entry, 0))
     
     def _get_file_info(self, file_path: Path) -> Dict[str, Any]:
         try:
@@ -315,63 +326,21 @@ class FolderSummarizer(BaseSummarizer):
         except Exception:
             return {"size": 0, "size_str": "unknown", "extension": file_path.suffix.lower(), "modified": 0}
     
-    def _read_file_content(self, file_path: Path, max_length: int = 6000) -> str:
+    async def _load_file_content(self, file_path: Path, max_length: int = FILE_READ_CHARS) -> str:
+        if file_path.suffix.lower() in EXTRACTABLE_SUFFIXES:
+            try:
+                return await get_extraction_service().extract(str(file_path), max_chars=max_length)
+            except ExtractionError as e:
+                return f"[文档解析失败: {e}]"
+        return await run_io(self._read_file_content, file_path, max_length)
+    
+    def _read_file_content(self, file_path: Path, max_length: int = FILE_READ_CHARS) -> str:
         try:
             suffix = file_path.suffix.lower()
             
-            if suffix == '.docx':
-                try:
-                    from docx import Document
-                    doc = Document(str(file_path))
-                    content = []
-                    for para in doc.paragraphs[:30]:
-                        if para.text.strip():
-                            content.append(para.text)
-                    return '\n'.join(content)[:max_length]
-                except Exception as e:
-                    return f"[Word文档解析失败: {str(e)}]"
-            
-            elif suffix == '.pdf':
-                try:
-                    from PyPDF2 import PdfReader
-                    reader = PdfReader(str(file_path))
-                    content = []
-                    for page in reader.pages[:10]:
-                        text = page.extract_text()
-                        if text and text.strip():
-                            content.append(text)
-                    return '\n'.join(content)[:max_length]
-                except Exception as e:
-                    return f"[PDF解析失败: {str(e)}]"
-            
-            elif suffix in ['.xlsx', '.xls']:
-                try:
-                    import openpyxl
-                    wb = openpyxl.load_workbook(str(file_path), read_only=True)
-                    content = []
-                    for sheet_name in wb.sheetnames[:3]:
-                        sheet = wb[sheet_name]
-                        content.append(f"=== Sheet: {sheet_name} ===")
-                        for row in list(sheet.iter_rows(max_row=20, values_only=True)):
-                            if any(cell for cell in row if cell):
-                                content.append(' | '.join(str(cell) if cell else '' for cell in row))
-                    return '\n'.join(content)[:max_length]
-                except Exception as e:
-                    return f"[Excel解析失败: {str(e)}]"
-            
-            elif suffix in ['.pptx', '.ppt']:
-                try:
-                    from pptx import Presentation
-                    prs = Presentation(str(file_path))
-                    content = []
-                    for i, slide in enumerate(prs.slides[:10]):
-                        content.append(f"=== Slide {i+1} ===")
-                        for shape in slide.shapes:
-                            if hasattr(shape, "text") and shape.text.strip():
-                                content.append(shape.text)
-                    return '\n'.join(content)[:max_length]
-                except Exception as e:
-                    return f"[PPT解析失败: {str(e)}]"
+            if suffix in ['.doc', '.xls', '.ppt']:
+                info = self._get_file_info(file_path)
+                return f"[旧版Office文件: {info['size_str']}, 格式: {suffix}]"
             
             elif suffix in ['.mp3', '.wav', '.flac', '.aac', '.ogg', '.m4a']:
                 info = self._get_file_info(file_path)
@@ -400,11 +369,11 @@ class FolderSummarizer(BaseSummarizer):
             else:
                 try:
                     with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
+                        content = f.read(max_length)
                         if not content.strip():
                             info = self._get_file_info(file_path)
                             return f"[空文件或二进制: {info['size_str']}]"
-                        return content[:max_length]
+                        return content
                 except Exception:
                     info = self._get_file_info(file_path)
                     return f"[文件读取失败: {info['size_str']}, 格式: {suffix}]"
@@ -432,7 +401,16 @@ class FolderSummarizer(BaseSummarizer):
         
         return "normal"
     
-    async def _summarize_file(self, client, file_path: Path, relative_path: str, content: str) -> str:
+    async def _summarize_file(
+        self,
+        file_path: Path,
+        relative_path: str,
+        content: str,
+        priority: str = BULK,
+        owner: Optional[str] = None,
+        use_cache: bool = True,
+        stats: Optional[Dict[str, int]] = None
+    ) -> str:
         try:
             suffix = file_path.suffix.lower()
             
@@ -442,19 +420,27 @@ class FolderSummarizer(BaseSummarizer):
 
 请简要描述这个文件的类型和用途（1-2句话）。"""
             else:
+                packed = self._pack_content(content, FILE_SYSTEM_PROMPT, 300, relative_path, FILE_CONTENT_TOKENS, stats)
+                if stats is not None:
+                    stats["input_tokens"] = stats.get("input_tokens", 0) + packed.tokens
                 prompt = f"""文件: {relative_path}
 
 内容:
-{content[:3000]}
+{packed.text}
 
 请分析这个文件的内容并总结其功能和用途（2-3句话）。"""
             
-            response = await client.chat.completions.create(
+            response = await chat_completion(
+                self.config,
+                priority=priority,
+                owner=owner,
+                timeout=FOLDER_REQUEST_TIMEOUT,
+                use_cache=use_cache,
                 model=self.config.model_name,
                 messages=[
                     {
                         "role": "system",
-                        "content": "你是一个文件分析专家，请简要分析文件内容并总结其功能和用途。"
+                        "content": FILE_SYSTEM_PROMPT
                     },
                     {
                         "role": "user",
@@ -463,14 +449,57 @@ class FolderSummarizer(BaseSummarizer):
                 ],
                 max_tokens=300
             )
+            if stats is not None and getattr(response, "usage", None):
+                stats["tokens"] += response.usage.total_tokens or 0
             return response.choices[0].message.content
         except Exception as e:
             print(f"Error summarizing file {relative_path}: {e}")
             return f"[总结失败: {str(e)}]"
     
-    async def _summarize_recursive(self, current_path: Path, root_path: Path, client, semaphore, ignored_paths: List[str]) -> Dict[str, Any]:
+    async def _summarize_recursive(
+        self,
+        current_path: Path,
+        root_path: Path,
+        ignored_paths: List[str],
+        stats: Optional[Dict[str, int]] = None,
+        refresh: bool = False,
+        owner: Optional[str] = None,
+        progress: Optional[Callable[..., None]] = None,
+        entry: Optional[ScanEntry] = None,
+        emit: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Summarize a file or folder bottom-up. With ``emit``, every file and folder summary is
+        passed to it as a flat entry the moment it is ready, and folder results keep only their
+        direct children instead of the whole nested subtree.
+        """
+        node = await self._summarize_node(current_path, root_path, ignored_paths, stats, refresh, owner, progress, entry, emit)
+        if node is not None and emit:
+            emit(self._flat_entry(node))
+        return node
+    
+    async def _summarize_node(
+        self,
+        current_path: Path,
+        root_path: Path,
+        ignored_paths: List[str],
+        stats: Optional[Dict[str, int]],
+        refresh: bool,
+        owner: Optional[str],
+        progress: Optional[Callable[..., None]],
+        entry: Optional[ScanEntry],
+        emit: Optional[Callable[[Dict[str, Any]], None]]
+    ) -> Dict[str, Any]:
         import asyncio
         
+        if stats is None:
+            stats = {}
+        for counter in ("hits", "misses", "tokens", "files_done", "batched_files"):
+            stats.setdefault(counter, 0)
+        cache = self.summary_cache
+        # Bulk calls are queued per owner so two folders (or a folder and a chat) share the model fairly
+        owner = owner or str(root_path)
+        
         try:
             if current_path == root_path:
                 relative_path = ""
@@ -490,57 +519,53 @@ class FolderSummarizer(BaseSummarizer):
         if is_ignored(relative_path):
             print(f"Skipping ignored path: {relative_path}")
             return None
+        
+        if entry is None:
+            snapshot = await run_io(get_snapshot, str(root_path))
+            entry = snapshot.find(relative_path)
+            if entry is None:
+                return None
 
-        if current_path.is_file():
-            if current_path.name.startswith('.') or current_path.name in ['package-lock.json', 'yarn.lock', '.DS_Store', 'Thumbs.db']:
+        if not entry.is_dir:
+            if entry.name.startswith('.') or entry.name in SYSTEM_FILES:
                 print(f"DEBUG: Skipping system file {current_path.name}")
                 return None
                 
-            async with semaphore:
-                try:
-                    print(f"DEBUG: Processing file: {relative_path}")
-                    content = self._read_file_content(current_path, max_length=6000)
-                    
-                    summary = await self._summarize_file(client, current_path, relative_path, content)
-                    
-                    print(f"DEBUG: Successfully summarized file: {relative_path}")
-                    return {
-                        "path": relative_path,
-                        "name": current_path.name,
-                        "type": "file",
-                        "summary": summary,
-                        "importance": self._get_file_importance(current_path)
-                    }
-                except Exception as e:
-                    print(f"DEBUG: Error summarizing file {current_path}: {e}")
-                    return None
+            cache_key = await run_io(cache.file_key, current_path, self.config.model_name, FILE_PROMPT_VERSION) if cache else None
+            summary = None if refresh else cache.get(cache_key) if cache else None
+            if summary is not None:
+                stats["hits"] += 1
+                self._report_file_done(stats, progress, relative_path)
+                return self._file_result(current_path, relative_path, summary, cache_key)
+            
+            try:
+                print(f"DEBUG: Processing file: {relative_path}")
+                if progress:
+                    progress(current_path=relative_path)
+                content = await self._load_file_content(current_path)
+                
+                summary = await self._summarize_file(current_path, relative_path, content, owner=owner, use_cache=not refresh, stats=stats)
+                stats["misses"] += 1
+                if cache and not summary.startswith("[总结失败"):
+                    cache.put(cache_key, summary, self.config.model_name)
+                else:
+                    # Failed summaries must not poison the cache or the ancestors' keys
+                    cache_key = None
+                
+                print(f"DEBUG: Successfully summarized file: {relative_path}")
+                return self._file_result(current_path, relative_path, summary, cache_key)
+            except Exception as e:
+                print(f"DEBUG: Error summarizing file {current_path}: {e}")
+                return None
+            finally:
+                self._report_file_done(stats, progress, relative_path)
 
-        if current_path.is_dir():
+        if entry.is_dir:
             print(f"DEBUG: Processing directory: {relative_path if relative_path else 'ROOT'}")
             
-            direct_children = []
             try:
-                items = sorted(current_path.iterdir(), key=lambda x: (not x.is_dir(), x.name.lower()))
-                print(f"DEBUG: Found {len(items)} items in {current_path.name}")
-                
-                for item in items:
-                    if item.name.startswith('.') or item.name in ['node_modules', '__pycache__', '.git', 'dist', 'build', 'venv', '.venv']:
-                        print(f"DEBUG: Skipping excluded item: {item.name}")
-                        continue
-                    
-                    try:
-                        if current_path == root_path:
-                            item_relative = item.name
-                        else:
-                            item_relative = f"{relative_path}/{item.name}"
-                    except Exception:
-                        item_relative = item.name
-                    
-                    if is_ignored(item_relative):
-                        print(f"DEBUG: Skipping ignored item: {item_relative}")
-                        continue
-                    
-                    direct_children.append(item)
+                direct_children = entry.visible_children(ignored_paths)
+                print(f"DEBUG: Found {len(entry.children)} items in {current_path.name}, {len(direct_children)} not excluded")
                 
                 if not direct_children:
                     print(f"DEBUG: No valid children for directory: {relative_path}")
@@ -552,13 +577,19 @@ class FolderSummarizer(BaseSummarizer):
                         "children": []
                     }
 
+                # Small files go out several per call; what batching did not cover is summarized one by one
+                batched = await self._summarize_small_files(direct_children, root_path, stats, refresh, owner, progress, emit)
                 child_tasks = [
-                    self._summarize_recursive(item, root_path, client, semaphore, ignored_paths)
-                    for item in direct_children
+                    self._summarize_recursive(root_path / item.path, root_path, ignored_paths, stats, refresh, owner, progress, item, emit)
+                    for item in direct_children if item.path not in batched
                 ]
                 
-                results = await asyncio.gather(*child_tasks)
-                children = [r for r in results if r is not None]
+                results = iter(await asyncio.gather(*child_tasks))
+                children = [batched[item.path] if item.path in batched else next(results) for item in direct_children]
+                children = [r for r in children if r is not None]
+                if emit:
+                    # Grandchildren were emitted already; only direct children are needed from here on
+                    children = [{key: value for key, value in child.items() if key != "children"} for child in children]
                 print(f"DEBUG: Got {len(children)} valid children for {current_path.name}")
                 
                 if not children:
@@ -573,20 +604,42 @@ class FolderSummarizer(BaseSummarizer):
                         }
                     return None
                 
+                children_budget = input_budget(self.config, FOLDER_CHILDREN_TOKENS, 500)
+                # Every child gets a fair share of the budget instead of the first few taking all of it
+                child_tokens = max(children_budget // len(children), FOLDER_CHILD_MIN_TOKENS)
+                tokenizer = get_tokenizer(self.config.model_name)
                 direct_children_summaries = []
                 for child in children:
-                    child_summary = child.get('summary', '')[:150]
+                    child_summary = " ".join((child.get('summary') or '').split())
+                    if tokenizer.count(child_summary) > child_tokens:
+                        child_summary = tokenizer.truncate(child_summary, child_tokens) + "..."
                     direct_children_summaries.append(
                         f"- [{child['type'].upper()}] {child['name']}: {child_summary}"
                     )
                 
-                children_info = "\n".join(direct_children_summaries)
+                children_info = pack_lines(direct_children_summaries, children_budget, self.config).text
                 
-                if len(children_info) > 8000:
-                    children_info = children_info[:8000] + "\n...(内容已截断)"
+                # Unchanged subtree: every child key matches, so the folder summary is reused as well
+                folder_key = None
+                if cache:
+                    folder_key = cache.folder_key(
+                        [(child["name"], child.get("cache_key")) for child in children],
+                        self.config.model_name,
+                        FOLDER_PROMPT_VERSION
+                    )
+                folder_summary = None if refresh else cache.get(folder_key) if cache else None
+                if folder_summary is not None:
+                    stats["hits"] += 1
+                    return {
+                        "path": relative_path,
+                        "name": current_path.name,
+                        "type": "folder",
+                        "summary": folder_summary,
+                        "children": children,
+                        "cache_key": folder_key
+                    }
                 
-                async with semaphore:
-                    prompt = f"""请总结以下文件夹的内容。
+                prompt = f"""请总结以下文件夹的内容。
 
 文件夹路径: {relative_path if relative_path else "Root"}
 
@@ -598,54 +651,282 @@ class FolderSummarizer(BaseSummarizer):
 2. 包含的主要内容类型
 3. 各子项之间的关系（如果有）"""
 
-                    try:
-                        print(f"Generating summary for directory: {relative_path if relative_path else 'ROOT'}")
-                        response = await client.chat.completions.create(
-                            model=self.config.model_name,
-                            messages=[
-                                {"role": "system", "content": "你是一个项目架构分析专家，擅长总结文件夹结构和内容。"},
-                                {"role": "user", "content": prompt}
-                            ],
-                            max_tokens=500
-                        )
-                        folder_summary = response.choices[0].message.content
-                    except Exception as e:
-                        print(f"Error generating folder summary for {relative_path}: {e}")
-                        folder_summary = f"总结生成失败: {str(e)}"
+                try:
+                    print(f"Generating summary for directory: {relative_path if relative_path else 'ROOT'}")
+                    response = await chat_completion(
+                        self.config,
+                        priority=BULK,
+                        owner=owner,
+                        timeout=FOLDER_REQUEST_TIMEOUT,
+                        use_cache=not refresh,
+                        model=self.config.model_name,
+                        messages=[
+                            {"role": "system", "content": "你是一个项目架构分析专家，擅长总结文件夹结构和内容。"},
+                            {"role": "user", "content": prompt}
+                        ],
+                        max_tokens=500
+                    )
+                    folder_summary = response.choices[0].message.content
+                    stats["misses"] += 1
+                    if getattr(response, "usage", None):
+                        stats["tokens"] += response.usage.total_tokens or 0
+                    if cache:
+                        cache.put(folder_key, folder_summary, self.config.model_name)
+                except Exception as e:
+                    print(f"Error generating folder summary for {relative_path}: {e}")
+                    folder_summary = f"总结生成失败: {str(e)}"
+                    folder_key = None
 
                 return {
                     "path": relative_path,
                     "name": current_path.name,
                     "type": "folder",
                     "summary": folder_summary,
-                    "children": children
+                    "children": children,
+                    "cache_key": folder_key
                 }
             except Exception as e:
                 print(f"Error processing directory {current_path}: {e}")
                 return None
         
         return None
+    
+    def _flat_entry(self, node: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "path": node["path"],
+            "name": node["name"],
+            "summary": node["summary"],
+            "type": node["type"]
+        }
+    
+    def _file_result(self, file_path: Path, relative_path: str, summary: str, cache_key: Optional[str]) -> Dict[str, Any]:
+        return {
+            "path": relative_path,
+            "name": file_path.name,
+            "type": "file",
+            "summary": summary,
+            "importance": self._get_file_importance(file_path),
+            "cache_key": cache_key
+        }
+    
+    async def _summarize_small_files(
+        self,
+        items: List[ScanEntry],
+        root_path: Path,
+        stats: Dict[str, int],
+        refresh: bool,
+        owner: str,
+        progress: Optional[Callable[..., None]],
+        emit: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Summarize the small files among ``items`` in shared calls. Returns results by relative
+        path for the files it handled, cache hits included; anything missing from the result
+        (large files, a lone small file, entries the model left out) is for the per-file path.
+        """
+        import asyncio
+        
+        cache = self.summary_cache
+        candidates = [
+            item for item in items
+            if not item.is_dir and item.size <= FILE_BATCH_MAX_BYTES
+            and not item.name.startswith('.') and item.name not in SYSTEM_FILES
+        ]
+        if len(candidates) < 2:
+            return {}
+        
+        async def lookup(item: ScanEntry):
+            cache_key = await run_io(cache.file_key, root_path / item.path, self.config.model_name, FILE_BATCH_PROMPT_VERSION) if cache else None
+            return cache_key, None if refresh else cache.get(cache_key) if cache else None
+        
+        results: Dict[str, Dict[str, Any]] = {}
+        pending = []
+        for item, (cache_key, summary) in zip(candidates, await asyncio.gather(*(lookup(item) for item in candidates))):
+            if summary is not None:
+                stats["hits"] += 1
+                results[item.path] = self._file_result(root_path / item.path, item.path, summary, cache_key)
+                self._report_file_done(stats, progress, item.path)
+                if emit:
+                    emit(self._flat_entry(results[item.path]))
+            else:
+                pending.append((item, cache_key))
+        if len(pending) < 2:
+            return results
+        
+        contents = await asyncio.gather(*(self._load_file_content(root_path / item.path) for item, _ in pending))
+        budget = input_budget(
+            self.config,
+            FILE_BATCH_INPUT_TOKENS,
+            FILE_BATCH_MAX_FILES * FILE_BATCH_SUMMARY_TOKENS,
+            FILE_BATCH_SYSTEM_PROMPT
+        )
+        batches = []
+        current = []
+        used = 0
+        for (item, cache_key), content in zip(pending, contents):
+            packed = pack_text(content, FILE_BATCH_FILE_TOKENS, self.config)
+            # The section heading and separators cost a few tokens per file
+            cost = packed.tokens + 16
+            if current and (used + cost > budget or len(current) >= FILE_BATCH_MAX_FILES):
+                batches.append(current)
+                current, used = [], 0
+            current.append((item, cache_key, packed.text))
+            used += cost
+        if current:
+            batches.append(current)
+        
+        for batch_results in await asyncio.gather(*(
+            self._summarize_file_batch(batch, root_path, stats, refresh, owner, progress, emit)
+            for batch in batches if len(batch) > 1
+        )):
+            results.update(batch_results)
+        return results
+    
+    def _parse_batch_summaries(self, text: str) -> Dict[str, str]:
+        # No response_format: many OpenAI-compatible backends reject it, so the object is dug out of free text
+        start, end = text.find("{"), text.rfind("}")
+        if start < 0 or end < start:
+            raise ValueError("响应中没有JSON对象")
+        data = json.loads(text[start:end + 1])
+        if not isinstance(data, dict):
+            raise ValueError("响应不是JSON对象")
+        # Some models wrap the map: {"files": {...}}
+        if len(data) == 1 and isinstance(next(iter(data.values())), dict):
+            data = next(iter(data.values()))
+        return {str(name): summary.strip() for name, summary in data.items() if isinstance(summary, str) and summary.strip()}
+    
+    async def _summarize_file_batch(
+        self,
+        batch: List[Any],
+        root_path: Path,
+        stats: Dict[str, int],
+        refresh: bool,
+        owner: str,
+        progress: Optional[Callable[..., None]],
+        emit: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        cache = self.summary_cache
+        if progress:
+            progress(current_path=batch[0][0].path)
+        
+        # Siblings: file names are unique and shorter for the model to repeat than full paths
+        sections = "\n\n".join(f"### {item.name}\n{text}" for item, _, text in batch)
+        prompt = f"""以下是同一文件夹中的 {len(batch)} 个文件。
+
+{sections}
 
-    async def summarize(self, folder_path: str, ignored_paths: List[str] = None, **kwargs) -> str:
-        from openai import AsyncOpenAI
+请分析每个文件的内容并总结其功能和用途（每个文件1-2句话）。
+以JSON对象返回，键为文件名（与 ### 后的名称完全一致），值为该文件的总结，不要遗漏任何文件。"""
+        
+        try:
+            response = await chat_completion(
+                self.config,
+                priority=BULK,
+                owner=owner,
+                timeout=FOLDER_REQUEST_TIMEOUT,
+                use_cache=not refresh,
+                model=self.config.model_name,
+                messages=[
+                    {"role": "system", "content": FILE_BATCH_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=len(batch) * FILE_BATCH_SUMMARY_TOKENS + 100
+            )
+            stats["misses"] += 1
+            if getattr(response, "usage", None):
+                stats["tokens"] += response.usage.total_tokens or 0
+            summaries = self._parse_batch_summaries(response.choices[0].message.content or "")
+        except Exception as e:
+            print(f"Batch summary of {len(batch)} files failed, falling back to per-file calls: {e}")
+            return {}
+        
+        results = {}
+        for item, cache_key, _ in batch:
+            summary = summaries.get(item.name) or summaries.get(item.path)
+            if summary is None:
+                continue
+            if cache:
+                cache.put(cache_key, summary, self.config.model_name)
+            results[item.path] = self._file_result(root_path / item.path, item.path, summary, cache_key)
+            stats["batched_files"] += 1
+            self._report_file_done(stats, progress, item.path)
+            if emit:
+                emit(self._flat_entry(results[item.path]))
+        if len(results) < len(batch):
+            print(f"Batch summary left out {len(batch) - len(results)} of {len(batch)} files; summarizing them one by one")
+        return results
+    
+    def _report_file_done(self, stats: Dict[str, int], progress: Optional[Callable[..., None]], relative_path: str):
+        stats["files_done"] += 1
+        if progress:
+            progress(
+                files_done=stats["files_done"],
+                files_total=stats.get("files_total"),
+                current_path=relative_path,
+                tokens=stats["tokens"],
+                cache_hits=stats["hits"]
+            )
+    
+    def _count_files(self, root_path: Path, ignored_paths: List[str]) -> int:
+        """Number of files _summarize_recursive will visit, for progress totals."""
+        return sum(1 for _ in get_snapshot(str(root_path)).entry.files(ignored_paths, skip_system_files=True))
+
+    async def summarize_stream(
+        self,
+        folder_path: str,
+        ignored_paths: List[str] = None,
+        progress: Optional[Callable[..., None]] = None,
+        stats: Optional[Dict[str, int]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield ``{"path", "name", "summary", "type"}`` for every file and folder as soon as it is
+        summarized, bottom-up: a folder follows its contents and the root ("") comes last.
+        """
         import asyncio
         
-        # Check if model config is valid
-        if not self.config.api_key:
-            return json.dumps({
-                "tree": "",
-                "overview": "错误：未配置 API Key。请在设置中配置 AI 模型。",
-                "important_docs": "",
-                "secondary_docs": "",
-                "_context": {}
-            }, ensure_ascii=False)
+        path = Path(folder_path)
+        queue: asyncio.Queue = asyncio.Queue()
+        finished = object()
+        
+        async def run():
+            try:
+                await self._summarize_recursive(path, path, ignored_paths or [], stats, progress=progress, emit=queue.put_nowait)
+            finally:
+                queue.put_nowait(finished)
         
-        # Increase timeout to avoid timeouts during long processing
-        client = AsyncOpenAI(
-            api_key=self.config.api_key,
-            base_url=self.config.base_url,
-            timeout=120.0
+        task = asyncio.create_task(run())
+        try:
+            while True:
+                item = await queue.get()
+                if item is finished:
+                    break
+                yield item
+            await task
+        finally:
+            if not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+    
+    @staticmethod
+    def _tree_order(entry: Dict[str, Any]):
+        # Same order as the tree: parents before children, folders before files, then by name
+        parts = entry["path"].split("/") if entry["path"] else []
+        return tuple(
+            (index == len(parts) - 1 and entry["type"] == "file", part.lower(), part)
+            for index, part in enumerate(parts)
         )
+    
+    async def summarize(
+        self,
+        folder_path: str,
+        ignored_paths: List[str] = None,
+        progress: Optional[Callable[..., None]] = None,
+        on_summary: Optional[Callable[[Dict[str, Any]], None]] = None,
+        **kwargs
+    ) -> str:
+        # Check if model config is valid
+        if not self.config.api_key:
+            return missing_api_key_summary()
         
         path = Path(folder_path)
         if not path.is_dir():
@@ -659,11 +940,25 @@ class FolderSummarizer(BaseSummarizer):
         
         ignored_paths = ignored_paths or []
         
-        # Semaphore for concurrency control
-        sem = asyncio.Semaphore(10) # Increase concurrency slightly as we are doing hierarchical
-        
-        # Recursive summarization
-        root_summary = await self._summarize_recursive(path, path, client, sem, ignored_paths)
+        # Recursive summarization; unchanged files and subtrees are served from the summary cache
+        run_stats = {"hits": 0, "misses": 0, "tokens": 0, "files_done": 0, "batched_files": 0}
+        if progress:
+            run_stats["files_total"] = await run_io(self._count_files, path, ignored_paths)
+            progress(files_done=0, files_total=run_stats["files_total"], tokens=0, cache_hits=0)
+        # Entries arrive as they are ready, so callers can persist partial results along the way
+        flat_summaries = []
+        root_summary = None
+        async for entry in self.summarize_stream(folder_path, ignored_paths, progress, run_stats):
+            flat_summaries.append(entry)
+            if entry["path"] == "":
+                root_summary = entry
+            if on_summary:
+                on_summary(entry)
+        if progress:
+            # Folder-level calls happen after the last file; report their tokens too
+            progress(tokens=run_stats["tokens"], cache_hits=run_stats["hits"], current_path=None)
+        cache_stats = {"hits": run_stats["hits"], "misses": run_stats["misses"], "batched_files": run_stats["batched_files"]}
+        print(f"Folder summary for {folder_path}: {cache_stats['hits']} cache hits, {cache_stats['misses']} model calls ({cache_stats['batched_files']} files batched), {run_stats['tokens']} tokens ({run_stats.get('input_tokens', 0)} of packed file content, {run_stats.get('packed_files', 0)} files truncated to fit)")
         
         if not root_summary:
             return json.dumps({
@@ -674,26 +969,11 @@ class FolderSummarizer(BaseSummarizer):
                 "_context": {}
             }, ensure_ascii=False)
 
-        # Flatten results for file_summaries (frontend compatibility)
-        # We include both files and folders in the flat list so frontend can display them
-        flat_summaries = []
-        
-        def flatten(node):
-            if not node: return
-            flat_summaries.append({
-                "path": node['path'],
-                "name": node['name'],
-                "summary": node['summary'],
-                "type": node['type']
-            })
-            if node.get('children'):
-                for child in node['children']:
-                    flatten(child)
-        
-        flatten(root_summary)
+        # file_summaries lists files and folders in tree order (frontend compatibility)
+        flat_summaries.sort(key=self._tree_order)
         
         # Generate Tree (standard visual tree)
-        tree_structure = self._get_folder_tree(path, ignored_paths=ignored_paths)
+        tree_structure = await run_io(self._get_folder_tree, path, ignored_paths=ignored_paths)
         
         # Overview is the root folder summary
         overview = root_summary.get('summary', '')
@@ -706,26 +986,19 @@ class FolderSummarizer(BaseSummarizer):
             "secondary_docs": "", # Removed as requested
             "_context": {
                 "file_summaries": flat_summaries,
+                "cache_stats": cache_stats,
             }
         }
         
         return json.dumps(result, ensure_ascii=False)
 
     async def regenerate_section(self, section: str, context: Dict[str, Any], folder_path: str = None, ignored_paths: List[str] = None) -> str:
-        from openai import AsyncOpenAI
-        
-        client = AsyncOpenAI(
-            api_key=self.config.api_key,
-            base_url=self.config.base_url,
-            timeout=120.0
-        )
-        
         file_summaries = context.get('file_summaries', [])
         tree_structure = context.get('tree', '') # context might have tree if passed fully
         
         if section == 'tree':
             if folder_path:
-                return self._get_folder_tree(Path(folder_path), ignored_paths=ignored_paths)
+                return await run_io(self._get_folder_tree, Path(folder_path), ignored_paths=ignored_paths)
             return tree_structure
         elif section == 'overview':
             prompt = f"""请根据以下文件夹结构和文件摘要，重新生成一份项目概览。
@@ -762,7 +1035,10 @@ class FolderSummarizer(BaseSummarizer):
         else:
             return "无效的章节"
             
-        response = await client.chat.completions.create(
+        response = await chat_completion(
+            self.config,
+            timeout=FOLDER_REQUEST_TIMEOUT,
+            use_cache=False,
             model=self.config.model_name,
             messages=[
                 {"role": "system", "content": "你是一个项目分析专家。"},
@@ -781,24 +1057,17 @@ class FolderSummarizer(BaseSummarizer):
             data = json.loads(json_str)
             return {
                 "overall_summary": data.get("overview", ""),
-                "file_summaries": data.get("_context", {}).get("file_summaries", [])
+                "file_summaries": data.get("_context", {}).get("file_summaries", []),
+                "cache_stats": data.get("_context", {}).get("cache_stats", {})
             }
         except:
             return {
                 "overall_summary": "生成失败",
-                "file_summaries": []
+                "file_summaries": [],
+                "cache_stats": {}
             }
     
     async def regenerate_single_summary(self, folder_path: str, file_path: str, ignored_paths: List[str] = None) -> str:
-        from openai import AsyncOpenAI
-        import asyncio
-        
-        client = AsyncOpenAI(
-            api_key=self.config.api_key,
-            base_url=self.config.base_url,
-            timeout=120.0
-        )
-        
         path = Path(folder_path)
         target_path = path / file_path if file_path else path
         
@@ -806,31 +1075,25 @@ class FolderSummarizer(BaseSummarizer):
             return "文件/文件夹不存在"
         
         ignored_paths = ignored_paths or []
-        sem = asyncio.Semaphore(10)
         
         if target_path.is_file():
             try:
-                content = self._read_file_content(target_path, max_length=6000)
-                return await self._summarize_file(client, target_path, file_path, content)
+                content = await self._load_file_content(target_path)
+                summary = await self._summarize_file(target_path, file_path, content, priority=INTERACTIVE, use_cache=False)
+                if self.summary_cache and not summary.startswith("[总结失败"):
+                    cache_key = await run_io(self.summary_cache.file_key, target_path, self.config.model_name, FILE_PROMPT_VERSION)
+                    self.summary_cache.put(cache_key, summary, self.config.model_name)
+                return summary
             except Exception as e:
                 return f"总结失败: {str(e)}"
          
         elif target_path.is_dir():
-            result = await self._summarize_recursive(target_path, path, client, sem, ignored_paths)
+            result = await self._summarize_recursive(target_path, path, ignored_paths, refresh=True)
             return result.get('summary', '') if result else "无法生成总结"
             
         return "未知类型"
     
     async def regenerate_node_summary(self, folder_path: str, node_path: str, ignored_paths: List[str] = None) -> Dict[str, Any]:
-        from openai import AsyncOpenAI
-        import asyncio
-        
-        client = AsyncOpenAI(
-            api_key=self.config.api_key,
-            base_url=self.config.base_url,
-            timeout=120.0
-        )
-        
         path = Path(folder_path)
         target_path = path / node_path if node_path else path
         
@@ -838,9 +1101,9 @@ class FolderSummarizer(BaseSummarizer):
             return {"error": "文件/文件夹不存在"}
         
         ignored_paths = ignored_paths or []
-        sem = asyncio.Semaphore(10)
         
-        result = await self._summarize_recursive(target_path, path, client, sem, ignored_paths)
+        # An explicit regenerate should produce a fresh answer, so skip cache reads (results are still stored)
+        result = await self._summarize_recursive(target_path, path, ignored_paths, refresh=True)
         
         if result:
             return {
@@ -876,50 +1139,25 @@ class TextContentSummarizer(BaseSummarizer):
                 except Exception:
                     return ""
         elif path.is_dir():
-            content_parts = []
-            
-            tree_structure = self._get_folder_structure(path)
-            content_parts.append(f"=== 文件夹结构 ===\n{tree_structure}\n")
+            snapshot = get_snapshot(file_path)
+            content_parts = [f"=== 文件夹结构 ===\n{self._format_folder_structure(snapshot.entry)}\n"]
             
-            file_count = 0
             dir_count = 0
-            file_type_counts = {}
             main_files = []
             
-            for ext in ['.py', '.js', '.ts', '.json', '.yaml', '.yml', '.xml', '.html', '.css', '.vue', '.jsx', '.tsx', '.java', '.go', '.rs', '.c', '.cpp', '.h', '.hpp', '.sh', '.bat', '.ps1', '.env', '.ini', '.cfg', '.toml']:
-                for file_path in path.rglob(f'*{ext}'):
-                    try:
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            relative_path = file_path.relative_to(path)
-                            content = f.read()
-                            if len(content) > 0:
-                                file_count += 1
-                                main_files.append(f"  - {relative_path}")
-                    except Exception:
-                        continue
+            # Sizes come from the snapshot, so no file has to be opened just to see if it is empty
+            for extensions in (TEXT_FOLDER_CODE_EXTENSIONS, TEXT_FOLDER_DOC_EXTENSIONS):
+                for entry in snapshot.entry.files():
+                    if entry.size > 0 and entry.name.endswith(extensions):
+                        main_files.append(f"  - {entry.path}")
+            file_count = len(main_files)
             
-            for ext in ['.txt', '.md', '.doc', '.docx', '.pdf', '.rst']:
-                for file_path in path.rglob(f'*{ext}'):
-                    try:
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            relative_path = file_path.relative_to(path)
-                            content = f.read()
-                            if len(content) > 0:
-                                file_count += 1
-                                main_files.append(f"  - {relative_path}")
-                    except Exception:
-                        continue
-            
-            for item in path.iterdir():
-                if item.is_dir() and not item.name.startswith('.') and item.name not in ['node_modules', '__pycache__', '.git', 'venv', 'build', 'dist', '.venv']:
+            for item in snapshot.entry.visible_children():
+                if item.is_dir:
                     dir_count += 1
-                    try:
-                        sub_items = list(item.iterdir())[:5]
-                        sub_names = [sub.name for sub in sub_items if not sub.name.startswith('.')]
-                        if sub_names:
-                            content_parts.append(f"  - {item.name}/ ({', '.join(sub_names[:3])}{'...' if len(sub_names) > 3 else ''})")
-                    except PermissionError:
-                        pass
+                    sub_names = [sub.name for sub in item.children[:5] if not sub.name.startswith('.')]
+                    if sub_names:
+                        content_parts.append(f"  - {item.name}/ ({', '.join(sub_names[:3])}{'...' if len(sub_names) > 3 else ''})")
             
             if main_files:
                 content_parts.append(f"\n主要文件 ({len(main_files)} 个):")
@@ -935,21 +1173,6 @@ class TextContentSummarizer(BaseSummarizer):
         return ""
     
     async def summarize(self, file_path: str, file_type: str = "text", **kwargs) -> str:
-        from openai import AsyncOpenAI
-        
-        client = AsyncOpenAI(
-            api_key=self.config.api_key,
-            base_url=self.config.base_url
-        )
-        
-        content = self._read_content(file_path)
-        
-        if not content:
-            return "无法读取文件内容"
-        
-        if len(content) > 10000:
-            content = content[:10000] + "\n... (内容已截断)"
-        
         type_prompts = {
             "code": "你是一个代码分析专家，请分析代码并总结其功能、结构和特点。",
             "text": "你是一个文本分析专家，请提取文本的关键信息。",
@@ -965,27 +1188,44 @@ class TextContentSummarizer(BaseSummarizer):
         }
         
         system_prompt = type_prompts.get(file_type, "你是一个内容分析专家，请分析并总结内容。")
+        priority = kwargs.get("priority", INTERACTIVE)
         
-        response = await client.chat.completions.create(
-            model=self.config.model_name,
-            messages=[
-                {
-                    "role": "system",
-                    "content": system_prompt
-                },
-                {
-                    "role": "user",
-                    "content": f"请分析以下内容并总结：\n\n1. 主要内容和主题\n2. 关键信息和要点\n3. 结构和特点\n4. 可用于创意的灵感点\n\n内容：\n{content}"
-                }
-            ],
-            max_tokens=2000
-        )
+        async def summarize_content(content: str) -> str:
+            if not content:
+                return "无法读取文件内容"
+            
+            content = self._pack_content(content, system_prompt, 2000, file_path).text
+            
+            response = await chat_completion(
+                self.config,
+                model=self.config.model_name,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": system_prompt
+                    },
+                    {
+                        "role": "user",
+                        "content": f"请分析以下内容并总结：\n\n1. 主要内容和主题\n2. 关键信息和要点\n3. 结构和特点\n4. 可用于创意的灵感点\n\n内容：\n{content}"
+                    }
+                ],
+                max_tokens=2000,
+                priority=priority,
+                owner=kwargs.get("owner")
+            )
+            
+            return response.choices[0].message.content
         
-        return response.choices[0].message.content
+        if not Path(file_path).is_file():
+            return await summarize_content(await run_io(self._read_content, file_path))
+        
+        chunked = MapReduceSummarizer(self.config, priority, kwargs.get("owner"))
+        return await chunked.run(iter_text_file(file_path), summarize_content, input_budget(self.config, CONTENT_TOKENS, 2000, system_prompt), file_path)
 
 
 class AISummarizer:
-    def __init__(self):
+    def __init__(self, cache_path: str = "./storage/summary_cache.db"):
+        self.summary_cache = SummaryCache(cache_path)
         self.model_configs: Dict[str, AIModelConfig] = {}
         self.summarizers: Dict[str, BaseSummarizer] = {}
         self.default_config: Optional[AIModelConfig] = None
@@ -1000,13 +1240,13 @@ class AISummarizer:
             elif file_type == "document":
                 self.summarizers[file_type] = DocumentSummarizer(config)
             elif file_type == "folder":
-                self.summarizers[file_type] = FolderSummarizer(config)
+                self.summarizers[file_type] = FolderSummarizer(config, self.summary_cache)
             elif file_type in ["code", "text", "notebook", "script", "style", "markup", "data", "environment", "config"]:
                 self.summarizers[file_type] = TextContentSummarizer(config)
         
         if config.is_default:
             self.default_config = config
-            self.folder_summarizer = FolderSummarizer(config)
+            self.folder_summarizer = FolderSummarizer(config, self.summary_cache)
     
     def get_summarizer(self, inspiration_type: str) -> Optional[BaseSummarizer]:
         if inspiration_type == "folder":
@@ -1014,35 +1254,88 @@ class AISummarizer:
             if "folder" in self.summarizers:
                 return self.summarizers["folder"]
             # Fallback to default
-            return self.folder_summarizer if self.folder_summarizer else FolderSummarizer(self.default_config) if self.default_config else None
+            return self.folder_summarizer if self.folder_summarizer else FolderSummarizer(self.default_config, self.summary_cache) if self.default_config else None
         return self.summarizers.get(inspiration_type)
     
-    async def summarize_inspiration(self, inspiration: Inspiration, ignored_paths: List[str] = None) -> str:
+    async def summarize_inspiration(
+        self,
+        inspiration: Inspiration,
+        ignored_paths: List[str] = None,
+        progress: Optional[Callable[..., None]] = None,
+        on_summary: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> str:
+        try:
+            return await self._summarize(inspiration, ignored_paths, progress=progress, on_summary=on_summary)
+        except LookupError as e:
+            return str(e)
+        except Exception as e:
+            return f"总结失败: {str(e)}"
+    
+    async def _summarize(
+        self,
+        inspiration: Inspiration,
+        ignored_paths: List[str] = None,
+        progress: Optional[Callable[..., None]] = None,
+        on_summary: Optional[Callable[[Dict[str, Any]], None]] = None,
+        **kwargs
+    ) -> str:
         summarizer = self.get_summarizer(inspiration.type)
         
         if not summarizer:
             if self.default_config:
                 if inspiration.type == "folder":
-                    summarizer = FolderSummarizer(self.default_config)
+                    summarizer = FolderSummarizer(self.default_config, self.summary_cache)
                 else:
                     summarizer = DocumentSummarizer(self.default_config)
             else:
-                return f"暂不支持 {inspiration.type} 类型的内容总结，请先配置AI模型"
+                raise LookupError(f"暂不支持 {inspiration.type} 类型的内容总结，请先配置AI模型")
         
-        try:
-            if isinstance(summarizer, FolderSummarizer):
-                summary = await summarizer.summarize(inspiration.path, ignored_paths=ignored_paths)
-            elif isinstance(summarizer, (TextContentSummarizer, DocumentSummarizer)):
-                summary = await summarizer.summarize(inspiration.path, inspiration.type)
-            else:
-                summary = await summarizer.summarize(inspiration.path)
-            return summary
-        except Exception as e:
-            return f"总结失败: {str(e)}"
+        if isinstance(summarizer, FolderSummarizer):
+            return await summarizer.summarize(inspiration.path, ignored_paths=ignored_paths, progress=progress, on_summary=on_summary, **kwargs)
+        elif isinstance(summarizer, (TextContentSummarizer, DocumentSummarizer)):
+            return await summarizer.summarize(inspiration.path, inspiration.type, **kwargs)
+        else:
+            return await summarizer.summarize(inspiration.path, **kwargs)
     
-    async def batch_summarize(self, inspirations: List[Inspiration]) -> Dict[str, str]:
-        results = {}
-        for inspiration in inspirations:
+    async def batch_summarize(
+        self,
+        inspirations: List[Inspiration],
+        concurrency: int = BATCH_CONCURRENCY,
+        on_result: Optional[Callable[[str, Optional[str], Optional[str]], None]] = None,
+        owner: Optional[str] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Summarize many inspirations concurrently, each with the model configured for its type.
+        Calls go through the bulk lane so interactive requests are not starved. A failure only
+        affects its own item: each id maps to ``{"status": "success", "summary": ...}`` or
+        ``{"status": "error", "error": ...}``, and ``on_result(id, summary, error)`` fires as each finishes.
+        """
+        import asyncio
+        
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        results: Dict[str, Dict[str, Any]] = {}
+        
+        async def run(inspiration: Inspiration):
             ignored_paths = inspiration.metadata.get('ignored_paths', []) if inspiration.metadata else []
-            results[inspiration.id] = await self.summarize_inspiration(inspiration, ignored_paths)
+            summary = error = None
+            async with semaphore:
+                try:
+                    summary = await self._summarize(inspiration, ignored_paths, priority=BULK, owner=owner)
+                    if summary and MISSING_API_KEY_MESSAGE in summary:
+                        # Summarizers hand this back as a displayable result rather than raising
+                        summary, error = None, "未配置 API Key"
+                except Exception as e:
+                    print(f"Batch summarize failed for {inspiration.id}: {e}")
+                    error = str(e) or e.__class__.__name__
+            if error is None:
+                results[inspiration.id] = {"status": "success", "summary": summary}
+            else:
+                results[inspiration.id] = {"status": "error", "error": error}
+            if on_result:
+                on_result(inspiration.id, summary, error)
+        
+        await asyncio.gather(*(run(inspiration) for inspiration in inspirations))
         return results
+    
+    def close(self):
+        self.summary_cache.close()
@@ -0,0 +1,198 @@
+"""
+Content-addressed Blob Store Module
+Deduplicating, reference-counted storage for uploaded inspiration files
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterable
+
+from .inspiration_store import open_sqlite
+
+
+CHUNK_SIZE = 1024 * 1024
+STALE_UPLOAD_SECONDS = 24 * 60 * 60
+
+
+class BlobInfo:
+    def __init__(self, key: str, sha256: str, size: int, path: str, deduplicated: bool = False):
+        self.key = key
+        self.sha256 = sha256
+        self.size = size
+        self.path = path
+        self.deduplicated = deduplicated
+    
+    def to_dict(self):
+        return {
+            "key": self.key,
+            "sha256": self.sha256,
+            "size": self.size,
+            "path": self.path,
+            "deduplicated": self.deduplicated
+        }
+
+
+class BlobWriter:
+    """Streams bytes into a temp file next to the blob tree while hashing and measuring them."""
+    
+    def __init__(self, store: "BlobStore", suffix: str = ""):
+        self.store = store
+        self.suffix = suffix.lower()
+        self.size = 0
+        self._hasher = hashlib.sha256()
+        fd, self.tmp_path = tempfile.mkstemp(prefix="upload_", suffix=".part", dir=str(store.tmp_dir))
+        self._file = os.fdopen(fd, 'wb')
+    
+    def write(self, chunk: bytes):
+        self._file.write(chunk)
+        self._hasher.update(chunk)
+        self.size += len(chunk)
+    
+    def commit(self) -> BlobInfo:
+        self._file.close()
+        return self.store._adopt(self.tmp_path, self._hasher.hexdigest(), self.suffix, self.size)
+    
+    def abort(self):
+        if not self._file.closed:
+            self._file.close()
+        try:
+            os.unlink(self.tmp_path)
+        except OSError:
+            pass
+
+
+class BlobStore:
+    """
+    Blobs live at ``<root>/<sha[:2]>/<sha256><suffix>``. The suffix is part of the key because
+    summarizers and type detection work off the file extension. Reference counts are kept in
+    ``<root>/blobs.db``; a blob is only removed from disk by ``gc`` once nothing references it.
+    """
+    
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.tmp_dir = self.root / ".tmp"
+        self.tmp_dir.mkdir(exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = open_sqlite(self.root / "blobs.db")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS blobs (
+                key TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                refcount INTEGER NOT NULL DEFAULT 0,
+                created_at TEXT
+            )"""
+        )
+    
+    def path_for(self, key: str) -> Path:
+        return self.root / key[:2] / key
+    
+    def open_writer(self, suffix: str = "") -> BlobWriter:
+        return BlobWriter(self, suffix)
+    
+    def put_file(self, source_path: str, suffix: Optional[str] = None) -> BlobInfo:
+        source = Path(source_path)
+        suffix = (source.suffix if suffix is None else suffix).lower()
+        
+        # One read: hashed while it streams into a temp file; _adopt drops the copy if the content is known
+        writer = self.open_writer(suffix)
+        try:
+            with open(source, 'rb') as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    writer.write(chunk)
+            return writer.commit()
+        except BaseException:
+            writer.abort()
+            raise
+    
+    def _adopt(self, tmp_path: str, digest: str, suffix: str, size: int) -> BlobInfo:
+        key = digest + suffix
+        final_path = self.path_for(key)
+        with self._lock:
+            deduplicated = final_path.exists()
+            if deduplicated:
+                os.unlink(tmp_path)
+            else:
+                final_path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp_path, final_path)
+            self._conn.execute(
+                """INSERT INTO blobs (key, sha256, size, refcount, created_at) VALUES (?, ?, ?, 1, ?)
+                ON CONFLICT(key) DO UPDATE SET refcount = refcount + 1""",
+                (key, digest, size, datetime.now().isoformat())
+            )
+        return BlobInfo(key=key, sha256=digest, size=size, path=str(final_path), deduplicated=deduplicated)
+    
+    def release(self, key: str) -> int:
+        with self._lock:
+            self._conn.execute("UPDATE blobs SET refcount = MAX(refcount - 1, 0) WHERE key = ?", (key,))
+            row = self._conn.execute("SELECT refcount FROM blobs WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+    
+    def gc(self, keys: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Delete unreferenced blobs (all of them, or only among ``keys``) and stale upload temp files."""
+        removed: List[str] = []
+        reclaimed = 0
+        with self._lock:
+            if keys is None:
+                rows = self._conn.execute("SELECT key, size FROM blobs WHERE refcount <= 0").fetchall()
+            else:
+                keys = list(keys)
+                rows = [
+                    row for key in keys
+                    for row in self._conn.execute("SELECT key, size FROM blobs WHERE key = ? AND refcount <= 0", (key,))
+                ]
+            for key, size in rows:
+                path = self.path_for(key)
+                try:
+                    path.unlink()
+                    reclaimed += size
+                except FileNotFoundError:
+                    pass
+                self._conn.execute("DELETE FROM blobs WHERE key = ?", (key,))
+                removed.append(key)
+        
+        if keys is None:
+            # Leftovers from crashed uploads; recent ones may still be streaming
+            cutoff = time.time() - STALE_UPLOAD_SECONDS
+            for tmp_file in self.tmp_dir.glob("upload_*.part"):
+                try:
+                    if tmp_file.stat().st_mtime < cutoff:
+                        tmp_file.unlink()
+                except OSError:
+                    pass
+        
+        return {"removed": len(removed), "reclaimed_bytes": reclaimed, "keys": removed}
+    
+    def dedup_report(self, top: int = 10) -> Dict[str, Any]:
+        with self._lock:
+            blobs, references, physical, logical, unreferenced = self._conn.execute(
+                """SELECT COUNT(*), COALESCE(SUM(refcount), 0), COALESCE(SUM(size), 0),
+                COALESCE(SUM(size * refcount), 0), COALESCE(SUM(refcount <= 0), 0) FROM blobs"""
+            ).fetchone()
+            duplicates = self._conn.execute(
+                """SELECT key, size, refcount FROM blobs WHERE refcount > 1
+                ORDER BY size * (refcount - 1) DESC LIMIT ?""",
+                (top,)
+            ).fetchall()
+        return {
+            "blobs": blobs,
+            "references": references,
+            "physical_bytes": physical,
+            "logical_bytes": logical,
+            "saved_bytes": max(logical - physical, 0),
+            "unreferenced_blobs": unreferenced,
+            "top_duplicates": [
+                {"key": key, "size": size, "refcount": refcount, "saved_bytes": size * (refcount - 1)}
+                for key, size, refcount in duplicates
+            ]
+        }
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
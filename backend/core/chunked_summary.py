@@ -0,0 +1,278 @@
+"""
+Chunked Summary Module
+Map-reduce summarization of single files too large for one prompt, streamed page by page
+"""
+
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+
+from ..models import AIModelConfig
+from .llm_scheduler import chat_completion, INTERACTIVE
+from .executors import run_io
+from .context_packer import get_tokenizer, input_budget
+
+
+# Source tokens read before giving up on the rest of a file; AIModelConfig.source_token_budget overrides
+SOURCE_TOKEN_BUDGET = 200000
+# Files up to this many times the single-call budget are packed into one call instead of chunked
+CHUNKED_THRESHOLD = 3
+CHUNK_TOKENS = 3000
+CHUNK_SUMMARY_TOKENS = 600
+REDUCE_INPUT_TOKENS = 6000
+REDUCE_SUMMARY_TOKENS = 1000
+# Chunks in flight at once; parsing waits for a free slot so memory stays bounded
+MAP_CONCURRENCY = 4
+REDUCE_FANIN = 8
+CHUNK_REQUEST_TIMEOUT = 120.0
+TEXT_BLOCK_CHARS = 64 * 1024
+
+MAP_SYSTEM_PROMPT = "你是一个文档分析助手。下面是一份长文档中的一个片段，请提炼该片段的主题、关键信息和结论，保留重要的名称、数据和术语，不要编造内容。"
+REDUCE_SYSTEM_PROMPT = "你是一个文档分析助手。下面是同一份长文档中按顺序排列的若干片段摘要，请将它们合并为一份连贯、不重复的摘要，保留关键信息和整体结构。"
+
+
+async def iter_text_file(path: str, block_chars: int = TEXT_BLOCK_CHARS) -> AsyncIterator[str]:
+    """Stream a text file in blocks that end on a line break, without reading it whole."""
+    f = await run_io(open, path, 'r', encoding='utf-8', errors='ignore')
+    try:
+        carry = ""
+        while True:
+            block = await run_io(f.read, block_chars)
+            if not block:
+                break
+            block = carry + block
+            cut = block.rfind("\n")
+            if cut < 0:
+                # One enormous line; hand it over in pieces rather than buffering it all
+                carry = ""
+                yield block
+            else:
+                carry = block[cut + 1:]
+                yield block[:cut]
+        if carry:
+            yield carry
+    finally:
+        await run_io(f.close)
+
+
+class MapReduceSummarizer:
+    """
+    Summarizes one long source with a single model. The source is an async iterator of pages
+    (or text blocks) that is consumed lazily: short sources are handed back whole to the
+    caller's one-shot ``single`` call; long ones are cut into chunks that are summarized
+    concurrently while parsing continues, and the chunk summaries are merged in groups, level
+    by level, until they fit ``single``. Reading stops once ``token_budget`` source tokens
+    have been taken, and the final prompt says the summary covers only that part.
+    """
+    
+    def __init__(
+        self,
+        config: AIModelConfig,
+        priority: str = INTERACTIVE,
+        owner: Optional[str] = None,
+        token_budget: Optional[int] = None
+    ):
+        self.config = config
+        self.priority = priority
+        self.owner = owner
+        self.token_budget = token_budget or getattr(config, "source_token_budget", None) or SOURCE_TOKEN_BUDGET
+        self.tokenizer = get_tokenizer(config.model_name)
+        self.stats = {"pages": 0, "source_tokens": 0, "chunks": 0, "map_calls": 0, "reduce_calls": 0, "failed_chunks": 0, "truncated": False}
+    
+    async def run(
+        self,
+        pages: AsyncIterator[str],
+        single: Callable[[str], Awaitable[str]],
+        direct_budget: int,
+        label: str = ""
+    ) -> str:
+        threshold = direct_budget * CHUNKED_THRESHOLD
+        buffered: List[str] = []
+        buffered_tokens = 0
+        try:
+            async for page in pages:
+                self.stats["pages"] += 1
+                buffered.append(page)
+                buffered_tokens += self.tokenizer.count(page)
+                if buffered_tokens > threshold:
+                    break
+            else:
+                # Fits (after packing) into one call: nothing to map-reduce
+                return await single("\n".join(buffered))
+            
+            summaries = await self._map(buffered, pages)
+        finally:
+            await pages.aclose()
+        
+        final_budget = max(direct_budget - 200, CHUNK_SUMMARY_TOKENS)
+        level = 0
+        while len(summaries) > 1 and sum(self.tokenizer.count(s) for s in summaries) > final_budget:
+            level += 1
+            summaries = await self._reduce(summaries, level)
+        
+        print(
+            f"Chunked summary for {label}: {self.stats['pages']} pages, {self.stats['source_tokens']} tokens, "
+            f"{self.stats['chunks']} chunks, {self.stats['reduce_calls']} reduce calls"
+            f"{' (token budget reached)' if self.stats['truncated'] else ''}"
+        )
+        
+        header = f"以下是一份长文档按顺序分为 {self.stats['chunks']} 个片段后的分段摘要"
+        if self.stats["truncated"]:
+            header += f"（文档过长，仅分析了前 {self.stats['pages']} 页/段，约 {self.stats['source_tokens']} tokens）"
+        return await single(f"{header}：\n\n" + "\n\n".join(summaries))
+    
+    def _split(self, text: str, limit: int) -> List[str]:
+        """Cut an oversized page on line breaks, and a single oversized line by tokens."""
+        pieces: List[str] = []
+        current: List[str] = []
+        current_tokens = 0
+        for line in text.splitlines():
+            cost = self.tokenizer.count(line) + 1
+            while cost > limit:
+                head = self.tokenizer.truncate(line, limit - 1) or line[:1]
+                if current:
+                    pieces.append("\n".join(current))
+                    current, current_tokens = [], 0
+                pieces.append(head)
+                line = line[len(head):]
+                cost = self.tokenizer.count(line) + 1
+            if current_tokens + cost > limit and current:
+                pieces.append("\n".join(current))
+                current, current_tokens = [], 0
+            current.append(line)
+            current_tokens += cost
+        if current:
+            pieces.append("\n".join(current))
+        return pieces
+    
+    async def _map(self, buffered: List[str], pages: AsyncIterator[str]) -> List[str]:
+        chunk_budget = max(256, input_budget(self.config, CHUNK_TOKENS, CHUNK_SUMMARY_TOKENS, MAP_SYSTEM_PROMPT))
+        slots = asyncio.Semaphore(MAP_CONCURRENCY)
+        tasks: List[asyncio.Task] = []
+        current: List[str] = []
+        current_tokens = 0
+        
+        async def submit():
+            nonlocal current, current_tokens
+            if not current:
+                return
+            text = "\n".join(current)
+            current, current_tokens = [], 0
+            # Backpressure: no more parsing until a chunk slot frees up
+            await slots.acquire()
+            index = len(tasks)
+            self.stats["chunks"] += 1
+            tasks.append(asyncio.create_task(self._summarize_chunk(index, text, slots)))
+        
+        async def feed(page: str) -> bool:
+            nonlocal current_tokens
+            tokens = self.tokenizer.count(page)
+            if self.stats["source_tokens"] + tokens > self.token_budget:
+                remaining = self.token_budget - self.stats["source_tokens"]
+                page = self.tokenizer.truncate(page, remaining)
+                tokens = self.tokenizer.count(page)
+                self.stats["truncated"] = True
+            self.stats["source_tokens"] += tokens
+            for piece in (self._split(page, chunk_budget) if tokens > chunk_budget else [page]):
+                cost = self.tokenizer.count(piece) + 1
+                if current_tokens + cost > chunk_budget:
+                    await submit()
+                current.append(piece)
+                current_tokens += cost
+            return not self.stats["truncated"]
+        
+        try:
+            proceed = True
+            for page in buffered:
+                proceed = await feed(page)
+                if not proceed:
+                    break
+            if proceed:
+                async for page in pages:
+                    self.stats["pages"] += 1
+                    if not await feed(page):
+                        break
+            await submit()
+            summaries = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        
+        succeeded = [summary for summary in summaries if summary is not None]
+        if not succeeded:
+            raise RuntimeError("所有片段总结均失败")
+        return [
+            summary if summary is not None else f"[片段 {index + 1} 总结失败]"
+            for index, summary in enumerate(summaries)
+        ]
+    
+    async def _complete(self, system_prompt: str, user_prompt: str, max_tokens: int) -> str:
+        response = await chat_completion(
+            self.config,
+            priority=self.priority,
+            owner=self.owner,
+            timeout=CHUNK_REQUEST_TIMEOUT,
+            model=self.config.model_name,
+            messages=[
+                {
+                    "role": "system",
+                    "content": system_prompt
+                },
+                {
+                    "role": "user",
+                    "content": user_prompt
+                }
+            ],
+            max_tokens=max_tokens
+        )
+        return response.choices[0].message.content
+    
+    async def _summarize_chunk(self, index: int, text: str, slots: asyncio.Semaphore) -> Optional[str]:
+        try:
+            self.stats["map_calls"] += 1
+            summary = await self._complete(MAP_SYSTEM_PROMPT, f"片段 {index + 1}：\n{text}", CHUNK_SUMMARY_TOKENS)
+            return f"[片段 {index + 1}] {summary}"
+        except Exception as e:
+            self.stats["failed_chunks"] += 1
+            print(f"Error summarizing chunk {index + 1}: {e}")
+            return None
+        finally:
+            slots.release()
+    
+    def _group(self, summaries: List[str]) -> List[List[str]]:
+        group_budget = input_budget(self.config, REDUCE_INPUT_TOKENS, REDUCE_SUMMARY_TOKENS, REDUCE_SYSTEM_PROMPT)
+        groups: List[List[str]] = []
+        current: List[str] = []
+        current_tokens = 0
+        for summary in summaries:
+            cost = self.tokenizer.count(summary) + 2
+            if current and (current_tokens + cost > group_budget or len(current) >= REDUCE_FANIN):
+                groups.append(current)
+                current, current_tokens = [], 0
+            current.append(summary)
+            current_tokens += cost
+        if current:
+            groups.append(current)
+        # Always make progress: two summaries per group at least
+        if len(groups) == len(summaries):
+            groups = [summaries[i:i + 2] for i in range(0, len(summaries), 2)]
+        return groups
+    
+    async def _reduce(self, summaries: List[str], level: int) -> List[str]:
+        groups = self._group(summaries)
+        slots = asyncio.Semaphore(MAP_CONCURRENCY)
+        
+        async def merge(index: int, group: List[str]) -> str:
+            if len(group) == 1:
+                return group[0]
+            async with slots:
+                self.stats["reduce_calls"] += 1
+                try:
+                    merged = await self._complete(REDUCE_SYSTEM_PROMPT, "\n\n".join(group), REDUCE_SUMMARY_TOKENS)
+                except Exception as e:
+                    print(f"Error merging chunk summaries (level {level}, group {index + 1}): {e}")
+                    # Keep the group's content rather than losing it; shortened so the next level can fit it
+                    merged = "\n".join(self.tokenizer.truncate(s, REDUCE_SUMMARY_TOKENS // len(group)) for s in group)
+            return f"[第 {level} 层合并 {index + 1}] {merged}"
+        
+        return list(await asyncio.gather(*(merge(index, group) for index, group in enumerate(groups))))
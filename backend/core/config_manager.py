@@ -2,12 +2,17 @@
 Configuration persistence manager for Creative Master
 """
 
+import functools
 import json
 import os
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 from uuid import uuid4
 
+from .journal import JournaledJSONStore, atomic_write_json
+
 
 def json_serializer(obj):
     if isinstance(obj, datetime):
@@ -19,8 +24,17 @@ def json_serializer(obj):
     raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
 
 
+def _locked(method):
+    """Mutate the in-memory stores under the lock journal compaction snapshots them with."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._batch_lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
 class ConfigManager:
-    def __init__(self, data_dir: str = None):
+    def __init__(self, data_dir: str = None, journal: bool = True, compact_threshold: int = 1024 * 1024):
         if data_dir is None:
             base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
             data_dir = os.path.join(base_dir, "data")
@@ -35,6 +49,13 @@ class ConfigManager:
         self.relation_types_file = os.path.join(data_dir, "relation_types.json")
         self.prompts_file = os.path.join(data_dir, "prompts.json")
         
+        self.journal = journal
+        self.compact_threshold = compact_threshold
+        self._journals: Dict[str, JournaledJSONStore] = {}
+        self._batch_lock = threading.RLock()
+        self._batch_depth = 0
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+        
         self._model_configs: Dict[str, Any] = {}
         self._combinations: Dict[str, Any] = {}
         self._creatives: Dict[str, Any] = {}
@@ -43,14 +64,29 @@ class ConfigManager:
         
         self._load_all()
     
+    def _store_attrs(self) -> Dict[str, str]:
+        return {
+            self.model_configs_file: '_model_configs',
+            self.combinations_file: '_combinations',
+            self.creatives_file: '_creatives',
+            self.relation_types_file: '_relation_types',
+            self.prompts_file: '_prompts',
+        }
+    
     def _load_all(self):
-        self._model_configs = self._load_json(self.model_configs_file, {})
-        self._combinations = self._load_json(self.combinations_file, {})
-        self._creatives = self._load_json(self.creatives_file, {})
-        self._relation_types = self._load_json(self.relation_types_file, {})
-        self._prompts = self._load_json(self.prompts_file, {})
+        for filepath, attr in self._store_attrs().items():
+            setattr(self, attr, self._load_json(filepath, {}))
     
     def _load_json(self, filepath: str, default: Any) -> Any:
+        if self.journal:
+            store = JournaledJSONStore(
+                filepath,
+                serializer=json_serializer,
+                compact_threshold=self.compact_threshold,
+                lock=self._batch_lock
+            )
+            self._journals[filepath] = store
+            return store.load(default)
         if os.path.exists(filepath):
             try:
                 with open(filepath, 'r', encoding='utf-8') as f:
@@ -60,8 +96,61 @@ class ConfigManager:
         return default
     
     def _save_json(self, filepath: str, data: Any):
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2, default=json_serializer)
+        atomic_write_json(filepath, data, serializer=json_serializer)
+    
+    def _persist(self, filepath: str, data: Dict[str, Any], changed: List[str] = (), deleted: List[str] = ()):
+        ops = [{"op": "put", "key": key, "value": data[key]} for key in changed]
+        ops.extend({"op": "del", "key": key} for key in deleted)
+        with self._batch_lock:
+            if self._batch_depth:
+                self._pending.setdefault(filepath, []).extend(ops)
+                return
+        self._write(filepath, data, ops)
+    
+    def _write(self, filepath: str, data: Dict[str, Any], ops: List[Dict[str, Any]]):
+        if self.journal:
+            self._journals[filepath].append(ops)
+        else:
+            self._save_json(filepath, data)
+    
+    @contextmanager
+    def batch(self):
+        """
+        Coalesce every mutation made inside the block into one write per store.
+        
+        In journal mode each store gets a single batch entry, which replay applies all-or-nothing.
+        Otherwise each touched file is rewritten once via temp file + rename. If the block raises,
+        nothing is written and the touched stores are reloaded from disk.
+        """
+        with self._batch_lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            except BaseException:
+                if self._batch_depth == 1:
+                    pending, self._pending = self._pending, {}
+                    for filepath in pending:
+                        self._reload(filepath)
+                raise
+            else:
+                if self._batch_depth == 1:
+                    pending, self._pending = self._pending, {}
+                    attrs = self._store_attrs()
+                    for filepath, ops in pending.items():
+                        self._write(filepath, getattr(self, attrs[filepath]), ops)
+            finally:
+                self._batch_depth -= 1
+    
+    def _reload(self, filepath: str):
+        attr = self._store_attrs()[filepath]
+        if self.journal:
+            setattr(self, attr, self._journals[filepath].reload({}))
+        else:
+            setattr(self, attr, self._load_json(filepath, {}))
+    
+    def close(self):
+        for store in self._journals.values():
+            store.close()
     
     # Model Configs
     def get_model_configs(self) -> List[Dict]:
@@ -70,27 +159,30 @@ class ConfigManager:
     def get_model_config(self, model_id: str) -> Optional[Dict]:
         return self._model_configs.get(model_id)
     
+    @_locked
     def save_model_config(self, config: Dict) -> Dict:
         if 'id' not in config or not config['id']:
             config['id'] = str(uuid4())
         config['created_at'] = datetime.now().isoformat()
         config['updated_at'] = datetime.now().isoformat()
         self._model_configs[config['id']] = config
-        self._save_json(self.model_configs_file, self._model_configs)
+        self._persist(self.model_configs_file, self._model_configs, changed=[config['id']])
         return config
     
+    @_locked
     def update_model_config(self, model_id: str, updates: Dict) -> Optional[Dict]:
         if model_id not in self._model_configs:
             return None
         self._model_configs[model_id].update(updates)
         self._model_configs[model_id]['updated_at'] = datetime.now().isoformat()
-        self._save_json(self.model_configs_file, self._model_configs)
+        self._persist(self.model_configs_file, self._model_configs, changed=[model_id])
         return self._model_configs[model_id]
     
+    @_locked
     def delete_model_config(self, model_id: str) -> bool:
         if model_id in self._model_configs:
             del self._model_configs[model_id]
-            self._save_json(self.model_configs_file, self._model_configs)
+            self._persist(self.model_configs_file, self._model_configs, deleted=[model_id])
             return True
         return False
     
@@ -120,20 +212,32 @@ class ConfigManager:
                 return config
         return self.get_default_model_config()
     
+    @_locked
     def clear_relation_completer(self):
+        changed = []
         for config in self._model_configs.values():
-            config['is_relation_completer'] = False
-        self._save_json(self.model_configs_file, self._model_configs)
+            if config.get('is_relation_completer'):
+                config['is_relation_completer'] = False
+                changed.append(config['id'])
+        self._persist(self.model_configs_file, self._model_configs, changed=changed)
     
+    @_locked
     def clear_topology_generator(self):
+        changed = []
         for config in self._model_configs.values():
-            config['is_topology_generator'] = False
-        self._save_json(self.model_configs_file, self._model_configs)
+            if config.get('is_topology_generator'):
+                config['is_topology_generator'] = False
+                changed.append(config['id'])
+        self._persist(self.model_configs_file, self._model_configs, changed=changed)
     
+    @_locked
     def clear_inspiration_generator(self):
+        changed = []
         for config in self._model_configs.values():
-            config['is_inspiration_generator'] = False
-        self._save_json(self.model_configs_file, self._model_configs)
+            if config.get('is_inspiration_generator'):
+                config['is_inspiration_generator'] = False
+                changed.append(config['id'])
+        self._persist(self.model_configs_file, self._model_configs, changed=changed)
     
     # Combinations
     def get_combinations(self) -> List[Dict]:
@@ -142,25 +246,28 @@ class ConfigManager:
     def get_combination(self, combination_id: str) -> Optional[Dict]:
         return self._combinations.get(combination_id)
     
+    @_locked
     def save_combination(self, combination: Dict) -> Dict:
         if 'id' not in combination or not combination['id']:
             combination['id'] = str(uuid4())
         combination['created_at'] = datetime.now().isoformat()
         self._combinations[combination['id']] = combination
-        self._save_json(self.combinations_file, self._combinations)
+        self._persist(self.combinations_file, self._combinations, changed=[combination['id']])
         return combination
     
+    @_locked
     def update_combination(self, combination_id: str, updates: Dict) -> Optional[Dict]:
         if combination_id not in self._combinations:
             return None
         self._combinations[combination_id].update(updates)
-        self._save_json(self.combinations_file, self._combinations)
+        self._persist(self.combinations_file, self._combinations, changed=[combination_id])
         return self._combinations[combination_id]
     
+    @_locked
     def delete_combination(self, combination_id: str) -> bool:
         if combination_id in self._combinations:
             del self._combinations[combination_id]
-            self._save_json(self.combinations_file, self._combinations)
+            self._persist(self.combinations_file, self._combinations, deleted=[combination_id])
             return True
         return False
     
@@ -174,6 +281,7 @@ class ConfigManager:
     def get_creative(self, creative_id: str) -> Optional[Dict]:
         return self._creatives.get(creative_id)
     
+    @_locked
     def save_creative(self, creative: Dict) -> Dict:
         if 'id' not in creative or not creative['id']:
             creative['id'] = str(uuid4())
@@ -181,19 +289,18 @@ class ConfigManager:
             creative['created_at'] = datetime.now().isoformat()
         creative['updated_at'] = datetime.now().isoformat()
         self._creatives[creative['id']] = creative
-        self._save_json(self.creatives_file, self._creatives)
+        self._persist(self.creatives_file, self._creatives, changed=[creative['id']])
         return creative
     
     def save_creatives(self, creatives: List[Dict]) -> List[Dict]:
-        saved = []
-        for creative in creatives:
-            saved.append(self.save_creative(creative))
-        return saved
+        with self.batch():
+            return [self.save_creative(creative) for creative in creatives]
     
+    @_locked
     def delete_creative(self, creative_id: str) -> bool:
         if creative_id in self._creatives:
             del self._creatives[creative_id]
-            self._save_json(self.creatives_file, self._creatives)
+            self._persist(self.creatives_file, self._creatives, deleted=[creative_id])
             return True
         return False
     
@@ -204,35 +311,39 @@ class ConfigManager:
     def get_relation_type(self, type_id: str) -> Optional[Dict]:
         return self._relation_types.get(type_id)
     
+    @_locked
     def save_relation_type(self, relation_type: Dict) -> Dict:
         if 'id' not in relation_type or not relation_type['id']:
             relation_type['id'] = str(uuid4())
         relation_type['created_at'] = datetime.now().isoformat()
         self._relation_types[relation_type['id']] = relation_type
-        self._save_json(self.relation_types_file, self._relation_types)
+        self._persist(self.relation_types_file, self._relation_types, changed=[relation_type['id']])
         return relation_type
     
+    @_locked
     def update_relation_type(self, type_id: str, updates: Dict) -> Optional[Dict]:
         if type_id not in self._relation_types:
             return None
         self._relation_types[type_id].update(updates)
-        self._save_json(self.relation_types_file, self._relation_types)
+        self._persist(self.relation_types_file, self._relation_types, changed=[type_id])
         return self._relation_types[type_id]
     
+    @_locked
     def delete_relation_type(self, type_id: str) -> bool:
         if type_id in self._relation_types:
             del self._relation_types[type_id]
-            self._save_json(self.relation_types_file, self._relation_types)
+            self._persist(self.relation_types_file, self._relation_types, deleted=[type_id])
             return True
         return False
     
+    @_locked
     def init_default_relation_types(self, default_types: List[Dict]):
         if not self._relation_types:
             for rt in default_types:
                 rt['id'] = str(uuid4())
                 rt['created_at'] = datetime.now().isoformat()
                 self._relation_types[rt['id']] = rt
-            self._save_json(self.relation_types_file, self._relation_types)
+            self._persist(self.relation_types_file, self._relation_types, changed=list(self._relation_types))
     
     # Prompts
     def get_prompts(self, creative_id: str = None) -> List[Dict]:
@@ -244,17 +355,19 @@ class ConfigManager:
     def get_prompt(self, prompt_id: str) -> Optional[Dict]:
         return self._prompts.get(prompt_id)
     
+    @_locked
     def save_prompt(self, prompt: Dict) -> Dict:
         if 'id' not in prompt or not prompt['id']:
             prompt['id'] = str(uuid4())
         prompt['created_at'] = datetime.now().isoformat()
         self._prompts[prompt['id']] = prompt
-        self._save_json(self.prompts_file, self._prompts)
+        self._persist(self.prompts_file, self._prompts, changed=[prompt['id']])
         return prompt
     
+    @_locked
     def delete_prompt(self, prompt_id: str) -> bool:
         if prompt_id in self._prompts:
             del self._prompts[prompt_id]
-            self._save_json(self.prompts_file, self._prompts)
+            self._persist(self.prompts_file, self._prompts, deleted=[prompt_id])
             return True
         return False
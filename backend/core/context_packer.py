@@ -0,0 +1,276 @@
+"""
+Context Packer Module
+Token-budgeted packing of file content into prompts, with per-model tokenizers and context windows
+"""
+
+import functools
+import math
+import re
+from typing import Any, Dict, List, Optional, Set, Union
+
+from ..models import AIModelConfig
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    tiktoken = None
+    TIKTOKEN_AVAILABLE = False
+
+
+# Context windows by model-name fragment; the longest fragment found in the model name wins
+CONTEXT_WINDOWS = {
+    "gpt-3.5": 16385,
+    "gpt-4": 8192,
+    "gpt-4-32k": 32768,
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "gpt-4.1": 1047576,
+    "gpt-5": 400000,
+    "o1": 200000,
+    "o3": 200000,
+    "o4-mini": 200000,
+    "claude": 200000,
+    "gemini": 1048576,
+    "deepseek": 64000,
+    "qwen": 32768,
+    "qwen-long": 1000000,
+    "glm-4": 128000,
+    "moonshot-v1-8k": 8192,
+    "moonshot-v1-32k": 32768,
+    "moonshot-v1-128k": 128000,
+    "kimi": 128000,
+    "doubao": 32768,
+    "yi-": 16384,
+}
+# Unknown models get a window every current chat model can hold
+DEFAULT_CONTEXT_WINDOW = 8192
+# Chat formatting, tokenizer mismatch between the estimate and the provider
+SAFETY_MARGIN = 256
+
+# Fallback when no tiktoken encoding can be loaded: CJK and other non-ASCII characters are about
+# a token each, ASCII text and code about 3.5 characters
+ASCII_CHARS_PER_TOKEN = 3.5
+
+HEAD_SHARE = 0.4
+TAIL_SHARE = 0.1
+
+SIGNATURE_PATTERN = re.compile(
+    r"^\s*(?:export\s+)?(?:default\s+)?(?:pub(?:\(\w+\))?\s+)?(?:public\s+|private\s+|protected\s+|static\s+|abstract\s+|final\s+)*"
+    r"(?:async\s+def|def|class|function|interface|type|struct|enum|impl|trait|fn|func|module|namespace|package|const\s+\w+\s*=\s*(?:async\s*)?\(|@\w+)\b"
+)
+HEADING_PATTERN = re.compile(
+    r"^(?:#{1,6}\s+\S|\s*第[一二三四五六七八九十百千\d]+[章节部分篇]|\s*\d+(?:\.\d+)*[\.、]\s*\S|=== .+ ===|\[[\w.\-]+\]\s*$)"
+)
+
+
+class Tokenizer:
+    """Exact counts through tiktoken when it is installed and knows an encoding, otherwise a character estimate."""
+    
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self.encoding = None
+        if TIKTOKEN_AVAILABLE:
+            try:
+                try:
+                    self.encoding = tiktoken.encoding_for_model(model_name)
+                except KeyError:
+                    # Non-OpenAI models: cl100k is a closer proxy than a character count
+                    self.encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                # Encodings are downloaded on first use; offline hosts fall back to the estimate
+                print(f"Warning: No tokenizer for {model_name}, estimating token counts: {e}")
+    
+    @property
+    def exact(self) -> bool:
+        return self.encoding is not None
+    
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        ascii_chars = len(text.encode("ascii", "ignore"))
+        return (len(text) - ascii_chars) + math.ceil(ascii_chars / ASCII_CHARS_PER_TOKEN)
+    
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if max_tokens <= 0:
+            return ""
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text, disallowed_special=())
+            return text if len(tokens) <= max_tokens else self.encoding.decode(tokens[:max_tokens])
+        # Longest prefix whose estimate fits
+        low, high = 0, len(text)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.count(text[:middle]) <= max_tokens:
+                low = middle
+            else:
+                high = middle - 1
+        return text[:low]
+
+
+@functools.lru_cache(maxsize=32)
+def get_tokenizer(model_name: str) -> Tokenizer:
+    return Tokenizer(model_name or "")
+
+
+ConfigLike = Union[AIModelConfig, Dict[str, Any], str, None]
+
+
+def _model_name(config: ConfigLike) -> str:
+    if isinstance(config, str):
+        return config
+    if isinstance(config, dict):
+        return config.get("model_name") or ""
+    return getattr(config, "model_name", "") or ""
+
+
+def context_window(config: ConfigLike) -> int:
+    """The model's context window: the config's own ``context_window`` if set, else the table above."""
+    configured = config.get("context_window") if isinstance(config, dict) else getattr(config, "context_window", None)
+    if configured:
+        return configured
+    name = _model_name(config).lower().rsplit("/", 1)[-1]
+    matches = [fragment for fragment in CONTEXT_WINDOWS if fragment in name]
+    return CONTEXT_WINDOWS[max(matches, key=len)] if matches else DEFAULT_CONTEXT_WINDOW
+
+
+def count_tokens(text: str, config: ConfigLike = None) -> int:
+    return get_tokenizer(_model_name(config)).count(text)
+
+
+def input_budget(config: ConfigLike, desired: int, max_output_tokens: int, prompt_text: str = "") -> int:
+    """
+    Tokens available for packed content: ``desired``, unless the model's window minus the
+    reserved output, the surrounding prompt and a safety margin is smaller.
+    """
+    overhead = count_tokens(prompt_text, config) if prompt_text else 0
+    available = context_window(config) - max_output_tokens - overhead - SAFETY_MARGIN
+    return max(0, min(desired, available))
+
+
+class PackedContent:
+    def __init__(self, text: str, tokens: int, source_tokens: int, budget: int, exact: bool):
+        self.text = text
+        self.tokens = tokens
+        self.source_tokens = source_tokens
+        self.budget = budget
+        self.exact = exact
+    
+    @property
+    def truncated(self) -> bool:
+        return self.tokens < self.source_tokens
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "tokens": self.tokens,
+            "source_tokens": self.source_tokens,
+            "budget": self.budget,
+            "truncated": self.truncated,
+            "exact": self.exact
+        }
+
+
+def _gap_marker(skipped: int) -> str:
+    return f"... (省略 {skipped} 行)"
+
+
+def pack_text(text: str, budget: int, config: ConfigLike = None) -> PackedContent:
+    """
+    Fit ``text`` into ``budget`` tokens. Short text passes through unchanged; longer text keeps
+    the head of the file, then signature and heading lines (defs, classes, Markdown and numbered
+    headings) in order, then the tail, and fills what is left with the lines after the head.
+    Dropped runs are replaced by a one-line marker so the model knows content is missing.
+    """
+    tokenizer = get_tokenizer(_model_name(config))
+    source_tokens = tokenizer.count(text)
+    if source_tokens <= budget:
+        return PackedContent(text, source_tokens, source_tokens, budget, tokenizer.exact)
+    if budget <= 0:
+        return PackedContent("", 0, source_tokens, budget, tokenizer.exact)
+    
+    lines = text.splitlines()
+    costs = [tokenizer.count(line) + 1 for line in lines]
+    marker_cost = tokenizer.count(_gap_marker(10000)) + 1
+    selected: Set[int] = set()
+    # One marker is always reserved for the run dropped at the end
+    used = marker_cost
+    
+    def take(index: int, limit: float) -> bool:
+        nonlocal used
+        if index in selected:
+            return True
+        # A line next to a kept one extends its run; an isolated one splits a gap and adds a marker
+        cost = costs[index]
+        if index - 1 not in selected and index + 1 not in selected:
+            cost += marker_cost
+        if used + cost > limit:
+            return False
+        selected.add(index)
+        used += cost
+        return True
+    
+    head_end = 0
+    while head_end < len(lines) and take(head_end, budget * HEAD_SHARE):
+        head_end += 1
+    
+    if head_end == 0:
+        # A single enormous first line (minified code, one-line JSON): keep its start
+        head = tokenizer.truncate(lines[0] if lines else text, budget - marker_cost)
+        packed = f"{head}\n{_gap_marker(len(lines) - 1)}" if len(lines) > 1 else head
+        return PackedContent(packed, tokenizer.count(packed), source_tokens, budget, tokenizer.exact)
+    
+    tail_reserve = budget * TAIL_SHARE
+    for index in range(head_end, len(lines)):
+        if SIGNATURE_PATTERN.match(lines[index]) or HEADING_PATTERN.match(lines[index]):
+            take(index, budget - tail_reserve)
+    
+    # The last lines often hold exports, entry points or conclusions
+    tail_limit = min(budget, used + tail_reserve)
+    index = len(lines) - 1
+    while index >= head_end and take(index, tail_limit):
+        index -= 1
+    
+    for index in range(head_end, len(lines)):
+        if not take(index, budget):
+            break
+    
+    parts: List[str] = []
+    skipped = 0
+    for index, line in enumerate(lines):
+        if index in selected:
+            if skipped:
+                parts.append(_gap_marker(skipped))
+                skipped = 0
+            parts.append(line)
+        else:
+            skipped += 1
+    if skipped:
+        parts.append(_gap_marker(skipped))
+    
+    packed = "\n".join(parts)
+    return PackedContent(packed, tokenizer.count(packed), source_tokens, budget, tokenizer.exact)
+
+
+def pack_lines(lines: List[str], budget: int, config: ConfigLike = None) -> PackedContent:
+    """Keep whole lines from the front until the budget is spent; for lists that are already ranked."""
+    tokenizer = get_tokenizer(_model_name(config))
+    source = "\n".join(lines)
+    source_tokens = tokenizer.count(source)
+    if source_tokens <= budget:
+        return PackedContent(source, source_tokens, source_tokens, budget, tokenizer.exact)
+    
+    marker = f"...(还有 {len(lines)} 项未列出)"
+    limit = budget - tokenizer.count(marker) - 1
+    kept: List[str] = []
+    used = 0
+    for line in lines:
+        cost = tokenizer.count(line) + 1
+        if used + cost > limit:
+            break
+        kept.append(line)
+        used += cost
+    kept.append(f"...(还有 {len(lines) - len(kept)} 项未列出)")
+    packed = "\n".join(kept)
+    return PackedContent(packed, tokenizer.count(packed), source_tokens, budget, tokenizer.exact)
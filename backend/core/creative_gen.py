@@ -3,8 +3,10 @@ Creative Generator Module
 Generates creative ideas based on inspiration combinations
 """
 
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Any, AsyncIterator, Tuple, Union
 from ..models import Inspiration, InspirationCombination, Creative, AIModelConfig, UserFeedback
+from .llm_scheduler import chat_completion, stream_chat_completion
+from .streaming import JSONArrayItemParser
 
 
 class CreativeGenerator:
@@ -44,27 +46,18 @@ class CreativeGenerator:
         
         return "\n".join(context_parts)
     
-    async def generate_creatives(
+    def _creative_messages(
         self,
         inspirations: List[Inspiration],
         combination: InspirationCombination,
-        count: int = 3
-    ) -> List[Creative]:
-        from openai import AsyncOpenAI
-        
-        client = AsyncOpenAI(
-            api_key=self.config.api_key,
-            base_url=self.config.base_url
-        )
-        
+        count: int
+    ) -> List[Dict[str, str]]:
         context = self._build_context(inspirations, combination)
         
-        response = await client.chat.completions.create(
-            model=self.config.model_name,
-            messages=[
-                {
-                    "role": "system",
-                    "content": """你是一个创意专家，擅长将不同的灵感元素组合成创新的创意方案。
+        return [
+            {
+                "role": "system",
+                "content": """你是一个创意专家，擅长将不同的灵感元素组合成创新的创意方案。
 请根据提供的灵感内容，生成多个独特、可行的创意方案。
 
 每个创意方案需要包含：
@@ -80,10 +73,10 @@ class CreativeGenerator:
     "key_points": ["要点1", "要点2", "要点3"]
   }
 ]"""
-                },
-                {
-                    "role": "user",
-                    "content": f"""灵感组合名称: {combination.name}
+            },
+            {
+                "role": "user",
+                "content": f"""灵感组合名称: {combination.name}
 
 {context}
 
@@ -91,8 +84,32 @@ class CreativeGenerator:
 - 充分考虑灵感之间的关系和主次
 - 创意要新颖且具有可行性
 - 每个创意应该有不同的方向和特点"""
-                }
-            ],
+            }
+        ]
+    
+    @staticmethod
+    def _to_creative(item: Any, combination: InspirationCombination) -> Optional[Creative]:
+        if not isinstance(item, dict):
+            return None
+        return Creative(
+            combination_id=combination.id,
+            title=item.get("title", "未命名创意"),
+            description=item.get("description", ""),
+            key_points=item.get("key_points", [])
+        )
+    
+    async def generate_creatives(
+        self,
+        inspirations: List[Inspiration],
+        combination: InspirationCombination,
+        count: int = 3
+    ) -> List[Creative]:
+        response = await chat_completion(
+            self.config,
+            # Each click should bring new ideas, not a replay of the last batch
+            use_cache=False,
+            model=self.config.model_name,
+            messages=self._creative_messages(inspirations, combination, count),
             response_format={"type": "json_object"},
             max_tokens=3000
         )
@@ -110,17 +127,51 @@ class CreativeGenerator:
             items = []
         
         for item in items:
-            if isinstance(item, dict):
-                creative = Creative(
-                    combination_id=combination.id,
-                    title=item.get("title", "未命名创意"),
-                    description=item.get("description", ""),
-                    key_points=item.get("key_points", [])
-                )
+            creative = self._to_creative(item, combination)
+            if creative:
                 creatives.append(creative)
         
         return creatives[:count]
     
+    async def stream_creatives(
+        self,
+        inspirations: List[Inspiration],
+        combination: InspirationCombination,
+        count: int = 3
+    ) -> AsyncIterator[Tuple[str, Union[str, Creative]]]:
+        """
+        Streaming variant of generate_creatives. Yields ("token", text) for every model delta
+        and ("creative", Creative) as soon as each creative's JSON object is complete.
+        """
+        parser = JSONArrayItemParser()
+        emitted = 0
+        
+        async for delta in stream_chat_completion(
+            self.config,
+            model=self.config.model_name,
+            messages=self._creative_messages(inspirations, combination, count),
+            response_format={"type": "json_object"},
+            max_tokens=3000
+        ):
+            yield "token", delta
+            for item in parser.feed(delta):
+                creative = self._to_creative(item, combination)
+                if creative and emitted < count:
+                    emitted += 1
+                    yield "creative", creative
+        
+        if emitted == 0:
+            # A lone object (no array) only becomes parseable once the whole answer is in
+            import json
+            try:
+                result = json.loads(parser.text)
+            except json.JSONDecodeError:
+                return
+            if isinstance(result, dict) and "title" in result:
+                creative = self._to_creative(result, combination)
+                if creative:
+                    yield "creative", creative
+    
     async def regenerate_with_feedback(
         self,
         inspirations: List[Inspiration],
@@ -128,16 +179,12 @@ class CreativeGenerator:
         feedback: UserFeedback,
         count: int = 3
     ) -> List[Creative]:
-        from openai import AsyncOpenAI
-        
-        client = AsyncOpenAI(
-            api_key=self.config.api_key,
-            base_url=self.config.base_url
-        )
-        
         context = self._build_context(inspirations, combination)
         
-        response = await client.chat.completions.create(
+        response = await chat_completion(
+            self.config,
+            # Each click should bring new ideas, not a replay of the last batch
+            use_cache=False,
             model=self.config.model_name,
             messages=[
                 {
@@ -193,18 +240,12 @@ class CreativeGenerator:
         return creatives[:count]
     
     async def score_creative(self, creative: Creative, criteria: Optional[Dict] = None) -> float:
-        from openai import AsyncOpenAI
-        
-        client = AsyncOpenAI(
-            api_key=self.config.api_key,
-            base_url=self.config.base_url
-        )
-        
         criteria_text = ""
         if criteria:
             criteria_text = "评分标准:\n" + "\n".join([f"- {k}: {v}" for k, v in criteria.items()])
         
-        response = await client.chat.completions.create(
+        response = await chat_completion(
+            self.config,
             model=self.config.model_name,
             messages=[
                 {
@@ -0,0 +1,405 @@
+"""
+Directory Scanner Module
+Single-pass os.scandir walk producing cached, immutable folder snapshots for tree, size and summarizer code
+"""
+
+import base64
+import bisect
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+
+# Skipped by every consumer: hidden entries plus dependency/build folders
+EXCLUDED_NAMES = frozenset({'node_modules', '__pycache__', '.git', 'venv', 'build', 'dist', '.venv'})
+# Lock files and OS metadata carry nothing worth summarizing
+SYSTEM_FILES = frozenset({'package-lock.json', 'yarn.lock', '.DS_Store', 'Thumbs.db'})
+
+# Lookups within this window reuse a snapshot without re-stat'ing its directories
+REVALIDATE_INTERVAL = 1.0
+# Editing a file in place leaves its directory's mtime alone; a full rescan after this long picks it up
+MAX_SNAPSHOT_AGE = 60.0
+MAX_SNAPSHOTS = 32
+TREE_PAGE_LIMIT = 200
+
+
+def is_excluded(name: str) -> bool:
+    return name.startswith('.') or name in EXCLUDED_NAMES
+
+
+def path_ignored(relative_path: str, ignored_paths: Optional[List[str]]) -> bool:
+    if not relative_path or not ignored_paths:
+        return False
+    return any(relative_path == p or relative_path.startswith(p + '/') for p in ignored_paths)
+
+
+class ScanEntry:
+    """
+    One file or folder of a snapshot. ``path`` is relative to the scanned root with ``/``
+    separators ("" for the root). For folders, ``size``, ``file_count`` and ``dir_count``
+    cover the whole subtree, excluded entries included, and ``children`` is sorted folders
+    first, then by lowercase name.
+    """
+    
+    __slots__ = ("name", "path", "is_dir", "size", "mtime", "children", "file_count", "dir_count", "_fingerprint")
+    
+    def __init__(
+        self,
+        name: str,
+        path: str,
+        is_dir: bool,
+        size: int,
+        mtime: float,
+        children: Tuple["ScanEntry", ...] = (),
+        file_count: int = 0,
+        dir_count: int = 0
+    ):
+        self.name = name
+        self.path = path
+        self.is_dir = is_dir
+        self.size = size
+        self.mtime = mtime
+        self.children = children
+        self.file_count = file_count
+        self.dir_count = dir_count
+        self._fingerprint: Optional[str] = None
+    
+    @property
+    def sort_key(self) -> Tuple[bool, str, str]:
+        return (not self.is_dir, self.name.lower(), self.name)
+    
+    @property
+    def fingerprint(self) -> str:
+        """
+        Digest of the subtree's names, sizes and mtimes. Computed once per entry; since unchanged
+        subtrees are carried over between snapshots, a rescan only rehashes the changed path.
+        """
+        if self._fingerprint is None:
+            digest = hashlib.sha1(f"{self.name}\0{self.size}\0{self.mtime}".encode("utf-8", "surrogateescape"))
+            for child in self.children:
+                if child.is_dir:
+                    digest.update(f"d\0{child.fingerprint}".encode("ascii"))
+                else:
+                    digest.update(f"f\0{child.name}\0{child.size}\0{child.mtime}".encode("utf-8", "surrogateescape"))
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+    
+    @property
+    def suffix(self) -> str:
+        return os.path.splitext(self.name)[1].lower()
+    
+    @property
+    def excluded(self) -> bool:
+        return is_excluded(self.name)
+    
+    def visible_children(self, ignored_paths: Optional[List[str]] = None, skip_system_files: bool = False) -> List["ScanEntry"]:
+        return [
+            child for child in self.children
+            if not child.excluded
+            and not (skip_system_files and not child.is_dir and child.name in SYSTEM_FILES)
+            and not path_ignored(child.path, ignored_paths)
+        ]
+    
+    def walk(self, ignored_paths: Optional[List[str]] = None, skip_system_files: bool = False) -> Iterator["ScanEntry"]:
+        """Visible descendants in display order, depth first."""
+        for child in self.visible_children(ignored_paths, skip_system_files):
+            yield child
+            if child.is_dir:
+                yield from child.walk(ignored_paths, skip_system_files)
+    
+    def files(self, ignored_paths: Optional[List[str]] = None, skip_system_files: bool = False) -> Iterator["ScanEntry"]:
+        return (entry for entry in self.walk(ignored_paths, skip_system_files) if not entry.is_dir)
+
+
+class FolderSnapshot:
+    def __init__(self, root: Path, entry: ScanEntry, dirs: Dict[str, ScanEntry], dir_mtimes: Dict[str, int]):
+        self.root = root
+        self.entry = entry
+        self.dirs = dirs
+        self.dir_mtimes = dir_mtimes
+        self.scanned_at = time.monotonic()
+        self.validated_at = self.scanned_at
+    
+    def find(self, relative_path: str) -> Optional[ScanEntry]:
+        relative_path = relative_path.replace('\\', '/').strip('/')
+        entry = self.dirs.get(relative_path)
+        if entry is not None:
+            return entry
+        parent = self.dirs.get(relative_path.rpartition('/')[0])
+        if parent is None:
+            return None
+        for child in parent.children:
+            if child.path == relative_path:
+                return child
+        return None
+    
+    def full_path(self, entry: ScanEntry) -> Path:
+        return self.root / entry.path if entry.path else self.root
+
+
+def _join(parent: str, name: str) -> str:
+    return f"{parent}/{name}" if parent else name
+
+
+class DirectoryScanner:
+    """
+    Caches one snapshot per folder. A cached snapshot is checked by stat'ing its directories
+    (not its files): a directory whose mtime moved had entries added, removed or renamed, and
+    only that directory and its ancestors are rescanned. Unchanged subtrees are shared with
+    the previous snapshot, which is never mutated.
+    """
+    
+    def __init__(
+        self,
+        revalidate_interval: float = REVALIDATE_INTERVAL,
+        max_age: float = MAX_SNAPSHOT_AGE,
+        max_snapshots: int = MAX_SNAPSHOTS
+    ):
+        self.revalidate_interval = revalidate_interval
+        self.max_age = max_age
+        self.max_snapshots = max_snapshots
+        self._snapshots: "OrderedDict[str, FolderSnapshot]" = OrderedDict()
+        self._root_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "full_scans": 0, "partial_scans": 0, "dirs_scanned": 0}
+    
+    def snapshot(self, path: str) -> FolderSnapshot:
+        """Blocking; call through run_io from async code."""
+        root = Path(path).resolve()
+        key = str(root)
+        with self._lock:
+            root_lock = self._root_locks.setdefault(key, threading.Lock())
+        
+        # One scan per folder at a time; concurrent callers wait and share the result
+        with root_lock:
+            with self._lock:
+                previous = self._snapshots.get(key)
+            now = time.monotonic()
+            
+            if previous is not None and now - previous.scanned_at < self.max_age:
+                if now - previous.validated_at < self.revalidate_interval:
+                    self.stats["hits"] += 1
+                    return previous
+                changed = self._changed_dirs(previous)
+                if not changed:
+                    previous.validated_at = now
+                    self.stats["hits"] += 1
+                    return previous
+                snapshot = self._scan(root, previous, changed)
+                self.stats["partial_scans"] += 1
+            else:
+                snapshot = self._scan(root)
+                self.stats["full_scans"] += 1
+            
+            with self._lock:
+                self._snapshots[key] = snapshot
+                self._snapshots.move_to_end(key)
+                while len(self._snapshots) > self.max_snapshots:
+                    evicted, _ = self._snapshots.popitem(last=False)
+                    self._root_locks.pop(evicted, None)
+            return snapshot
+    
+    def scan(self, path: str) -> FolderSnapshot:
+        """Fresh, uncached full scan; for callers that diff successive scans themselves."""
+        return self._scan(Path(path).resolve())
+    
+    def mark_changed(self, path: str, relative_paths: List[str]):
+        """
+        Force the folders holding ``relative_paths`` to be rescanned on the next lookup. Needed
+        for in-place edits, which change a file's size and mtime but not its directory's.
+        """
+        with self._lock:
+            snapshot = self._snapshots.get(str(Path(path).resolve()))
+            if snapshot is None:
+                return
+            for relative in relative_paths:
+                # A new or deleted path is not in the snapshot; its nearest known ancestor is
+                folder = relative.rpartition('/')[0] if relative not in snapshot.dirs else relative
+                while folder and folder not in snapshot.dir_mtimes:
+                    folder = folder.rpartition('/')[0]
+                snapshot.dir_mtimes[folder] = -1
+            snapshot.validated_at = float("-inf")
+    
+    def invalidate(self, path: Optional[str] = None):
+        with self._lock:
+            if path is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(str(Path(path).resolve()), None)
+    
+    def _changed_dirs(self, snapshot: FolderSnapshot) -> Set[str]:
+        changed = set()
+        for relative, mtime_ns in snapshot.dir_mtimes.items():
+            try:
+                current = os.stat(snapshot.root / relative if relative else snapshot.root).st_mtime_ns
+            except OSError:
+                current = None
+            if current != mtime_ns:
+                changed.add(relative)
+        return changed
+    
+    def _scan(self, root: Path, previous: Optional[FolderSnapshot] = None, changed: Optional[Set[str]] = None) -> FolderSnapshot:
+        stat = os.stat(root)
+        # A changed directory invalidates its ancestors' aggregates too
+        dirty = set()
+        for relative in changed or ():
+            while True:
+                dirty.add(relative)
+                if not relative:
+                    break
+                relative = relative.rpartition('/')[0]
+        
+        dirs: Dict[str, ScanEntry] = {}
+        dir_mtimes: Dict[str, int] = {}
+        entry = self._scan_dir(str(root), "", root.name, stat, dirs, dir_mtimes, previous, dirty)
+        snapshot = FolderSnapshot(root, entry, dirs, dir_mtimes)
+        if previous is not None:
+            # Age counts from the last full walk, so steady churn cannot put off the rescan that
+            # catches in-place edits directory mtimes miss
+            snapshot.scanned_at = previous.scanned_at
+        return snapshot
+    
+    def _scan_dir(
+        self,
+        abs_path: str,
+        relative: str,
+        name: str,
+        stat: os.stat_result,
+        dirs: Dict[str, ScanEntry],
+        dir_mtimes: Dict[str, int],
+        previous: Optional[FolderSnapshot],
+        dirty: Set[str]
+    ) -> ScanEntry:
+        if previous is not None and relative not in dirty and relative in previous.dirs:
+            reused = previous.dirs[relative]
+            if previous.dir_mtimes.get(relative) == stat.st_mtime_ns:
+                self._adopt(reused, previous, dirs, dir_mtimes)
+                return reused
+        
+        self.stats["dirs_scanned"] += 1
+        children = []
+        size = file_count = dir_count = 0
+        try:
+            with os.scandir(abs_path) as it:
+                dir_entries = list(it)
+        except OSError:
+            dir_entries = []
+        
+        for dir_entry in dir_entries:
+            child_relative = _join(relative, dir_entry.name)
+            try:
+                # Symlinked folders are not followed, so links cannot loop the walk
+                if dir_entry.is_dir(follow_symlinks=False):
+                    child = self._scan_dir(
+                        dir_entry.path, child_relative, dir_entry.name, dir_entry.stat(follow_symlinks=False),
+                        dirs, dir_mtimes, previous, dirty
+                    )
+                    file_count += child.file_count
+                    dir_count += child.dir_count + 1
+                elif dir_entry.is_file():
+                    child_stat = dir_entry.stat()
+                    child = ScanEntry(dir_entry.name, child_relative, False, child_stat.st_size, child_stat.st_mtime)
+                    file_count += 1
+                else:
+                    continue
+            except OSError:
+                continue
+            size += child.size
+            children.append(child)
+        
+        children.sort(key=lambda e: e.sort_key)
+        entry = ScanEntry(name, relative, True, size, stat.st_mtime, tuple(children), file_count, dir_count)
+        dirs[relative] = entry
+        dir_mtimes[relative] = stat.st_mtime_ns
+        return entry
+    
+    def _adopt(self, entry: ScanEntry, previous: FolderSnapshot, dirs: Dict[str, ScanEntry], dir_mtimes: Dict[str, int]):
+        dirs[entry.path] = entry
+        dir_mtimes[entry.path] = previous.dir_mtimes[entry.path]
+        for child in entry.children:
+            if child.is_dir:
+                self._adopt(child, previous, dirs, dir_mtimes)
+    
+    def cache_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"snapshots": len(self._snapshots), **self.stats}
+
+
+directory_scanner = DirectoryScanner()
+
+
+def get_snapshot(path: str) -> FolderSnapshot:
+    return directory_scanner.snapshot(path)
+
+
+def _encode_tree_cursor(entry: ScanEntry) -> str:
+    payload = json.dumps([entry.path, entry.is_dir, entry.name], ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def _decode_tree_cursor(cursor: str, parent_path: str) -> Tuple[bool, str, str]:
+    try:
+        path, is_dir, name = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if path.rpartition('/')[0] != parent_path:
+        raise ValueError("Cursor does not belong to this folder")
+    return (not is_dir, name.lower(), name)
+
+
+def tree_node(entry: ScanEntry) -> Dict[str, Any]:
+    node: Dict[str, Any] = {
+        "name": entry.name,
+        "path": entry.path,
+        "is_dir": entry.is_dir,
+        "size": entry.size,
+        "mtime": entry.mtime
+    }
+    if entry.is_dir:
+        node["child_count"] = len(entry.visible_children())
+        node["file_count"] = entry.file_count
+        node["dir_count"] = entry.dir_count
+        node["etag"] = entry.fingerprint
+    return node
+
+
+def tree_level(entry: ScanEntry, depth: int = 1, cursor: Optional[str] = None, limit: int = TREE_PAGE_LIMIT) -> Dict[str, Any]:
+    """
+    One page of a folder's visible children in display order, ``depth`` levels deep. Nested
+    folders carry at most ``limit`` children of their own plus a ``next_cursor`` for the rest.
+    Raises ValueError for a malformed or foreign cursor.
+    """
+    children = entry.visible_children()
+    start = 0
+    if cursor:
+        start = bisect.bisect_right([child.sort_key for child in children], _decode_tree_cursor(cursor, entry.path))
+    page = children[start:start + limit]
+    has_more = start + limit < len(children)
+    
+    items = []
+    for child in page:
+        node = tree_node(child)
+        if child.is_dir and depth > 1:
+            nested = tree_level(child, depth - 1, None, limit)
+            node["children"] = nested["items"]
+            node["next_cursor"] = nested["next_cursor"]
+        items.append(node)
+    
+    return {
+        "items": items,
+        "next_cursor": _encode_tree_cursor(page[-1]) if page and has_more else None,
+        "total": len(children)
+    }
+
+
+def format_size(size: int) -> str:
+    if size < 1024:
+        return f"{size}B"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f}KB"
+    return f"{size / (1024 * 1024):.1f}MB"
@@ -0,0 +1,132 @@
+"""
+Executors Module
+Bounded thread pools that keep blocking disk I/O and CPU-heavy parsing off the event loop
+"""
+
+import asyncio
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+
+T = TypeVar("T")
+
+IO_WORKERS = 16
+# Parsers are mostly pure Python and hold the GIL; more threads than cores only adds contention
+CPU_WORKERS = max(2, os.cpu_count() or 4)
+
+
+class ExecutorPool:
+    """
+    A named ThreadPoolExecutor that counts what goes through it. ``queued`` is the number of
+    calls waiting for a free worker; if it stays above zero the pool is too small, if ``active``
+    never reaches ``max_workers`` it is too large.
+    """
+    
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.active = 0
+        self.max_queued = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"cm-{self.name}")
+            return self._executor
+    
+    @property
+    def queued(self) -> int:
+        return self.submitted - self.completed - self.failed - self.cancelled - self.active
+    
+    def _call(self, submitted_at: float, fn: Callable[[], T]) -> T:
+        started = time.monotonic()
+        with self._lock:
+            self.active += 1
+            self.wait_seconds += started - submitted_at
+        ok = False
+        try:
+            result = fn()
+            ok = True
+            return result
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.run_seconds += time.monotonic() - started
+                if ok:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+    
+    async def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        call = functools.partial(fn, *args, **kwargs)
+        executor = self._get_executor()
+        with self._lock:
+            self.submitted += 1
+            self.max_queued = max(self.max_queued, self.queued)
+        future = executor.submit(self._call, time.monotonic(), call)
+        future.add_done_callback(self._on_done)
+        return await asyncio.wrap_future(future)
+    
+    def _on_done(self, future):
+        # Calls cancelled before a worker picked them up never reach _call
+        if future.cancelled():
+            with self._lock:
+                self.cancelled += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            finished = self.completed + self.failed
+            return {
+                "name": self.name,
+                "max_workers": self.max_workers,
+                "active": self.active,
+                "queued": self.queued,
+                "max_queued": self.max_queued,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "cancelled": self.cancelled,
+                "avg_wait_ms": round(self.wait_seconds / finished * 1000, 2) if finished else 0.0,
+                "avg_run_ms": round(self.run_seconds / finished * 1000, 2) if finished else 0.0
+            }
+    
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+io_pool = ExecutorPool("io", IO_WORKERS)
+cpu_pool = ExecutorPool("cpu", CPU_WORKERS)
+
+
+async def run_io(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Run a blocking filesystem call (copy, walk, hash, write) on the I/O pool."""
+    return await io_pool.run(fn, *args, **kwargs)
+
+
+async def run_cpu(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Run CPU-heavy work (document parsing, encoding) on the CPU pool."""
+    return await cpu_pool.run(fn, *args, **kwargs)
+
+
+def executor_stats() -> List[Dict[str, Any]]:
+    return [io_pool.stats(), cpu_pool.stats()]
+
+
+def shutdown_executors():
+    io_pool.shutdown()
+    cpu_pool.shutdown()
@@ -0,0 +1,474 @@
+"""
+Document Extraction Module
+Process-pool text extraction for PDF/DOCX/XLSX/PPTX with timeouts, memory caps and a hash-keyed cache
+"""
+
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from .inspiration_store import open_sqlite
+from .summary_cache import FILE_HASHES_TABLE, memoized_content_hash
+from .executors import run_io
+
+
+DEFAULT_WORKERS = 2
+DEFAULT_TIMEOUT = 30.0
+# Address-space cap per worker; a hostile or broken file fails with MemoryError instead of swapping the host
+DEFAULT_MEMORY_LIMIT = 1024 * 1024 * 1024
+# Bump when extraction output changes so cached text from older code is not reused
+EXTRACTOR_VERSION = "extract-v2"
+
+DEFAULT_MAX_PAGES = 10
+DEFAULT_MAX_ROWS = 20
+DEFAULT_MAX_CHARS = 6000
+# Pages parsed per worker call when a document is streamed with iter_pages()
+PAGE_BATCH = 8
+DOCX_LINES_PER_PAGE = 40
+OPEN_DOCUMENTS_PER_WORKER = 2
+
+
+class ExtractionError(Exception):
+    pass
+
+
+class WorkerCrashed(ExtractionError):
+    """The worker died for reasons that may have nothing to do with this file; never cached."""
+
+
+class ExtractionTimeout(ExtractionError):
+    """Parsing ran past the timeout; not cached, since a loaded host can make any file slow."""
+
+
+def _page_range(pages: List[Any], start: int, stop: Optional[int]) -> Tuple[List[Any], bool]:
+    """Pages ``start:stop`` and whether any remain after them."""
+    stop = len(pages) if stop is None else min(stop, len(pages))
+    return pages[start:stop], stop < len(pages)
+
+
+class _PdfDocument:
+    def __init__(self, path: str, max_rows: int):
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            from PyPDF2 import PdfReader
+        self.reader = PdfReader(path)
+    
+    def pages(self, start: int, stop: Optional[int]) -> Tuple[List[str], bool]:
+        # Pages are parsed lazily; only the requested range pays for text extraction
+        pages, more = _page_range(self.reader.pages, start, stop)
+        return [page.extract_text() or "" for page in pages], more
+    
+    def close(self):
+        pass
+
+
+class _DocxDocument:
+    def __init__(self, path: str, max_rows: int):
+        from docx import Document
+        doc = Document(path)
+        lines = [para.text for para in doc.paragraphs if para.text.strip()]
+        for table in doc.tables:
+            for row in table.rows[:max_rows]:
+                lines.append(' | '.join(cell.text for cell in row.cells))
+        # DOCX has no stored pagination; group lines into fixed-size pages
+        self._pages = ["\n".join(lines[i:i + DOCX_LINES_PER_PAGE]) for i in range(0, len(lines), DOCX_LINES_PER_PAGE)]
+    
+    def pages(self, start: int, stop: Optional[int]) -> Tuple[List[str], bool]:
+        return _page_range(self._pages, start, stop)
+    
+    def close(self):
+        self._pages = []
+
+
+class _XlsxDocument:
+    def __init__(self, path: str, max_rows: int):
+        import openpyxl
+        self.max_rows = max_rows
+        self.wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    
+    def pages(self, start: int, stop: Optional[int]) -> Tuple[List[str], bool]:
+        sheet_names, more = _page_range(self.wb.sheetnames, start, stop)
+        pages = []
+        for sheet_name in sheet_names:
+            parts = [f"=== Sheet: {sheet_name} ==="]
+            for row in self.wb[sheet_name].iter_rows(max_row=self.max_rows, values_only=True):
+                if any(cell for cell in row if cell):
+                    parts.append(' | '.join(str(cell) if cell else '' for cell in row))
+            pages.append("\n".join(parts))
+        return pages, more
+    
+    def close(self):
+        self.wb.close()
+
+
+class _PptxDocument:
+    def __init__(self, path: str, max_rows: int):
+        from pptx import Presentation
+        self.slides = list(Presentation(path).slides)
+    
+    def pages(self, start: int, stop: Optional[int]) -> Tuple[List[str], bool]:
+        slides, more = _page_range(self.slides, start, stop)
+        pages = []
+        for i, slide in enumerate(slides, start + 1):
+            parts = [f"=== Slide {i} ==="]
+            for shape in slide.shapes:
+                if hasattr(shape, "text") and shape.text.strip():
+                    parts.append(shape.text)
+            pages.append("\n".join(parts))
+        return pages, more
+    
+    def close(self):
+        self.slides = []
+
+
+EXTRACTORS = {
+    ".pdf": _PdfDocument,
+    ".docx": _DocxDocument,
+    ".xlsx": _XlsxDocument,
+    ".pptx": _PptxDocument,
+}
+SUPPORTED_SUFFIXES = set(EXTRACTORS)
+
+
+def normalize_text(parts: List[str], max_chars: Optional[int]) -> str:
+    lines = []
+    for part in parts:
+        for line in part.replace("\x00", "").splitlines():
+            line = re.sub(r"[ \t　]+", " ", line).strip()
+            if line:
+                lines.append(line)
+    text = "\n".join(lines)
+    return text if max_chars is None else text[:max_chars]
+
+
+def _init_worker(memory_limit: Optional[int]):
+    if not memory_limit:
+        return
+    try:
+        import resource
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    except (ImportError, ValueError, OSError) as e:
+        # Not available on Windows, and some containers refuse to lower the limit
+        print(f"Warning: Could not cap extraction worker memory: {e}")
+
+
+# Documents being streamed with iter_pages() stay parsed in the worker between batches, so a
+# long document is opened once per worker instead of once per batch
+_open_documents: "OrderedDict[Tuple[str, int, int, int], Any]" = OrderedDict()
+
+
+def _open_document(path: str, max_rows: int):
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size, max_rows)
+    document = _open_documents.get(key)
+    if document is not None:
+        _open_documents.move_to_end(key)
+        return key, document
+    # A changed file gets a new key; its stale parse goes along with the least recently used
+    while len(_open_documents) >= OPEN_DOCUMENTS_PER_WORKER:
+        _, stale = _open_documents.popitem(last=False)
+        stale.close()
+    document = EXTRACTORS[Path(path).suffix.lower()](path, max_rows)
+    _open_documents[key] = document
+    return key, document
+
+
+def _close_document(key):
+    document = _open_documents.pop(key, None)
+    if document is not None:
+        document.close()
+
+
+def _extract_in_worker(path: str, max_pages: Optional[int], max_rows: int, max_chars: Optional[int]) -> str:
+    document = EXTRACTORS[Path(path).suffix.lower()](path, max_rows)
+    try:
+        pages, _ = document.pages(0, max_pages)
+    finally:
+        document.close()
+    return normalize_text(pages, max_chars)
+
+
+def _extract_range_in_worker(path: str, start: int, stop: int, max_rows: int) -> str:
+    key, document = _open_document(path, max_rows)
+    try:
+        pages, more = document.pages(start, stop)
+    except BaseException:
+        _close_document(key)
+        raise
+    if not more:
+        # Last batch: nothing left to stream from this document
+        _close_document(key)
+    # Cached as text like every other result
+    return json.dumps({"pages": [normalize_text([page], None) for page in pages], "more": more}, ensure_ascii=False)
+
+
+class ExtractionService:
+    """
+    Parses documents in a pool of worker processes so several PDFs are parsed at once and none
+    of it holds the server's GIL. A file that runs past ``timeout`` gets its pool torn down and
+    replaced, since a stuck worker process cannot be interrupted any other way; other files that
+    were in flight on the old pool are retried once on the new one. At most ``workers`` files are
+    handed to the pool at a time, so the timeout measures parsing, not waiting for a free worker.
+
+    Results, including parse failures, are cached by content hash and limits, so an unchanged
+    file is parsed once and a malformed one fails fast afterwards. Timeouts and crashed workers
+    are not cached.
+    """
+    
+    def __init__(
+        self,
+        cache_path: str,
+        workers: int = DEFAULT_WORKERS,
+        timeout: float = DEFAULT_TIMEOUT,
+        memory_limit: Optional[int] = DEFAULT_MEMORY_LIMIT,
+        mp_context: str = "spawn"
+    ):
+        self.cache_path = Path(cache_path)
+        self.workers = workers
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self._mp_context = multiprocessing.get_context(mp_context)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop = None
+        self._lock = threading.Lock()
+        self._conn = open_sqlite(self.cache_path)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS extractions (
+                key TEXT PRIMARY KEY,
+                text TEXT,
+                error TEXT,
+                elapsed REAL,
+                created_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(FILE_HASHES_TABLE)
+        self.stats = {"extracted": 0, "cache_hits": 0, "failed": 0, "timeouts": 0, "pool_restarts": 0}
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=self._mp_context,
+                    initializer=_init_worker,
+                    initargs=(self.memory_limit,)
+                )
+            return self._pool
+    
+    def _get_slots(self) -> asyncio.Semaphore:
+        # One semaphore per event loop; the service itself outlives any single loop
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.workers)
+            self._slots_loop = loop
+        return self._slots
+    
+    def _discard_pool(self, pool: ProcessPoolExecutor):
+        with self._pool_lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+            self.stats["pool_restarts"] += 1
+        # shutdown() would wait on the stuck worker; kill the processes outright
+        for process in list((getattr(pool, "_processes", None) or {}).values()):
+            try:
+                process.kill()
+            except Exception:
+                pass
+        pool.shutdown(wait=False, cancel_futures=True)
+    
+    def _cache_key(self, path: Path, options: str) -> Optional[str]:
+        digest = memoized_content_hash(self._conn, self._lock, path)
+        if digest is None:
+            return None
+        options = f"{EXTRACTOR_VERSION}\0{path.suffix.lower()}\0{options}"
+        return hashlib.sha256(f"{options}\0{digest}".encode("utf-8")).hexdigest()
+    
+    def _cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT text, error FROM extractions WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return {"text": row[0], "error": row[1]}
+    
+    def _cache_put(self, key: str, text: Optional[str], error: Optional[str], elapsed: float):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extractions (key, text, error, elapsed, created_at) VALUES (?, ?, ?, ?, ?)",
+                (key, text, error, elapsed, time.time())
+            )
+    
+    async def _run(self, fn, *args) -> str:
+        async with self._get_slots():
+            return await self._run_in_pool(fn, *args)
+    
+    async def _run_in_pool(self, fn, *args) -> str:
+        for attempt in range(2):
+            pool = self._get_pool()
+            try:
+                future = pool.submit(fn, *args)
+            except (BrokenProcessPool, RuntimeError):
+                self._discard_pool(pool)
+                continue
+            try:
+                return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout)
+            except asyncio.TimeoutError:
+                self.stats["timeouts"] += 1
+                # Only a job a worker actually picked up can be stuck; a queued one just gets dropped
+                if not future.cancel():
+                    self._discard_pool(pool)
+                raise ExtractionTimeout(f"解析超时 ({self.timeout:.0f}s)")
+            except BrokenProcessPool:
+                # Usually another file's timeout or a worker killed by the memory cap; retry once
+                self._discard_pool(pool)
+                if attempt:
+                    raise WorkerCrashed("解析进程异常退出")
+            except MemoryError:
+                raise ExtractionError("解析内存超出限制")
+        raise WorkerCrashed("解析进程异常退出")
+    
+    async def _extract_cached(self, file_path: Path, options: str, use_cache: bool, fn, *args) -> str:
+        if file_path.suffix.lower() not in EXTRACTORS:
+            raise ExtractionError(f"不支持的文档格式: {file_path.suffix}")
+        
+        key = await run_io(self._cache_key, file_path, options) if use_cache else None
+        if key:
+            cached = self._cache_get(key)
+            if cached is not None:
+                self.stats["cache_hits"] += 1
+                if cached["error"] is not None:
+                    raise ExtractionError(cached["error"])
+                return cached["text"]
+        
+        started = time.monotonic()
+        try:
+            text = await self._run(fn, str(file_path), *args)
+        except ExtractionError as e:
+            self.stats["failed"] += 1
+            if key and not isinstance(e, (WorkerCrashed, ExtractionTimeout)):
+                self._cache_put(key, None, str(e), time.monotonic() - started)
+            raise
+        except ImportError as e:
+            self.stats["failed"] += 1
+            # Missing optional parser: not cached, installing it should take effect right away
+            raise ExtractionError(f"缺少解析库: {e.name or e}")
+        except Exception as e:
+            self.stats["failed"] += 1
+            error = f"{e.__class__.__name__}: {e}"
+            if key:
+                self._cache_put(key, None, error, time.monotonic() - started)
+            raise ExtractionError(error)
+        
+        self.stats["extracted"] += 1
+        if key:
+            self._cache_put(key, text, None, time.monotonic() - started)
+        return text
+    
+    async def extract(
+        self,
+        path: str,
+        max_pages: Optional[int] = DEFAULT_MAX_PAGES,
+        max_rows: int = DEFAULT_MAX_ROWS,
+        max_chars: Optional[int] = DEFAULT_MAX_CHARS,
+        use_cache: bool = True
+    ) -> str:
+        """
+        Normalized text of one document. ``max_pages`` caps PDF pages, PPTX slides, XLSX
+        sheets and DOCX line groups; ``max_rows`` caps rows per sheet or table. Raises
+        ExtractionError on failure.
+        """
+        options = f"{max_pages}\0{max_rows}\0{max_chars}"
+        return await self._extract_cached(Path(path), options, use_cache, _extract_in_worker, max_pages, max_rows, max_chars)
+    
+    async def extract_range(
+        self,
+        path: str,
+        start: int,
+        stop: int,
+        max_rows: int = DEFAULT_MAX_ROWS,
+        use_cache: bool = True
+    ) -> Tuple[List[str], bool]:
+        """Normalized text of pages ``start:stop``, one string per page, and whether more pages follow."""
+        options = f"pages\0{start}\0{stop}\0{max_rows}"
+        raw = await self._extract_cached(Path(path), options, use_cache, _extract_range_in_worker, start, stop, max_rows)
+        result = json.loads(raw)
+        return result["pages"], result["more"]
+    
+    async def iter_pages(
+        self,
+        path: str,
+        batch: int = PAGE_BATCH,
+        max_rows: int = DEFAULT_MAX_ROWS,
+        use_cache: bool = True
+    ) -> AsyncIterator[str]:
+        """
+        Stream a document page by page, ``batch`` pages per worker call. Each worker keeps the
+        document open between calls, so it is loaded once rather than once per batch. Pages are
+        only extracted as the consumer asks for them, so stopping early skips the rest.
+        """
+        start = 0
+        while True:
+            pages, more = await self.extract_range(path, start, start + batch, max_rows, use_cache)
+            for page in pages:
+                yield page
+            if not more:
+                return
+            start += batch
+    
+    async def extract_many(self, paths: List[str], **limits) -> Dict[str, Dict[str, Optional[str]]]:
+        """Extract a batch concurrently; each path maps to ``{"text": ..., "error": None}`` or ``{"text": None, "error": ...}``."""
+        async def one(path: str):
+            try:
+                return path, {"text": await self.extract(path, **limits), "error": None}
+            except ExtractionError as e:
+                return path, {"text": None, "error": str(e)}
+        
+        return dict(await asyncio.gather(*(one(path) for path in paths)))
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, failures = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(error IS NOT NULL), 0) FROM extractions"
+            ).fetchone()
+        return {"entries": entries, "failures": failures, "workers": self.workers, "timeout": self.timeout, **self.stats}
+    
+    def close(self):
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            self._conn.close()
+
+
+_extraction_service: Optional[ExtractionService] = None
+_extraction_service_lock = threading.Lock()
+
+
+def get_extraction_service(cache_path: str = "./storage/extraction_cache.db") -> ExtractionService:
+    global _extraction_service
+    with _extraction_service_lock:
+        if _extraction_service is None:
+            _extraction_service = ExtractionService(cache_path)
+        return _extraction_service
+
+
+def close_extraction_service():
+    global _extraction_service
+    with _extraction_service_lock:
+        if _extraction_service is not None:
+            _extraction_service.close()
+            _extraction_service = None
@@ -0,0 +1,232 @@
+"""
+Folder Ingest Session Module
+Parallel, resumable folder uploads that land files in their final location exactly once
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, Any, Optional
+
+
+class IngestSession:
+    """
+    One folder upload in progress.
+
+    Files are written straight into ``dest_path`` (the folder's final location). Every completed
+    file is appended to ``files.log`` in the session directory, so after a restart or a dropped
+    connection the client can ask which paths were already received and only send the rest.
+    """
+    
+    def __init__(self, session_dir: Path, info: Dict[str, Any]):
+        self.session_dir = session_dir
+        self.session_id = info["session_id"]
+        self.name = info["name"]
+        self.tags = info.get("tags") or []
+        self.dest_path = Path(info["dest_path"])
+        self.created_at = info.get("created_at")
+        self.files: Dict[str, int] = {}
+        self.total_size = 0
+        self.in_flight = 0
+        self.lock = threading.Lock()
+        self.tmp_dir = session_dir / "tmp"
+        self.log_path = session_dir / "files.log"
+    
+    def replay(self):
+        if not self.log_path.exists():
+            return
+        with open(self.log_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn tail from a crash: that file will simply be uploaded again
+                    continue
+                if (self.dest_path / entry["path"]).exists():
+                    self._record(entry["path"], entry["size"])
+    
+    def _record(self, rel_path: str, size: int):
+        self.total_size += size - self.files.get(rel_path, 0)
+        self.files[rel_path] = size
+    
+    def to_dict(self, include_files: bool = False) -> Dict[str, Any]:
+        with self.lock:
+            result = {
+                "session_id": self.session_id,
+                "name": self.name,
+                "tags": self.tags,
+                "dest_path": str(self.dest_path),
+                "created_at": self.created_at,
+                "file_count": len(self.files),
+                "total_size": self.total_size,
+                "in_flight": self.in_flight
+            }
+            if include_files:
+                result["files"] = dict(self.files)
+        return result
+
+
+class IngestFileWriter:
+    """Streams one file of a session into a temp file, then moves it into place on commit."""
+    
+    def __init__(self, session: IngestSession, rel_path: str):
+        self.session = session
+        self.rel_path = rel_path
+        self.size = 0
+        fd, self.tmp_path = tempfile.mkstemp(prefix="file_", suffix=".part", dir=str(session.tmp_dir))
+        self._file = os.fdopen(fd, 'wb')
+        with session.lock:
+            session.in_flight += 1
+    
+    def write(self, chunk: bytes):
+        self._file.write(chunk)
+        self.size += len(chunk)
+    
+    def commit(self) -> Dict[str, Any]:
+        self._file.close()
+        session = self.session
+        final_path = session.dest_path / self.rel_path
+        final_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(self.tmp_path, final_path)
+        
+        line = json.dumps({"path": self.rel_path, "size": self.size}, ensure_ascii=False) + "\n"
+        with session.lock:
+            with open(session.log_path, 'a', encoding='utf-8') as f:
+                f.write(line)
+            session._record(self.rel_path, self.size)
+            session.in_flight -= 1
+        return {"path": self.rel_path, "size": self.size}
+    
+    def abort(self):
+        if not self._file.closed:
+            self._file.close()
+        try:
+            os.unlink(self.tmp_path)
+        except OSError:
+            pass
+        with self.session.lock:
+            self.session.in_flight -= 1
+
+
+class FolderIngestManager:
+    def __init__(self, sessions_path: str, folders_path: str):
+        self.sessions_path = Path(sessions_path)
+        self.sessions_path.mkdir(parents=True, exist_ok=True)
+        self.folders_path = Path(folders_path)
+        self._lock = threading.Lock()
+        self.sessions: Dict[str, IngestSession] = {}
+        self._load_sessions()
+    
+    def _load_sessions(self):
+        for session_dir in self.sessions_path.iterdir():
+            info_path = session_dir / "session.json"
+            if not info_path.is_file():
+                continue
+            try:
+                with open(info_path, 'r', encoding='utf-8') as f:
+                    session = IngestSession(session_dir, json.load(f))
+                session.replay()
+            except (json.JSONDecodeError, KeyError, OSError) as e:
+                print(f"Warning: Skipping broken ingest session {session_dir.name}: {e}")
+                continue
+            # Partial files from interrupted uploads are never in the log; drop them
+            shutil.rmtree(session.tmp_dir, ignore_errors=True)
+            session.tmp_dir.mkdir(exist_ok=True)
+            self.sessions[session.session_id] = session
+    
+    def _reserve_dest(self, name: str) -> Path:
+        self.folders_path.mkdir(parents=True, exist_ok=True)
+        candidate = self.folders_path / name
+        counter = 1
+        while True:
+            try:
+                candidate.mkdir()
+                return candidate
+            except FileExistsError:
+                candidate = self.folders_path / f"{name}_{counter}"
+                counter += 1
+    
+    def open_session(self, name: str, tags: Optional[List[str]] = None) -> IngestSession:
+        safe_name = Path(name).name
+        if not safe_name or safe_name in (".", ".."):
+            raise ValueError(f"Invalid folder name: {name}")
+        
+        session_id = uuid.uuid4().hex
+        session_dir = self.sessions_path / session_id
+        session_dir.mkdir(parents=True)
+        info = {
+            "session_id": session_id,
+            "name": safe_name,
+            "tags": tags or [],
+            "dest_path": str(self._reserve_dest(safe_name)),
+            "created_at": datetime.now().isoformat()
+        }
+        with open(session_dir / "session.json", 'w', encoding='utf-8') as f:
+            json.dump(info, f, ensure_ascii=False, indent=2)
+        
+        session = IngestSession(session_dir, info)
+        session.tmp_dir.mkdir()
+        with self._lock:
+            self.sessions[session_id] = session
+        return session
+    
+    def get_session(self, session_id: str) -> Optional[IngestSession]:
+        return self.sessions.get(session_id)
+    
+    def list_sessions(self) -> List[Dict[str, Any]]:
+        return [session.to_dict() for session in list(self.sessions.values())]
+    
+    @staticmethod
+    def normalize_path(rel_path: str) -> str:
+        parts = [part for part in PurePosixPath(rel_path.replace("\\", "/")).parts if part not in ("", ".")]
+        if not parts or parts[0] == "/" or ".." in parts:
+            raise ValueError(f"Invalid file path: {rel_path}")
+        return "/".join(parts)
+    
+    def open_file(self, session_id: str, rel_path: str) -> IngestFileWriter:
+        rel_path = self.normalize_path(rel_path)
+        # Under the manager lock so finish() cannot slip in between lookup and in_flight bookkeeping
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                raise KeyError(session_id)
+            return IngestFileWriter(session, rel_path)
+    
+    def finish(self, session_id: str) -> IngestSession:
+        """
+        Close the session to new files and hand over its folder. The session directory stays on
+        disk until the caller has registered the folder and calls ``release``; if registration
+        fails, ``reopen`` puts the session back so the commit can be retried.
+        """
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                raise KeyError(session_id)
+            if session.in_flight:
+                raise RuntimeError(f"{session.in_flight} file(s) still uploading")
+            del self.sessions[session_id]
+        return session
+    
+    def release(self, session: IngestSession):
+        shutil.rmtree(session.session_dir, ignore_errors=True)
+    
+    def reopen(self, session: IngestSession):
+        with self._lock:
+            self.sessions.setdefault(session.session_id, session)
+    
+    def abort(self, session_id: str) -> bool:
+        with self._lock:
+            session = self.sessions.pop(session_id, None)
+        if session is None:
+            return False
+        shutil.rmtree(session.dest_path, ignore_errors=True)
+        shutil.rmtree(session.session_dir, ignore_errors=True)
+        return True
@@ -3,46 +3,115 @@ Inspiration Storage and Management Module
 """
 
 import os
-import shutil
+import base64
+import bisect
 import json
-import time
-import tempfile
+import shutil
+import threading
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, Set
 from datetime import datetime
 
 from ..models import Inspiration
+from .inspiration_store import InspirationStore, create_inspiration_store
+from .search_index import SearchIndex
+from .blob_store import BlobStore, BlobWriter, BlobInfo
+from .folder_ingest import FolderIngestManager
+from .dir_scanner import directory_scanner, get_snapshot
+
+
+SORT_FIELDS = ("created_at", "updated_at", "name", "size")
+PROJECTABLE_FIELDS = set(Inspiration.model_fields)
+
+
+def display_file_name(inspiration: Inspiration) -> str:
+    """
+    The user's name for an inspiration's file or folder. Uploaded files are stored under their
+    content hash, so ``path`` is only good for reading; copies and prompts use this name.
+    """
+    original = (inspiration.metadata or {}).get("original_path")
+    if original:
+        name = str(original).replace("\\", "/").rstrip("/").rsplit("/", 1)[-1]
+        if name:
+            return name
+    name = Path(inspiration.name).name or Path(inspiration.path).name
+    suffix = Path(inspiration.path).suffix
+    if suffix and not name.lower().endswith(suffix.lower()):
+        name += suffix
+    return name
+
+
+def original_location(inspiration: Inspiration) -> str:
+    """Where the inspiration came from, falling back to where it is stored."""
+    return (inspiration.metadata or {}).get("original_path") or inspiration.path
 
 
 class InspirationManager:
-    def __init__(self, storage_path: str = "./storage/inspirations", file_type_manager=None):
+    def __init__(
+        self,
+        storage_path: str = "./storage/inspirations",
+        file_type_manager=None,
+        store: Optional[InspirationStore] = None,
+        backend: str = "sqlite"
+    ):
         self.storage_path = Path(storage_path)
         self.storage_path.mkdir(parents=True, exist_ok=True)
         self.metadata_path = self.storage_path / "metadata.json"
         self.file_type_manager = file_type_manager
+        self.store = store or create_inspiration_store(str(self.storage_path), backend)
+        self.search_index = SearchIndex(str(self.storage_path / "search_index.db"))
+        self.blob_store = BlobStore(str(self.storage_path / "blobs"))
+        self.folder_ingest = FolderIngestManager(str(self.storage_path / ".ingest"), str(self.storage_path / "folder"))
+        self._type_index: Dict[str, Set[str]] = {}
+        self._tag_index: Dict[str, Set[str]] = {}
+        self._indexed_keys: Dict[str, Tuple[str, frozenset]] = {}
+        # Guards the in-memory records and indexes; manager calls also run on executor threads
+        self._lock = threading.RLock()
         self._load_metadata()
     
     def _load_metadata(self):
-        if self.metadata_path.exists():
-            try:
-                with open(self.metadata_path, 'r', encoding='utf-8') as f:
-                    self.metadata = json.load(f)
-            except (json.JSONDecodeError, Exception) as e:
-                print(f"Warning: Failed to load metadata, creating new one. Error: {e}")
-                self.metadata = {"inspirations": {}}
-                self._save_metadata()
-        else:
-            self.metadata = {"inspirations": {}}
-            self._save_metadata()
-    
-    def _save_metadata(self):
-        def json_serializer(obj):
-            if isinstance(obj, datetime):
-                return obj.isoformat()
-            raise TypeError(f"Type {type(obj)} is not JSON serializable")
+        self.metadata = {"inspirations": self.store.load_all()}
+        for inspiration_id in self.metadata["inspirations"]:
+            self._reindex(inspiration_id)
+        self.search_index.sync(self.metadata["inspirations"])
+    
+    def _reindex(self, inspiration_id: str):
+        old_type, old_tags = self._indexed_keys.pop(inspiration_id, (None, frozenset()))
+        if old_type is not None:
+            self._discard(self._type_index, old_type, inspiration_id)
+        for tag in old_tags:
+            self._discard(self._tag_index, tag, inspiration_id)
         
-        with open(self.metadata_path, 'w', encoding='utf-8') as f:
-            json.dump(self.metadata, f, ensure_ascii=False, indent=2, default=json_serializer)
+        data = self.metadata["inspirations"].get(inspiration_id)
+        if data is None:
+            return
+        
+        new_type = data.get("type")
+        new_tags = frozenset(data.get("tags") or [])
+        self._type_index.setdefault(new_type, set()).add(inspiration_id)
+        for tag in new_tags:
+            self._tag_index.setdefault(tag, set()).add(inspiration_id)
+        self._indexed_keys[inspiration_id] = (new_type, new_tags)
+    
+    @staticmethod
+    def _discard(index: Dict[str, Set[str]], key: str, inspiration_id: str):
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(inspiration_id)
+            if not ids:
+                del index[key]
+    
+    def _save_record(self, inspiration_id: str, index_search: bool = True):
+        data = self.metadata["inspirations"][inspiration_id]
+        self._reindex(inspiration_id)
+        self.store.upsert(inspiration_id, data)
+        if index_search:
+            self.search_index.upsert(inspiration_id, data)
+    
+    def close(self):
+        self.store.close()
+        self.search_index.close()
+        self.blob_store.close()
     
     def _detect_type(self, file_path: str) -> str:
         if self.file_type_manager:
@@ -86,17 +155,16 @@ class InspirationManager:
             inspiration_type = "folder"
         
         name = name or source.name
+        blob = None
         
         if copy_file:
-            dest_folder = self.storage_path / inspiration_type
-            dest_folder.mkdir(parents=True, exist_ok=True)
-            
             if source.is_file():
-                unique_name = f"{source.stem}_{int(time.time())}{source.suffix}"
-                dest_path = dest_folder / unique_name
-                shutil.copy2(source, dest_path)
-                stored_path = str(dest_path)
+                # Files go into the content-addressed store; identical uploads share one blob
+                blob = self.blob_store.put_file(str(source), source.suffix)
+                stored_path = blob.path
             else:
+                dest_folder = self.storage_path / inspiration_type
+                dest_folder.mkdir(parents=True, exist_ok=True)
                 dest_path = dest_folder / name
                 dest_path.mkdir(parents=True, exist_ok=True)
                 shutil.copytree(source, dest_path, dirs_exist_ok=True)
@@ -104,22 +172,68 @@ class InspirationManager:
         else:
             stored_path = str(source.absolute())
         
-        inspiration = Inspiration(
-            name=name,
-            type=inspiration_type,
-            path=stored_path,
-            tags=tags or [],
-            metadata={
-                "original_path": str(source.absolute()),
-                "size": self._get_size(stored_path),
-                "extension": source.suffix.lower() if source.is_file() else None
-            }
-        )
-        
-        self.metadata["inspirations"][inspiration.id] = inspiration.model_dump()
-        self._save_metadata()
+        metadata = {
+            "original_path": str(source.absolute()),
+            "size": blob.size if blob else self._get_size(stored_path),
+            "extension": source.suffix.lower() if source.is_file() else None
+        }
+        if not copy_file:
+            # Points at the user's own files; the watcher keeps it in sync with the source
+            metadata["linked"] = True
+        if blob:
+            metadata["blob"] = blob.key
+            metadata["sha256"] = blob.sha256
         
-        return inspiration
+        return self._register(name, inspiration_type, stored_path, tags, metadata)
+    
+    def _register(
+        self,
+        name: str,
+        inspiration_type: str,
+        stored_path: str,
+        tags: Optional[List[str]],
+        metadata: Dict[str, Any]
+    ) -> Inspiration:
+        with self._lock:
+            inspiration = Inspiration(
+                name=name,
+                type=inspiration_type,
+                path=stored_path,
+                tags=tags or [],
+                metadata=metadata
+            )
+            
+            self.metadata["inspirations"][inspiration.id] = inspiration.model_dump()
+            self._save_record(inspiration.id)
+            
+            return inspiration
+    
+    def open_upload(self, filename: str) -> BlobWriter:
+        """Start a streamed upload; feed it with write(chunk) and pass the committed blob to add_inspiration_from_blob."""
+        return self.blob_store.open_writer(Path(filename).suffix)
+    
+    def add_inspiration_from_blob(
+        self,
+        blob: BlobInfo,
+        filename: str,
+        name: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        file_type: Optional[str] = None
+    ) -> Inspiration:
+        metadata = {
+            "original_path": filename,
+            "size": blob.size,
+            "extension": Path(filename).suffix.lower(),
+            "blob": blob.key,
+            "sha256": blob.sha256
+        }
+        return self._register(
+            name or Path(filename).name,
+            file_type or self._detect_type(filename),
+            blob.path,
+            tags,
+            metadata
+        )
     
     def add_inspiration_from_upload(
         self,
@@ -129,31 +243,43 @@ class InspirationManager:
         tags: Optional[List[str]] = None,
         file_type: Optional[str] = None
     ) -> Inspiration:
-        temp_dir = Path(tempfile.gettempdir()) / "creative_master_uploads"
-        temp_dir.mkdir(parents=True, exist_ok=True)
-        
-        temp_path = temp_dir / f"{int(time.time())}_{filename}"
-        with open(temp_path, 'wb') as f:
-            f.write(file_content)
-        
+        writer = self.open_upload(filename)
         try:
-            inspiration = self.add_inspiration(
-                source_path=str(temp_path),
-                name=name or Path(filename).name,
-                tags=tags,
-                copy_file=True,
-                file_type=file_type
+            writer.write(file_content)
+            blob = writer.commit()
+        except BaseException:
+            writer.abort()
+            raise
+        return self.add_inspiration_from_blob(blob, filename, name=name, tags=tags, file_type=file_type)
+    
+    def commit_folder_ingest(self, session_id: str, tags: Optional[List[str]] = None) -> Inspiration:
+        session = self.folder_ingest.finish(session_id)
+        # Size and file count were accumulated while the files arrived; no copy or re-walk here
+        metadata = {
+            "original_path": session.name,
+            "size": session.total_size,
+            "file_count": len(session.files),
+            "extension": None
+        }
+        try:
+            inspiration = self._register(
+                session.name,
+                "folder",
+                str(session.dest_path),
+                tags if tags is not None else session.tags,
+                metadata
             )
-            return inspiration
-        finally:
-            if temp_path.exists():
-                temp_path.unlink()
+        except Exception:
+            self.folder_ingest.reopen(session)
+            raise
+        self.folder_ingest.release(session)
+        return inspiration
     
     def _get_size(self, path: str) -> int:
         p = Path(path)
         if p.is_file():
             return p.stat().st_size
-        return sum(f.stat().st_size for f in p.rglob('*') if f.is_file())
+        return get_snapshot(path).entry.size
     
     def get_inspiration(self, inspiration_id: str) -> Optional[Inspiration]:
         data = self.metadata["inspirations"].get(inspiration_id)
@@ -161,57 +287,304 @@ class InspirationManager:
             return Inspiration(**data)
         return None
     
+    def list_linked_inspirations(self) -> List[Inspiration]:
+        """Inspirations added with copy_file=False, including ones added before the ``linked`` flag existed."""
+        storage_root = self.storage_path.resolve()
+        with self._lock:
+            records = list(self.metadata["inspirations"].values())
+        linked = []
+        for data in records:
+            metadata = data.get("metadata") or {}
+            if metadata.get("blob"):
+                continue
+            if metadata.get("linked") or storage_root not in Path(data["path"]).resolve().parents:
+                linked.append(Inspiration(**data))
+        return linked
+    
+    def refresh_linked_metadata(self, inspiration_id: str) -> Optional[Inspiration]:
+        """
+        Re-read size, type and a content fingerprint from a linked inspiration's source. Folder
+        figures come from the shared directory snapshot, so only changed folders are rescanned.
+        A vanished source is flagged ``missing`` rather than removed.
+        """
+        inspiration = self.get_inspiration(inspiration_id)
+        if not inspiration:
+            return None
+        
+        path = Path(inspiration.path)
+        changes: Dict[str, Any] = {}
+        fields: Dict[str, Any] = {}
+        if not path.exists():
+            changes["missing"] = True
+        elif path.is_dir():
+            snapshot = get_snapshot(str(path))
+            type_counts: Dict[str, int] = {}
+            file_count = 0
+            for entry in snapshot.entry.files():
+                file_count += 1
+                detected = self._detect_type(entry.name)
+                type_counts[detected] = type_counts.get(detected, 0) + 1
+            changes.update(
+                missing=False,
+                size=snapshot.entry.size,
+                file_count=file_count,
+                type_counts=type_counts,
+                fingerprint=snapshot.entry.fingerprint
+            )
+            if inspiration.type != "folder":
+                fields["type"] = "folder"
+        else:
+            stat = path.stat()
+            changes.update(
+                missing=False,
+                size=stat.st_size,
+                extension=path.suffix.lower(),
+                fingerprint=f"{stat.st_size}:{stat.st_mtime_ns}"
+            )
+            if inspiration.type == "folder":
+                fields["type"] = self._detect_type(str(path))
+        
+        # Merge under the lock so concurrent edits to other metadata keys (ignored_paths) survive
+        with self._lock:
+            data = self.metadata["inspirations"].get(inspiration_id)
+            if data is None:
+                return None
+            metadata = dict(data.get("metadata") or {})
+            metadata.update(changes)
+            if not metadata.get("missing"):
+                metadata.pop("missing", None)
+            if metadata == (data.get("metadata") or {}) and all(data.get(key) == value for key, value in fields.items()):
+                # Unchanged source: no write, so updated_at and the search index stay as they are
+                return Inspiration(**data)
+            return self.update_inspiration(inspiration_id, metadata=metadata, **fields)
+    
+    def merge_file_summaries(
+        self,
+        inspiration_id: str,
+        entries: List[Dict[str, Any]],
+        replace: bool = False,
+        index_search: bool = True,
+        **updates
+    ) -> Optional[Inspiration]:
+        """
+        Store folder summary entries in ``metadata.file_summaries``, updating entries with the
+        same path and appending new ones; ``replace`` swaps in ``entries`` as the complete list.
+        Other fields in ``updates`` are written in the same save. Partial saves during a run pass
+        ``index_search=False`` and leave re-indexing to the final one.
+        """
+        with self._lock:
+            data = self.metadata["inspirations"].get(inspiration_id)
+            if data is None:
+                return None
+            if entries or replace:
+                metadata = dict(data.get("metadata") or {})
+                if replace:
+                    file_summaries = list(entries)
+                else:
+                    file_summaries = list(metadata.get("file_summaries") or [])
+                    positions = {item.get("path"): index for index, item in enumerate(file_summaries) if isinstance(item, dict)}
+                    for entry in entries:
+                        index = positions.get(entry["path"])
+                        if index is None:
+                            positions[entry["path"]] = len(file_summaries)
+                            file_summaries.append(entry)
+                        else:
+                            file_summaries[index] = {**file_summaries[index], **entry}
+                metadata["file_summaries"] = file_summaries
+                updates["metadata"] = metadata
+            if not updates:
+                return Inspiration(**data)
+            data.update(updates)
+            data["updated_at"] = datetime.now().isoformat()
+            self._save_record(inspiration_id, index_search)
+            return Inspiration(**data)
+    
     def list_inspirations(
         self, 
         type_filter: Optional[str] = None,
-        tags: Optional[List[str]] = None
+        tags: Optional[List[str]] = None,
+        tag_mode: str = "any"
     ) -> List[Inspiration]:
-        results = []
-        for data in self.metadata["inspirations"].values():
-            inspiration = Inspiration(**data)
+        with self._lock:
+            records = self.metadata["inspirations"]
+            ids = self._filter_ids(type_filter, tags, tag_mode)
+            if ids is None:
+                return [Inspiration(**data) for data in records.values()]
+            # Walk the store order so results stay in insertion order; only matches are materialized
+            return [Inspiration(**data) for inspiration_id, data in records.items() if inspiration_id in ids]
+    
+    def _filter_ids(
+        self,
+        type_filter: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        tag_mode: str = "any"
+    ) -> Optional[Set[str]]:
+        if tag_mode not in ("any", "all"):
+            raise ValueError(f"Invalid tag_mode: {tag_mode}")
+        
+        ids = None
+        if type_filter:
+            ids = set(self._type_index.get(type_filter, ()))
+        
+        if tags:
+            tag_sets = sorted((self._tag_index.get(tag, set()) for tag in tags), key=len)
+            if tag_mode == "all":
+                tag_ids = set(tag_sets[0]).intersection(*tag_sets[1:])
+            else:
+                tag_ids = set().union(*tag_sets)
+            ids = tag_ids if ids is None else ids & tag_ids
+        
+        return ids
+    
+    def list_inspirations_page(
+        self,
+        type_filter: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        tag_mode: str = "any",
+        sort: str = "created_at",
+        order: str = "desc",
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Keyset-paginated listing. The cursor encodes the (sort value, id) of the last item
+        returned, so pages stay stable when inspirations are added or removed in between.
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Invalid sort field: {sort}")
+        if order not in ("asc", "desc"):
+            raise ValueError(f"Invalid order: {order}")
+        invalid_fields = [f for f in fields or [] if f.split(".", 1)[0] not in PROJECTABLE_FIELDS]
+        if invalid_fields:
+            raise ValueError(f"Invalid fields: {', '.join(invalid_fields)}")
+        
+        with self._lock:
+            records = self.metadata["inspirations"]
+            ids = self._filter_ids(type_filter, tags, tag_mode)
+            candidates = records if ids is None else ids
+            keys = sorted((self._sort_key(records[inspiration_id], sort), inspiration_id) for inspiration_id in candidates)
             
-            if type_filter and inspiration.type != type_filter:
-                continue
+            after = self._decode_cursor(cursor, sort, order) if cursor else None
+            if order == "asc":
+                start = bisect.bisect_right(keys, after) if after else 0
+                end = len(keys) if limit is None else min(len(keys), start + limit)
+                page = keys[start:end]
+                has_more = end < len(keys)
+            else:
+                end = bisect.bisect_left(keys, after) if after else len(keys)
+                start = 0 if limit is None else max(0, end - limit)
+                page = keys[start:end][::-1]
+                has_more = start > 0
             
-            if tags and not any(tag in inspiration.tags for tag in tags):
+            items = [self._project(records[inspiration_id], fields) for _key, inspiration_id in page]
+            next_cursor = self._encode_cursor(page[-1], sort, order) if page and has_more else None
+            return {"items": items, "next_cursor": next_cursor, "total": len(keys)}
+    
+    @staticmethod
+    def _sort_key(data: Dict[str, Any], sort: str):
+        if sort == "size":
+            return (data.get("metadata") or {}).get("size") or 0
+        value = data.get(sort)
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if sort == "name":
+            return (value or "").lower()
+        return value or ""
+    
+    @staticmethod
+    def _encode_cursor(key: Tuple[Any, str], sort: str, order: str) -> str:
+        payload = json.dumps([sort, order, key[0], key[1]], ensure_ascii=False)
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+    
+    @staticmethod
+    def _decode_cursor(cursor: str, sort: str, order: str) -> Tuple[Any, str]:
+        try:
+            cursor_sort, cursor_order, value, inspiration_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        except Exception:
+            raise ValueError("Invalid cursor")
+        if (cursor_sort, cursor_order) != (sort, order):
+            raise ValueError("Cursor does not match the requested sort order")
+        return (value, inspiration_id)
+    
+    @staticmethod
+    def _project(data: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+        if not fields:
+            return data
+        projected: Dict[str, Any] = {"id": data.get("id")}
+        for field in fields:
+            top, _, sub = field.partition(".")
+            if not sub:
+                projected[top] = data.get(top)
                 continue
-            
-            results.append(inspiration)
-        
-        return results
+            # Dotted fields pick single keys out of metadata without shipping e.g. file_summaries
+            parent = projected.setdefault(top, {})
+            if isinstance(parent, dict):
+                parent[sub] = (data.get(top) or {}).get(sub)
+        return projected
     
     def update_inspiration(
         self, 
         inspiration_id: str, 
         **updates
     ) -> Optional[Inspiration]:
-        if inspiration_id not in self.metadata["inspirations"]:
-            return None
-        
-        data = self.metadata["inspirations"][inspiration_id]
-        data.update(updates)
-        data["updated_at"] = datetime.now().isoformat()
-        
-        self.metadata["inspirations"][inspiration_id] = data
-        self._save_metadata()
-        
-        return Inspiration(**data)
+        with self._lock:
+            if inspiration_id not in self.metadata["inspirations"]:
+                return None
+            
+            data = self.metadata["inspirations"][inspiration_id]
+            data.update(updates)
+            data["updated_at"] = datetime.now().isoformat()
+            
+            self.metadata["inspirations"][inspiration_id] = data
+            self._save_record(inspiration_id)
+            
+            return Inspiration(**data)
+    
+    def update_inspirations(self, updates: Dict[str, Dict[str, Any]]) -> int:
+        """Apply per-id field updates and write them to the store in one batch."""
+        with self._lock:
+            now = datetime.now().isoformat()
+            updated = {}
+            for inspiration_id, fields in updates.items():
+                data = self.metadata["inspirations"].get(inspiration_id)
+                if data is None:
+                    continue
+                data.update(fields)
+                data["updated_at"] = now
+                self._reindex(inspiration_id)
+                updated[inspiration_id] = data
+            
+            if updated:
+                self.store.upsert_many(updated)
+                self.search_index.upsert_many(updated)
+            
+            return len(updated)
     
     def delete_inspiration(self, inspiration_id: str) -> bool:
-        if inspiration_id not in self.metadata["inspirations"]:
-            return False
+        with self._lock:
+            inspiration_data = self.metadata["inspirations"].pop(inspiration_id, None)
+            if inspiration_data is None:
+                return False
+            self._reindex(inspiration_id)
+            self.store.delete(inspiration_id)
+            self.search_index.remove(inspiration_id)
         
-        inspiration_data = self.metadata["inspirations"][inspiration_id]
         stored_path = Path(inspiration_data["path"])
+        blob_key = (inspiration_data.get("metadata") or {}).get("blob")
         
-        if stored_path.exists() and self.storage_path in stored_path.parents:
+        # The record is gone already; removing the files can take a while and needs no lock
+        if not blob_key and stored_path.exists() and self.storage_path in stored_path.parents:
             if stored_path.is_dir():
                 shutil.rmtree(stored_path)
+                directory_scanner.invalidate(str(stored_path))
             else:
                 stored_path.unlink()
         
-        del self.metadata["inspirations"][inspiration_id]
-        self._save_metadata()
+        if blob_key:
+            # Drop our reference and reclaim the blob if no other inspiration still points at it
+            self.blob_store.release(blob_key)
+            self.blob_store.gc([blob_key])
         
         return True
     
@@ -223,46 +596,52 @@ class InspirationManager:
         new_tags = list(set(inspiration.tags + tags))
         return self.update_inspiration(inspiration_id, tags=new_tags)
     
-    def search_inspirations(self, query: str) -> List[Inspiration]:
+    def search_inspirations(self, query: str, offset: int = 0, limit: Optional[int] = None) -> List[Inspiration]:
+        return self.search_inspirations_ranked(query, offset, limit)[0]
+    
+    def search_inspirations_ranked(
+        self,
+        query: str,
+        offset: int = 0,
+        limit: Optional[int] = None
+    ) -> Tuple[List[Inspiration], int]:
+        hits, total = self.search_index.search(query, offset=offset, limit=limit)
         results = []
-        query_lower = query.lower()
-        
-        for data in self.metadata["inspirations"].values():
-            if query_lower in data["name"].lower():
+        for inspiration_id, _score in hits:
+            data = self.metadata["inspirations"].get(inspiration_id)
+            if data:
                 results.append(Inspiration(**data))
-            elif data.get("summary") and query_lower in data["summary"].lower():
-                results.append(Inspiration(**data))
-            elif any(query_lower in tag.lower() for tag in data.get("tags", [])):
-                results.append(Inspiration(**data))
-        
-        return results
+        return results, total
     
     def refresh_all_types(self, type_detector) -> int:
-        updated_count = 0
-        
-        for inspiration_id, data in self.metadata["inspirations"].items():
-            if data.get("type") == "folder":
-                continue
+        with self._lock:
+            updated = {}
             
-            stored_path = data.get("path")
-            if not stored_path:
-                continue
+            for inspiration_id, data in self.metadata["inspirations"].items():
+                if data.get("type") == "folder":
+                    continue
+                
+                stored_path = data.get("path")
+                if not stored_path:
+                    continue
+                
+                path = Path(stored_path)
+                if not path.exists():
+                    continue
+                
+                new_type = type_detector(path)
+                if new_type and new_type != data.get("type"):
+                    data["type"] = new_type
+                    data["updated_at"] = datetime.now().isoformat()
+                    self.metadata["inspirations"][inspiration_id] = data
+                    self._reindex(inspiration_id)
+                    updated[inspiration_id] = data
             
-            path = Path(stored_path)
-            if not path.exists():
-                continue
+            if updated:
+                self.store.upsert_many(updated)
+                self.search_index.upsert_many(updated)
             
-            new_type = type_detector(path)
-            if new_type and new_type != data.get("type"):
-                data["type"] = new_type
-                data["updated_at"] = datetime.now().isoformat()
-                self.metadata["inspirations"][inspiration_id] = data
-                updated_count += 1
-        
-        if updated_count > 0:
-            self._save_metadata()
-        
-        return updated_count
+            return len(updated)
     
     def batch_add_inspirations(
         self,
@@ -0,0 +1,197 @@
+"""
+Inspiration Metadata Storage Module
+Pluggable persistence backends for InspirationManager
+"""
+
+import json
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any
+
+
+def json_serializer(obj):
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Type {type(obj)} is not JSON serializable")
+
+
+def open_sqlite(db_path) -> sqlite3.Connection:
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    # Autocommit mode: every statement outside an explicit BEGIN is its own transaction
+    conn = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class InspirationStore(ABC):
+    @abstractmethod
+    def load_all(self) -> Dict[str, Dict[str, Any]]:
+        pass
+    
+    @abstractmethod
+    def upsert(self, inspiration_id: str, data: Dict[str, Any]):
+        pass
+    
+    @abstractmethod
+    def delete(self, inspiration_id: str):
+        pass
+    
+    def upsert_many(self, records: Dict[str, Dict[str, Any]]):
+        for inspiration_id, data in records.items():
+            self.upsert(inspiration_id, data)
+    
+    def close(self):
+        pass
+
+
+class JSONInspirationStore(InspirationStore):
+    """Legacy backend: the whole library lives in one metadata.json that is rewritten on every change."""
+    
+    def __init__(self, metadata_path: str):
+        self.metadata_path = Path(metadata_path)
+        self._records: Dict[str, Dict[str, Any]] = {}
+    
+    def load_all(self) -> Dict[str, Dict[str, Any]]:
+        if self.metadata_path.exists():
+            try:
+                with open(self.metadata_path, 'r', encoding='utf-8') as f:
+                    self._records = json.load(f).get("inspirations", {})
+            except (json.JSONDecodeError, Exception) as e:
+                print(f"Warning: Failed to load metadata, creating new one. Error: {e}")
+                self._records = {}
+                self._save()
+        else:
+            self._records = {}
+            self._save()
+        return self._records
+    
+    def _save(self):
+        with open(self.metadata_path, 'w', encoding='utf-8') as f:
+            json.dump({"inspirations": self._records}, f, ensure_ascii=False, indent=2, default=json_serializer)
+    
+    def upsert(self, inspiration_id: str, data: Dict[str, Any]):
+        self._records[inspiration_id] = data
+        self._save()
+    
+    def upsert_many(self, records: Dict[str, Dict[str, Any]]):
+        self._records.update(records)
+        self._save()
+    
+    def delete(self, inspiration_id: str):
+        self._records.pop(inspiration_id, None)
+        self._save()
+
+
+class SQLiteInspirationStore(InspirationStore):
+    """One row per inspiration in a WAL-mode SQLite database, so a write only touches the changed record."""
+    
+    def __init__(self, db_path: str):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn = open_sqlite(self.db_path)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS inspirations (
+                id TEXT PRIMARY KEY,
+                type TEXT,
+                name TEXT,
+                data TEXT NOT NULL,
+                updated_at TEXT
+            )"""
+        )
+    
+    def _row(self, inspiration_id: str, data: Dict[str, Any]):
+        updated_at = data.get("updated_at")
+        if isinstance(updated_at, datetime):
+            updated_at = updated_at.isoformat()
+        return (
+            inspiration_id,
+            data.get("type"),
+            data.get("name"),
+            json.dumps(data, ensure_ascii=False, default=json_serializer),
+            updated_at
+        )
+    
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM inspirations").fetchone()[0]
+    
+    def load_all(self) -> Dict[str, Dict[str, Any]]:
+        records = {}
+        with self._lock:
+            for inspiration_id, data in self._conn.execute("SELECT id, data FROM inspirations"):
+                try:
+                    records[inspiration_id] = json.loads(data)
+                except json.JSONDecodeError as e:
+                    print(f"Warning: Skipping corrupted inspiration record {inspiration_id}: {e}")
+        return records
+    
+    def upsert(self, inspiration_id: str, data: Dict[str, Any]):
+        self.upsert_many({inspiration_id: data})
+    
+    def upsert_many(self, records: Dict[str, Dict[str, Any]]):
+        if not records:
+            return
+        rows = [self._row(inspiration_id, data) for inspiration_id, data in records.items()]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    """INSERT INTO inspirations (id, type, name, data, updated_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(id) DO UPDATE SET
+                        type = excluded.type,
+                        name = excluded.name,
+                        data = excluded.data,
+                        updated_at = excluded.updated_at""",
+                    rows
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+    
+    def delete(self, inspiration_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM inspirations WHERE id = ?", (inspiration_id,))
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def migrate_json_to_sqlite(json_path: str, store: SQLiteInspirationStore) -> int:
+    """Copy every record from a legacy metadata.json into the SQLite store, then retire the JSON file."""
+    source = Path(json_path)
+    if not source.exists():
+        return 0
+    
+    with open(source, 'r', encoding='utf-8') as f:
+        records = json.load(f).get("inspirations", {})
+    
+    store.upsert_many(records)
+    source.rename(source.with_name(source.name + ".migrated"))
+    print(f"Migrated {len(records)} inspirations from {source} to {store.db_path}")
+    return len(records)
+
+
+def create_inspiration_store(storage_path: str, backend: str = "sqlite") -> InspirationStore:
+    storage = Path(storage_path)
+    metadata_path = storage / "metadata.json"
+    
+    if backend == "json":
+        return JSONInspirationStore(str(metadata_path))
+    if backend != "sqlite":
+        raise ValueError(f"Unknown inspiration storage backend: {backend}")
+    
+    store = SQLiteInspirationStore(str(storage / "metadata.db"))
+    if metadata_path.exists() and store.count() == 0:
+        try:
+            migrate_json_to_sqlite(str(metadata_path), store)
+        except (json.JSONDecodeError, Exception) as e:
+            print(f"Warning: Failed to migrate {metadata_path}, starting with an empty store. Error: {e}")
+    return store
@@ -0,0 +1,366 @@
+"""
+Background Job Module
+Persisted job queue with bounded worker concurrency and live progress streaming
+"""
+
+import asyncio
+import json
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Callable, Awaitable, AsyncIterator
+
+from .inspiration_store import open_sqlite
+from .streaming import format_sse
+
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+DEFAULT_WORKERS = 2
+PROGRESS_PERSIST_INTERVAL = 1.0
+HEARTBEAT_SECONDS = 15.0
+
+JOB_COLUMNS = ("id", "kind", "params", "dedup_key", "status", "progress", "result", "error", "created_at", "started_at", "finished_at")
+SELECT_JOBS = f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs"
+
+
+class Job:
+    def __init__(self, row: Dict[str, Any]):
+        self.id = row["id"]
+        self.kind = row["kind"]
+        self.params = row.get("params") or {}
+        self.dedup_key = row.get("dedup_key")
+        self.status = row.get("status", QUEUED)
+        self.progress = row.get("progress") or {}
+        self.result = row.get("result")
+        self.error = row.get("error")
+        self.created_at = row.get("created_at")
+        self.started_at = row.get("started_at")
+        self.finished_at = row.get("finished_at")
+        self._started_monotonic: Optional[float] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "progress": dict(self.progress),
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+
+JobHandler = Callable[[Job, Callable[..., None]], Awaitable[Any]]
+
+
+class JobManager:
+    """
+    Jobs are rows in ``jobs.db``; the in-memory queue is rebuilt from it on start, so anything
+    queued or interrupted mid-run is picked up again after a restart. A fixed pool of worker
+    tasks bounds how many jobs run at once; interactive submissions skip the queue and start on
+    their own task, so a user waiting on one is not stuck behind bulk work. Handlers receive a ``report(**progress)`` callback;
+    every report is pushed to SSE subscribers and persisted at most once per second.
+    """
+    
+    def __init__(self, db_path: str, workers: int = DEFAULT_WORKERS):
+        self.db_path = Path(db_path)
+        self.workers = workers
+        self.handlers: Dict[str, JobHandler] = {}
+        self.jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._conn = open_sqlite(self.db_path)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                params TEXT,
+                dedup_key TEXT,
+                status TEXT NOT NULL,
+                progress TEXT,
+                result TEXT,
+                error TEXT,
+                created_at TEXT,
+                started_at TEXT,
+                finished_at TEXT
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)")
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._worker_tasks: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self._last_persist: Dict[str, float] = {}
+        self._stopping = False
+    
+    def register_handler(self, kind: str, handler: JobHandler):
+        self.handlers[kind] = handler
+    
+    def _row_to_job(self, row) -> Job:
+        data = dict(zip(JOB_COLUMNS, row))
+        for field in ("params", "progress", "result"):
+            if data[field]:
+                try:
+                    data[field] = json.loads(data[field])
+                except json.JSONDecodeError:
+                    data[field] = None
+        return Job(data)
+    
+    def _persist(self, job: Job):
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO jobs ({', '.join(JOB_COLUMNS)}) VALUES ({', '.join('?' * len(JOB_COLUMNS))})",
+                (
+                    job.id, job.kind,
+                    json.dumps(job.params, ensure_ascii=False),
+                    job.dedup_key, job.status,
+                    json.dumps(job.progress, ensure_ascii=False),
+                    json.dumps(job.result, ensure_ascii=False, default=str) if job.result is not None else None,
+                    job.error, job.created_at, job.started_at, job.finished_at
+                )
+            )
+        self._last_persist[job.id] = time.monotonic()
+    
+    async def start(self):
+        with self._lock:
+            rows = self._conn.execute(
+                SELECT_JOBS + " WHERE status IN (?, ?) ORDER BY created_at",
+                (QUEUED, RUNNING)
+            ).fetchall()
+        for row in rows:
+            job = self._row_to_job(row)
+            if job.status == RUNNING:
+                print(f"Re-queueing job {job.id} ({job.kind}) interrupted by shutdown")
+                job.status = QUEUED
+                job.started_at = None
+                self._persist(job)
+            self.jobs[job.id] = job
+            self._queue.put_nowait(job.id)
+        self._worker_tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+    
+    async def stop(self):
+        self._stopping = True
+        for task in [*self._worker_tasks, *self._running.values()]:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, *self._running.values(), return_exceptions=True)
+        self._worker_tasks = []
+        with self._lock:
+            self._conn.close()
+    
+    def submit(
+        self,
+        kind: str,
+        params: Dict[str, Any],
+        dedup_key: Optional[str] = None,
+        dedup_running: bool = True,
+        interactive: bool = False
+    ) -> Job:
+        """
+        Queue a job. With ``dedup_key``, an unfinished job with the same key is returned instead;
+        ``dedup_running=False`` only reuses a queued one, for callers whose input changed after
+        the running job already read it. ``interactive`` jobs start immediately instead of
+        waiting for a worker, and a queued duplicate is started with them.
+        """
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if dedup_key:
+            statuses = (QUEUED, RUNNING) if dedup_running else (QUEUED,)
+            for job in self.jobs.values():
+                if job.dedup_key == dedup_key and job.status in statuses:
+                    if interactive and job.status == QUEUED:
+                        # Its queue entry is skipped by the worker once the job is running
+                        self._start_now(job)
+                    return job
+        
+        job = Job({
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "params": params,
+            "dedup_key": dedup_key,
+            "status": QUEUED,
+            "created_at": datetime.now().isoformat()
+        })
+        self.jobs[job.id] = job
+        self._persist(job)
+        if interactive:
+            self._start_now(job)
+        else:
+            self._queue.put_nowait(job.id)
+            self._publish(job, "status")
+        return job
+    
+    def _start_now(self, job: Job):
+        task = asyncio.create_task(self._run(job))
+        self._running[job.id] = task
+        task.add_done_callback(lambda _: self._running.pop(job.id, None))
+    
+    def get(self, job_id: str) -> Optional[Job]:
+        job = self.jobs.get(job_id)
+        if job:
+            return job
+        with self._lock:
+            row = self._conn.execute(
+                SELECT_JOBS + " WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        return self._row_to_job(row) if row else None
+    
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        query = SELECT_JOBS
+        args: tuple = ()
+        if status:
+            query += " WHERE status = ?"
+            args = (status,)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(query, args + (limit,)).fetchall()
+        # Prefer live in-memory state (fresher progress) over the throttled persisted copy
+        return [(self.jobs.get(row[0]) or self._row_to_job(row)).to_dict() for row in rows]
+    
+    def cancel(self, job_id: str) -> bool:
+        job = self.jobs.get(job_id)
+        if not job or job.status in FINISHED_STATES:
+            return False
+        task = self._running.get(job_id)
+        if task:
+            task.cancel()
+        else:
+            self._finish(job, CANCELLED)
+        return True
+    
+    async def _worker(self, index: int):
+        while True:
+            job_id = await self._queue.get()
+            job = self.jobs.get(job_id)
+            if not job or job.status != QUEUED:
+                continue
+            task = asyncio.create_task(self._run(job))
+            self._running[job.id] = task
+            try:
+                await task
+            except asyncio.CancelledError:
+                if self._stopping:
+                    raise
+                # Only this job was cancelled through cancel(); the worker carries on
+            finally:
+                self._running.pop(job.id, None)
+    
+    async def _run(self, job: Job):
+        handler = self.handlers.get(job.kind)
+        if handler is None:
+            self._finish(job, FAILED, error=f"No handler for job kind: {job.kind}")
+            return
+        
+        job.status = RUNNING
+        job.started_at = datetime.now().isoformat()
+        job._started_monotonic = time.monotonic()
+        self._persist(job)
+        self._publish(job, "status")
+        
+        def report(**progress):
+            self._report(job, progress)
+        
+        try:
+            result = await handler(job, report)
+        except asyncio.CancelledError:
+            # On shutdown the job stays RUNNING in the database and is re-queued on the next start
+            if not self._stopping:
+                self._finish(job, CANCELLED)
+            raise
+        except Exception as e:
+            print(f"Job {job.id} ({job.kind}) failed: {e}")
+            self._finish(job, FAILED, error=str(e))
+        else:
+            self._finish(job, SUCCEEDED, result=result)
+    
+    def _report(self, job: Job, progress: Dict[str, Any]):
+        job.progress.update(progress)
+        done = job.progress.get("files_done")
+        total = job.progress.get("files_total")
+        if job._started_monotonic and done and total:
+            elapsed = time.monotonic() - job._started_monotonic
+            job.progress["elapsed_seconds"] = round(elapsed, 1)
+            job.progress["eta_seconds"] = round(elapsed / done * max(total - done, 0), 1)
+        if time.monotonic() - self._last_persist.get(job.id, 0) >= PROGRESS_PERSIST_INTERVAL:
+            self._persist(job)
+        self._publish(job, "progress")
+    
+    def _finish(self, job: Job, status: str, result: Any = None, error: Optional[str] = None):
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = datetime.now().isoformat()
+        if status == SUCCEEDED:
+            job.progress["eta_seconds"] = 0
+        self._persist(job)
+        self._last_persist.pop(job.id, None)
+        self._publish(job, "status")
+        # Finished jobs are served from the database from now on
+        self.jobs.pop(job.id, None)
+    
+    def _publish(self, job: Job, event: str):
+        payload = job.to_dict()
+        for queue in self._subscribers.get(job.id, []):
+            queue.put_nowait((event, payload))
+    
+    def _subscribe(self, job_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, []).append(queue)
+        return queue
+    
+    def _unsubscribe(self, job_id: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(job_id, [])
+        if queue in subscribers:
+            subscribers.remove(queue)
+        if not subscribers:
+            self._subscribers.pop(job_id, None)
+    
+    async def wait(self, job_id: str) -> Optional[Job]:
+        """Wait until a job finishes and return its final state. Cancelling the wait leaves the job running."""
+        job = self.get(job_id)
+        if job is None or job.status in FINISHED_STATES:
+            return job
+        queue = self._subscribe(job_id)
+        try:
+            while True:
+                _, payload = await queue.get()
+                if payload["status"] in FINISHED_STATES:
+                    return self.get(job_id)
+        finally:
+            self._unsubscribe(job_id, queue)
+    
+    async def events(self, job_id: str) -> AsyncIterator[str]:
+        """Server-sent events for one job: the current state first, then every change until it finishes."""
+        job = self.get(job_id)
+        if job is None:
+            return
+        yield format_sse("status", job.to_dict())
+        if job.status in FINISHED_STATES:
+            yield format_sse("done", job.to_dict())
+            return
+        
+        queue = self._subscribe(job_id)
+        try:
+            while True:
+                try:
+                    event, payload = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event, payload)
+                if payload["status"] in FINISHED_STATES:
+                    yield format_sse("done", payload)
+                    return
+        finally:
+            self._unsubscribe(job_id, queue)
@@ -0,0 +1,194 @@
+"""
+Append-only Journal Module
+Write-ahead journal with background compaction for JSON key-value stores
+"""
+
+import copy
+import json
+import os
+import tempfile
+import threading
+from typing import Dict, Any, List, Optional, Callable
+
+
+def atomic_write_json(filepath: str, data: Any, serializer: Optional[Callable] = None):
+    atomic_write_text(filepath, json.dumps(data, ensure_ascii=False, indent=2, default=serializer))
+
+
+def atomic_write_text(filepath: str, content: str):
+    directory = os.path.dirname(os.path.abspath(filepath))
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(filepath) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class JournaledJSONStore:
+    """
+    A JSON object persisted as a snapshot file plus an append-only journal of put/del operations.
+
+    Mutations append one line to ``<snapshot>.journal``. Once the journal grows past
+    ``compact_threshold`` bytes, a background thread rotates it to ``<snapshot>.journal.compacting``,
+    writes a fresh snapshot and drops the rotated journal. Loading replays the snapshot, the
+    rotated journal (if a compaction was interrupted) and the live journal, in that order.
+
+    Owners that mutate ``data`` in place should pass the lock they hold while doing so as
+    ``lock``; compaction copies ``data`` under it.
+    """
+    
+    def __init__(
+        self,
+        snapshot_path: str,
+        serializer: Optional[Callable] = None,
+        compact_threshold: int = 1024 * 1024,
+        lock: Optional[threading.RLock] = None
+    ):
+        self.snapshot_path = snapshot_path
+        self.journal_path = snapshot_path + ".journal"
+        self.compacting_path = snapshot_path + ".journal.compacting"
+        self.serializer = serializer
+        self.compact_threshold = compact_threshold
+        self.data: Dict[str, Any] = {}
+        self._lock = lock or threading.RLock()
+        self._journal_file = None
+        self._compactor: Optional[threading.Thread] = None
+    
+    def load(self, default: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        with self._lock:
+            data = default if default is not None else {}
+            if os.path.exists(self.snapshot_path):
+                try:
+                    with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                except (json.JSONDecodeError, Exception) as e:
+                    print(f"Warning: Failed to load snapshot {self.snapshot_path}: {e}")
+            
+            for path in (self.compacting_path, self.journal_path):
+                self._replay(path, data)
+            
+            self.data = data
+            self._journal_file = open(self.journal_path, 'a', encoding='utf-8')
+            if self._ends_with_partial_line(self.journal_path):
+                self._journal_file.write("\n")
+        
+        if os.path.exists(self.compacting_path):
+            self.compact()
+        return self.data
+    
+    def reload(self, default: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        with self._lock:
+            if self._journal_file is not None:
+                self._journal_file.close()
+                self._journal_file = None
+            return self.load(default)
+    
+    def _ends_with_partial_line(self, path: str) -> bool:
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return False
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b"\n"
+    
+    def _replay(self, path: str, data: Dict[str, Any]):
+        if not os.path.exists(path):
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn tail from a crash mid-append: the entry never completed, so drop it
+                    print(f"Warning: Skipping incomplete journal entry {path}:{line_no}")
+                    continue
+                self._apply(entry, data)
+    
+    def _apply(self, entry: Dict[str, Any], data: Dict[str, Any]):
+        op = entry.get("op")
+        if op == "put":
+            data[entry["key"]] = entry["value"]
+        elif op == "del":
+            data.pop(entry["key"], None)
+        elif op == "batch":
+            for sub_entry in entry.get("ops", []):
+                self._apply(sub_entry, data)
+    
+    def put(self, key: str, value: Any):
+        self.append([{"op": "put", "key": key, "value": value}])
+    
+    def delete(self, key: str):
+        self.append([{"op": "del", "key": key}])
+    
+    def append(self, ops: List[Dict[str, Any]]):
+        if not ops:
+            return
+        entry = ops[0] if len(ops) == 1 else {"op": "batch", "ops": ops}
+        line = json.dumps(entry, ensure_ascii=False, default=self.serializer) + "\n"
+        
+        with self._lock:
+            self._journal_file.write(line)
+            self._journal_file.flush()
+            needs_compaction = self._journal_file.tell() >= self.compact_threshold
+        
+        if needs_compaction:
+            self._start_compactor()
+    
+    def _start_compactor(self):
+        with self._lock:
+            if self._compactor and self._compactor.is_alive():
+                return
+            self._compactor = threading.Thread(
+                target=self.compact,
+                name=f"journal-compactor:{os.path.basename(self.snapshot_path)}",
+                daemon=True
+            )
+            self._compactor.start()
+    
+    def _rotate_journal(self):
+        self._journal_file.close()
+        if os.path.exists(self.compacting_path):
+            # A previous compaction did not finish; keep its entries ahead of the newer ones
+            with open(self.journal_path, 'r', encoding='utf-8') as src, open(self.compacting_path, 'a', encoding='utf-8') as dst:
+                dst.write(src.read())
+            os.remove(self.journal_path)
+        elif os.path.exists(self.journal_path):
+            os.replace(self.journal_path, self.compacting_path)
+        self._journal_file = open(self.journal_path, 'a', encoding='utf-8')
+    
+    def compact(self):
+        try:
+            with self._lock:
+                if self._journal_file.tell() == 0 and not os.path.exists(self.compacting_path):
+                    return
+                self._rotate_journal()
+                # Copy under the lock, serialize outside it so writers are not held up by the dump
+                snapshot = copy.deepcopy(self.data)
+            
+            payload = json.dumps(snapshot, ensure_ascii=False, indent=2, default=self.serializer)
+            atomic_write_text(self.snapshot_path, payload)
+            os.remove(self.compacting_path)
+        except Exception as e:
+            print(f"Warning: Journal compaction failed for {self.snapshot_path}: {e}")
+    
+    def close(self):
+        compactor = self._compactor
+        if compactor and compactor.is_alive():
+            compactor.join()
+        if self._journal_file is None:
+            return
+        self.compact()
+        with self._lock:
+            self._journal_file.close()
+            self._journal_file = None
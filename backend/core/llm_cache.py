@@ -0,0 +1,149 @@
+"""
+LLM Response Cache Module
+On-disk cache of chat completion responses with TTL and size-bounded LRU eviction
+"""
+
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from .inspiration_store import open_sqlite
+
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Evict down to this fraction of max_bytes so we do not evict on every single insert
+EVICT_TARGET_RATIO = 0.9
+PURGE_EVERY_PUTS = 200
+
+# Request parameters that do not change the answer and must not split the cache key
+NON_KEY_PARAMS = {"stream", "timeout", "extra_headers", "extra_query", "user"}
+
+
+class ResponseCache:
+    def __init__(self, db_path: str, ttl_seconds: int = DEFAULT_TTL_SECONDS, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.db_path = Path(db_path)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+        self._conn = open_sqlite(self.db_path)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+    
+    @staticmethod
+    def make_key(base_url: Optional[str], params: Dict[str, Any]) -> str:
+        keyed = {name: value for name, value in params.items() if name not in NON_KEY_PARAMS}
+        payload = json.dumps({"base_url": base_url or "", "params": keyed}, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT response, size, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and now - row[2] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._total_bytes -= row[1]
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            self.hits += 1
+        return row[0]
+    
+    def put(self, key: str, model: Optional[str], response: str):
+        size = len(response.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                """INSERT OR REPLACE INTO responses (key, model, response, size, created_at, accessed_at, hits)
+                VALUES (?, ?, ?, ?, ?, ?, 0)""",
+                (key, model, response, size, now, now)
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+            self._puts += 1
+            if self._puts % PURGE_EVERY_PUTS == 0:
+                self._purge_expired_locked(now)
+            if self._total_bytes > self.max_bytes:
+                self._evict_locked()
+    
+    def _purge_expired_locked(self, now: float):
+        cutoff = now - self.ttl_seconds
+        freed = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses WHERE created_at < ?", (cutoff,)).fetchone()[0]
+        self._conn.execute("DELETE FROM responses WHERE created_at < ?", (cutoff,))
+        self._total_bytes -= freed
+    
+    def _evict_locked(self):
+        target = self.max_bytes * EVICT_TARGET_RATIO
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            if self._total_bytes <= target:
+                break
+            victims.append((key,))
+            self._total_bytes -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+    
+    def clear(self) -> int:
+        with self._lock:
+            removed = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            self._conn.execute("DELETE FROM responses")
+            self._total_bytes = 0
+        return removed
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache(db_path: str = "./storage/llm_cache.db") -> ResponseCache:
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache(db_path)
+        return _response_cache
+
+
+def close_response_cache():
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is not None:
+            _response_cache.close()
+            _response_cache = None
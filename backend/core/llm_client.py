@@ -0,0 +1,88 @@
+"""
+LLM Client Module
+Process-wide registry of pooled AsyncOpenAI clients
+"""
+
+import threading
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+
+MAX_CONNECTIONS = 100
+MAX_KEEPALIVE_CONNECTIONS = 20
+KEEPALIVE_EXPIRY = 60.0
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class LLMClientRegistry:
+    """
+    One AsyncOpenAI client per (base_url, api_key, timeout), each with its own keep-alive
+    connection pool. Reusing the client keeps TLS sessions and (with h2 installed) HTTP/2
+    connections warm across the hundreds of calls a folder summary fans out to.
+    """
+    
+    def __init__(
+        self,
+        max_connections: int = MAX_CONNECTIONS,
+        max_keepalive_connections: int = MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = KEEPALIVE_EXPIRY,
+        http2: bool = HTTP2_AVAILABLE
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.http2 = http2
+        self._clients: Dict[Tuple[Optional[str], str, Optional[float]], object] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, api_key: str, base_url: Optional[str] = None, timeout: Optional[float] = None):
+        import openai
+        
+        # DefaultAsyncHttpxClient keeps the SDK's timeout/redirect defaults; older SDKs lack it
+        http_client_class = getattr(openai, "DefaultAsyncHttpxClient", httpx.AsyncClient)
+        key = (base_url or None, api_key, timeout)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                kwargs = {}
+                if timeout is not None:
+                    kwargs["timeout"] = timeout
+                client = openai.AsyncOpenAI(
+                    api_key=api_key,
+                    base_url=base_url or None,
+                    http_client=http_client_class(limits=self.limits, http2=self.http2),
+                    # Retries are owned by the scheduler, which knows about the shared rate limits
+                    max_retries=0,
+                    **kwargs
+                )
+                self._clients[key] = client
+        return client
+    
+    async def aclose(self):
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            try:
+                await client.close()
+            except Exception as e:
+                print(f"Warning: Failed to close LLM client: {e}")
+
+
+llm_clients = LLMClientRegistry()
+
+
+def get_llm_client(api_key: str, base_url: Optional[str] = None, timeout: Optional[float] = None):
+    return llm_clients.get(api_key, base_url, timeout)
+
+
+async def close_llm_clients():
+    await llm_clients.aclose()
@@ -0,0 +1,409 @@
+"""
+LLM Scheduler Module
+Per-model rate limiting, token budgets, retries and fair queuing for all chat completions
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional, Union, Deque, Tuple, AsyncIterator
+
+from ..models import AIModelConfig
+from .llm_client import get_llm_client
+from .llm_cache import get_response_cache
+
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+DEFAULT_MAX_CONCURRENCY = 10
+MAX_RETRIES = 5
+BASE_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Refills continuously at ``per_minute / 60`` units per second up to ``per_minute``."""
+    
+    def __init__(self, per_minute: Optional[int]):
+        self.per_minute = per_minute
+        self.level = float(per_minute or 0)
+        self.updated = time.monotonic()
+    
+    def _refill(self):
+        now = time.monotonic()
+        if self.per_minute:
+            self.level = min(float(self.per_minute), self.level + (now - self.updated) * self.per_minute / 60.0)
+        self.updated = now
+    
+    def wait_time(self, amount: float) -> float:
+        if not self.per_minute:
+            return 0.0
+        self._refill()
+        # A single request larger than the whole budget is let through once the bucket is full
+        amount = min(amount, self.per_minute)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) * 60.0 / self.per_minute
+    
+    def consume(self, amount: float):
+        if self.per_minute:
+            self._refill()
+            self.level -= amount
+    
+    def set_rate(self, per_minute: Optional[int]):
+        if per_minute != self.per_minute:
+            self.per_minute = per_minute
+            self.level = min(self.level, float(per_minute or 0))
+
+
+class _Ticket:
+    def __init__(self, future: asyncio.Future, tokens: int):
+        self.future = future
+        self.tokens = tokens
+
+
+class LLMScheduler:
+    """
+    Admits calls for one model config. A call is granted when a concurrency slot is free and the
+    requests-per-minute and tokens-per-minute buckets allow it.
+
+    Waiting calls sit in two lanes. The interactive lane (creative generation, single summaries)
+    always goes first. The bulk lane (folder fan-out) is served round-robin across owners, so one
+    huge folder cannot starve another folder or any interactive request.
+    """
+    
+    def __init__(self, rpm_limit: Optional[int] = None, tpm_limit: Optional[int] = None, max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        self.max_concurrency = max_concurrency or DEFAULT_MAX_CONCURRENCY
+        self.requests = TokenBucket(rpm_limit)
+        self.tokens = TokenBucket(tpm_limit)
+        self.active = 0
+        self.paused_until = 0.0
+        self._interactive: Deque[_Ticket] = deque()
+        self._bulk: "OrderedDict[str, Deque[_Ticket]]" = OrderedDict()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.stats = {"granted": 0, "retries": 0, "rate_limited": 0, "failed": 0}
+    
+    def configure(self, rpm_limit: Optional[int], tpm_limit: Optional[int], max_concurrency: Optional[int]):
+        self.requests.set_rate(rpm_limit)
+        self.tokens.set_rate(tpm_limit)
+        self.max_concurrency = max_concurrency or DEFAULT_MAX_CONCURRENCY
+        self._pump()
+    
+    def queued(self) -> int:
+        return len(self._interactive) + sum(len(lane) for lane in self._bulk.values())
+    
+    def _peek(self) -> Optional[_Ticket]:
+        while self._interactive and self._interactive[0].future.done():
+            self._interactive.popleft()
+        if self._interactive:
+            return self._interactive[0]
+        for owner in list(self._bulk):
+            lane = self._bulk[owner]
+            while lane and lane[0].future.done():
+                lane.popleft()
+            if lane:
+                return lane[0]
+            del self._bulk[owner]
+        return None
+    
+    def _pop(self, ticket: _Ticket):
+        if self._interactive and self._interactive[0] is ticket:
+            self._interactive.popleft()
+            return
+        owner, lane = next(iter(self._bulk.items()))
+        lane.popleft()
+        # Rotate the owner to the back so the next bulk grant goes to someone else
+        self._bulk.move_to_end(owner)
+        if not lane:
+            del self._bulk[owner]
+    
+    def _pump(self):
+        while self.active < self.max_concurrency:
+            ticket = self._peek()
+            if ticket is None:
+                return
+            wait = max(
+                self.paused_until - time.monotonic(),
+                self.requests.wait_time(1),
+                self.tokens.wait_time(ticket.tokens)
+            )
+            if wait > 0:
+                self._schedule(wait)
+                return
+            self._pop(ticket)
+            self.requests.consume(1)
+            self.tokens.consume(ticket.tokens)
+            self.active += 1
+            self.stats["granted"] += 1
+            ticket.future.set_result(None)
+    
+    def _schedule(self, delay: float):
+        if self._timer is not None:
+            return
+        loop = asyncio.get_running_loop()
+        
+        def fire():
+            self._timer = None
+            self._pump()
+        
+        self._timer = loop.call_later(delay, fire)
+    
+    async def acquire(self, tokens: int, priority: str = INTERACTIVE, owner: Optional[str] = None):
+        ticket = _Ticket(asyncio.get_running_loop().create_future(), tokens)
+        if priority == BULK:
+            self._bulk.setdefault(owner or "", deque()).append(ticket)
+        else:
+            self._interactive.append(ticket)
+        self._pump()
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            if ticket.future.done() and not ticket.future.cancelled():
+                # Granted just before the cancellation landed: hand the slot back
+                self.release()
+            raise
+    
+    def release(self, actual_tokens: Optional[int] = None, estimated_tokens: int = 0):
+        self.active -= 1
+        if actual_tokens is not None:
+            # Settle the estimate against the real usage reported by the provider
+            self.tokens.consume(actual_tokens - estimated_tokens)
+        self._pump()
+    
+    def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000.0
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_retryable(error: Exception) -> bool:
+    import openai
+    
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS or error.status_code >= 500
+    return False
+
+
+def estimate_tokens(messages, max_tokens: Optional[int] = None) -> int:
+    chars = 0
+    for message in messages or []:
+        content = message.get("content") if isinstance(message, dict) else None
+        if isinstance(content, str):
+            chars += len(content)
+        elif isinstance(content, list):
+            for part in content:
+                if isinstance(part, dict) and part.get("type") == "text":
+                    chars += len(part.get("text", ""))
+                else:
+                    # Images are billed per tile; assume a mid-size one
+                    chars += 3000
+    # Roughly 3 characters per token across mixed Chinese/English prompts
+    return chars // 3 + (max_tokens or 0)
+
+
+ConfigLike = Union[AIModelConfig, Dict[str, Any]]
+
+
+def _config_value(config: ConfigLike, name: str, default=None):
+    if isinstance(config, dict):
+        return config.get(name, default)
+    return getattr(config, name, default)
+
+
+_schedulers: Dict[Tuple, LLMScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(config: ConfigLike) -> LLMScheduler:
+    key = (
+        _config_value(config, "id"),
+        _config_value(config, "base_url"),
+        _config_value(config, "api_key"),
+        _config_value(config, "model_name")
+    )
+    rpm_limit = _config_value(config, "rpm_limit")
+    tpm_limit = _config_value(config, "tpm_limit")
+    max_concurrency = _config_value(config, "max_concurrency", DEFAULT_MAX_CONCURRENCY)
+    with _schedulers_lock:
+        scheduler = _schedulers.get(key)
+        if scheduler is None:
+            scheduler = LLMScheduler(rpm_limit, tpm_limit, max_concurrency)
+            _schedulers[key] = scheduler
+            return scheduler
+    if (scheduler.requests.per_minute, scheduler.tokens.per_minute, scheduler.max_concurrency) != (rpm_limit, tpm_limit, max_concurrency or DEFAULT_MAX_CONCURRENCY):
+        scheduler.configure(rpm_limit, tpm_limit, max_concurrency)
+    return scheduler
+
+
+def scheduler_stats() -> list:
+    with _schedulers_lock:
+        items = list(_schedulers.items())
+    return [
+        {
+            "model_id": key[0],
+            "model_name": key[3],
+            "active": scheduler.active,
+            "queued": scheduler.queued(),
+            "max_concurrency": scheduler.max_concurrency,
+            "rpm_limit": scheduler.requests.per_minute,
+            "tpm_limit": scheduler.tokens.per_minute,
+            **scheduler.stats
+        }
+        for key, scheduler in items
+    ]
+
+
+async def chat_completion(
+    config: ConfigLike,
+    priority: str = INTERACTIVE,
+    owner: Optional[str] = None,
+    timeout: Optional[float] = None,
+    use_cache: bool = True,
+    **kwargs
+):
+    """
+    Drop-in for ``client.chat.completions.create(**kwargs)`` that goes through the model's
+    scheduler. ``model`` defaults to the config's model_name. Transient failures (429, 5xx,
+    timeouts) are retried with exponential backoff and full jitter, honouring Retry-After.
+
+    Identical requests (model, messages, sampling params) are answered from the response cache
+    unless ``use_cache=False``; pass that wherever a fresh, different answer is the point.
+    """
+    kwargs.setdefault("model", _config_value(config, "model_name"))
+    
+    cache = None
+    cache_key = None
+    if use_cache and not kwargs.get("stream"):
+        from openai.types.chat import ChatCompletion
+        
+        cache = get_response_cache()
+        cache_key = cache.make_key(_config_value(config, "base_url"), kwargs)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            try:
+                return ChatCompletion.model_validate_json(cached)
+            except ValueError as e:
+                print(f"Warning: Discarding unreadable cached LLM response: {e}")
+    
+    client = get_llm_client(_config_value(config, "api_key"), _config_value(config, "base_url"), timeout=timeout)
+    scheduler = get_scheduler(config)
+    estimated = estimate_tokens(kwargs.get("messages"), kwargs.get("max_tokens"))
+    
+    attempt = 0
+    while True:
+        await scheduler.acquire(estimated, priority, owner)
+        actual = None
+        try:
+            response = await client.chat.completions.create(**kwargs)
+            usage = getattr(response, "usage", None)
+            actual = getattr(usage, "total_tokens", None) if usage else None
+            if cache is not None and hasattr(response, "model_dump_json"):
+                cache.put(cache_key, kwargs["model"], response.model_dump_json())
+            return response
+        except Exception as e:
+            if not _is_retryable(e) or attempt >= MAX_RETRIES:
+                scheduler.stats["failed"] += 1
+                raise
+            retry_after = _retry_after(e)
+            delay = random.uniform(0, min(MAX_BACKOFF, BASE_BACKOFF * (2 ** attempt)))
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            if getattr(e, "status_code", None) == 429:
+                # The provider is telling everyone to slow down, not just this call
+                scheduler.stats["rate_limited"] += 1
+                scheduler.pause(delay)
+            scheduler.stats["retries"] += 1
+            attempt += 1
+            print(f"LLM call failed ({e.__class__.__name__}), retry {attempt}/{MAX_RETRIES} in {delay:.1f}s")
+        finally:
+            scheduler.release(actual, estimated)
+        await asyncio.sleep(delay)
+
+
+async def stream_chat_completion(
+    config: ConfigLike,
+    priority: str = INTERACTIVE,
+    owner: Optional[str] = None,
+    timeout: Optional[float] = None,
+    **kwargs
+) -> AsyncIterator[str]:
+    """
+    Streaming counterpart of ``chat_completion``: yields content deltas as the model produces
+    them. The scheduler slot is held until the stream ends or the consumer stops iterating.
+    Failures before the first delta are retried like ``chat_completion``; after that the error
+    propagates, since part of the answer has already been handed out. Streams are never cached.
+    """
+    kwargs.setdefault("model", _config_value(config, "model_name"))
+    kwargs["stream"] = True
+    
+    client = get_llm_client(_config_value(config, "api_key"), _config_value(config, "base_url"), timeout=timeout)
+    scheduler = get_scheduler(config)
+    estimated = estimate_tokens(kwargs.get("messages"), kwargs.get("max_tokens"))
+    
+    attempt = 0
+    while True:
+        await scheduler.acquire(estimated, priority, owner)
+        started = False
+        stream = None
+        try:
+            stream = await client.chat.completions.create(**kwargs)
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    started = True
+                    yield delta
+            return
+        except Exception as e:
+            if started or not _is_retryable(e) or attempt >= MAX_RETRIES:
+                scheduler.stats["failed"] += 1
+                raise
+            retry_after = _retry_after(e)
+            delay = random.uniform(0, min(MAX_BACKOFF, BASE_BACKOFF * (2 ** attempt)))
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            if getattr(e, "status_code", None) == 429:
+                scheduler.stats["rate_limited"] += 1
+                scheduler.pause(delay)
+            scheduler.stats["retries"] += 1
+            attempt += 1
+            print(f"LLM stream failed ({e.__class__.__name__}), retry {attempt}/{MAX_RETRIES} in {delay:.1f}s")
+        finally:
+            # Usage is not reported on plain streams; the estimate stands
+            scheduler.release()
+            if stream is not None and hasattr(stream, "close"):
+                try:
+                    await stream.close()
+                except Exception:
+                    pass
+        await asyncio.sleep(delay)
@@ -6,31 +6,26 @@ Generates detailed prompts based on selected creatives
 import os
 import shutil
 from pathlib import Path
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, AsyncIterator
 from datetime import datetime
 from ..models import Inspiration, Creative, GeneratedPrompt, AIModelConfig
+from .llm_scheduler import chat_completion, stream_chat_completion
+from .executors import run_io
+from .dir_scanner import get_snapshot, ScanEntry
+from .inspiration import display_file_name, original_location
 
 
 class PromptGenerator:
     def __init__(self, config: Optional[AIModelConfig] = None):
         self.config = config
     
-    async def generate_prompt(
+    def _prompt_messages(
         self,
         creative: Creative,
         inspirations: List[Inspiration],
         output_format: str = "detailed",
-        organize_files: bool = False,
-        output_folder: Optional[str] = None,
         aggregated_path: Optional[str] = None
-    ) -> GeneratedPrompt:
-        from openai import AsyncOpenAI
-        
-        client = AsyncOpenAI(
-            api_key=self.config.api_key,
-            base_url=self.config.base_url
-        )
-        
+    ) -> List[Dict[str, str]]:
         inspiration_context = self._build_inspiration_context(inspirations, aggregated_path)
         
         format_instructions = {
@@ -39,22 +34,20 @@ class PromptGenerator:
             "step_by_step": "生成一个分步骤的提示词，包含执行步骤和注意事项。"
         }
         
-        response = await client.chat.completions.create(
-            model=self.config.model_name,
-            messages=[
-                {
-                    "role": "system",
-                    "content": """你是一个提示词工程专家，擅长将创意方案转化为高质量的AI提示词。
+        return [
+            {
+                "role": "system",
+                "content": """你是一个提示词工程专家，擅长将创意方案转化为高质量的AI提示词。
 生成的提示词应该：
 1. 清晰明确地描述目标和要求
 2. 包含必要的上下文信息
 3. 结构化组织，便于理解
 4. 可以直接用于其他AI工具
 5. 如果提供了文件路径信息，在提示词中引用这些路径"""
-                },
-                {
-                    "role": "user",
-                    "content": f"""创意方案:
+            },
+            {
+                "role": "user",
+                "content": f"""创意方案:
 标题: {creative.title}
 描述: {creative.description}
 关键点: {', '.join(creative.key_points)}
@@ -65,13 +58,61 @@ class PromptGenerator:
 {format_instructions.get(output_format, format_instructions['detailed'])}
 
 请生成一个完整的提示词。如果提供了文件路径，请在提示词中引用这些文件的具体路径。"""
-                }
-            ],
+            }
+        ]
+    
+    async def generate_prompt(
+        self,
+        creative: Creative,
+        inspirations: List[Inspiration],
+        output_format: str = "detailed",
+        organize_files: bool = False,
+        output_folder: Optional[str] = None,
+        aggregated_path: Optional[str] = None,
+        use_cache: bool = True
+    ) -> GeneratedPrompt:
+        response = await chat_completion(
+            self.config,
+            use_cache=use_cache,
+            model=self.config.model_name,
+            messages=self._prompt_messages(creative, inspirations, output_format, aggregated_path),
             max_tokens=10000
         )
         
-        prompt_content = response.choices[0].message.content
-        
+        # Organizing files copies whole inspirations; do it on the I/O pool
+        return await run_io(
+            self.build_prompt,
+            creative,
+            inspirations,
+            response.choices[0].message.content,
+            organize_files=organize_files,
+            output_folder=output_folder
+        )
+    
+    async def stream_prompt(
+        self,
+        creative: Creative,
+        inspirations: List[Inspiration],
+        output_format: str = "detailed",
+        aggregated_path: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Streaming variant of generate_prompt: yields the prompt text as the model writes it; pass the joined text to build_prompt."""
+        async for delta in stream_chat_completion(
+            self.config,
+            model=self.config.model_name,
+            messages=self._prompt_messages(creative, inspirations, output_format, aggregated_path),
+            max_tokens=10000
+        ):
+            yield delta
+    
+    def build_prompt(
+        self,
+        creative: Creative,
+        inspirations: List[Inspiration],
+        prompt_content: str,
+        organize_files: bool = False,
+        output_folder: Optional[str] = None
+    ) -> GeneratedPrompt:
         files = []
         if organize_files and output_folder:
             files = self._organize_files(inspirations, output_folder, creative.title)
@@ -100,52 +141,44 @@ class PromptGenerator:
                 if agg_path.exists():
                     type_folder = agg_path / type_str
                     if type_folder.exists():
-                        parts.append(f"聚合后路径: {type_folder / Path(insp.path).name}")
+                        parts.append(f"聚合后路径: {type_folder / display_file_name(insp)}")
                     else:
                         parts.append(f"聚合文件夹: {aggregated_path}")
                 else:
-                    parts.append(f"原始路径: {insp.path}")
+                    parts.append(f"原始路径: {original_location(insp)}")
             else:
-                parts.append(f"原始路径: {insp.path}")
+                parts.append(f"原始路径: {original_location(insp)}")
             
-            file_structure = self._get_file_structure(insp.path)
+            file_structure = self._get_file_structure(insp.path, name=display_file_name(insp))
             if file_structure:
                 parts.append(f"文件结构:\n{file_structure}")
         
         return "\n".join(parts)
     
-    def _get_file_structure(self, path: str, max_depth: int = 2, current_depth: int = 0) -> str:
-        from pathlib import Path
-        
+    def _get_file_structure(self, path: str, max_depth: int = 2, name: Optional[str] = None) -> str:
         p = Path(path)
         if not p.exists():
             return ""
         
-        if current_depth >= max_depth:
-            return ""
-        
-        lines = []
-        indent = "  " * current_depth
-        
         if p.is_file():
-            return f"{indent}- {p.name} (文件)"
+            return f"- {name or p.name} (文件)"
         
-        try:
-            items = sorted(p.iterdir(), key=lambda x: (not x.is_file(), x.name))
-            for item in items[:20]:
+        def render(entry: ScanEntry, depth: int) -> List[str]:
+            if depth >= max_depth:
+                return []
+            lines = []
+            indent = "  " * depth
+            for item in sorted(entry.children, key=lambda x: (x.is_dir, x.name))[:20]:
                 if item.name.startswith('.'):
                     continue
-                if item.is_file():
-                    lines.append(f"{indent}- {item.name}")
-                else:
+                if item.is_dir:
                     lines.append(f"{indent}+ {item.name}/")
-                    sub_structure = self._get_file_structure(str(item), max_depth, current_depth + 1)
-                    if sub_structure:
-                        lines.append(sub_structure)
-        except PermissionError:
-            pass
+                    lines.extend(render(item, depth + 1))
+                else:
+                    lines.append(f"{indent}- {item.name}")
+            return lines
         
-        return "\n".join(lines)
+        return "\n".join(render(get_snapshot(path).entry, 0))
     
     def _organize_files(
         self, 
@@ -167,7 +200,7 @@ class PromptGenerator:
             if not source.exists():
                 continue
             
-            dest = target_folder / insp.type.value / source.name
+            dest = target_folder / insp.type.value / display_file_name(insp)
             
             if source.is_file():
                 dest.parent.mkdir(parents=True, exist_ok=True)
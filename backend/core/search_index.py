@@ -0,0 +1,278 @@
+"""
+Inspiration Search Index Module
+Persistent inverted index with CJK-aware tokenization and BM25 ranking
+"""
+
+import bisect
+import hashlib
+import json
+import math
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Tuple, Optional
+
+from .inspiration_store import open_sqlite
+
+
+CJK_RANGES = (
+    "\u3040-\u30ff"  # Hiragana, Katakana
+    "\u3400-\u4dbf"  # CJK Extension A
+    "\u4e00-\u9fff"  # CJK Unified Ideographs
+    "\uac00-\ud7af"  # Hangul Syllables
+    "\uf900-\ufaff"  # CJK Compatibility Ideographs
+)
+TOKEN_PATTERN = re.compile(f"([{CJK_RANGES}]+)|([a-z0-9]+)")
+
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "tags": 2.0,
+    "summary": 1.0,
+    "file_summaries": 0.5,
+}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str, for_query: bool = False) -> List[str]:
+    """
+    Split text into index terms.
+
+    Latin/digit runs become whole lowercase words. CJK runs are indexed as unigrams plus
+    bigrams; queries use bigrams only (unigrams for single characters) so multi-character
+    Chinese queries match phrases rather than any shared character.
+    """
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(text.lower()):
+        cjk, word = match.groups()
+        if word:
+            tokens.append(word)
+            continue
+        if len(cjk) == 1:
+            tokens.append(cjk)
+            continue
+        if not for_query:
+            tokens.extend(cjk)
+        tokens.extend(cjk[i:i + 2] for i in range(len(cjk) - 1))
+    return tokens
+
+
+def _summary_text(summary: Optional[str]) -> str:
+    if not summary:
+        return ""
+    try:
+        data = json.loads(summary)
+    except (json.JSONDecodeError, TypeError):
+        return summary
+    if not isinstance(data, dict):
+        return summary
+    # Structured folder summaries: index the readable sections, not the JSON syntax or the _context copy
+    return "\n".join(str(data.get(key) or "") for key in ("overview", "tree", "important_docs", "secondary_docs"))
+
+
+def _indexed_fields(data: Dict[str, Any]) -> Dict[str, str]:
+    file_summaries = (data.get("metadata") or {}).get("file_summaries") or []
+    return {
+        "name": data.get("name") or "",
+        "tags": " ".join(data.get("tags") or []),
+        "summary": _summary_text(data.get("summary")),
+        "file_summaries": "\n".join(
+            f"{fs.get('path', '')} {fs.get('summary', '')}" for fs in file_summaries if isinstance(fs, dict)
+        ),
+    }
+
+
+def _version(data: Dict[str, Any]) -> str:
+    updated_at = data.get("updated_at")
+    if isinstance(updated_at, datetime):
+        return updated_at.isoformat()
+    return str(updated_at or "")
+
+
+class SearchIndex:
+    def __init__(self, db_path: str):
+        self.db_path = Path(db_path)
+        self._lock = threading.RLock()
+        self._conn = open_sqlite(self.db_path)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS docs (
+                id TEXT PRIMARY KEY,
+                length REAL NOT NULL,
+                version TEXT,
+                text_hash TEXT
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS terms (
+                doc_id TEXT NOT NULL,
+                term TEXT NOT NULL,
+                tf REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_terms_doc ON terms (doc_id)")
+        
+        self.postings: Dict[str, Dict[str, float]] = {}
+        self.doc_terms: Dict[str, Dict[str, float]] = {}
+        self.doc_lengths: Dict[str, float] = {}
+        self._doc_meta: Dict[str, Tuple[str, str]] = {}
+        self._total_length = 0.0
+        self._vocabulary: Optional[List[str]] = None
+        self._load()
+    
+    def _load(self):
+        with self._lock:
+            for doc_id, length, version, text_hash in self._conn.execute("SELECT id, length, version, text_hash FROM docs"):
+                self.doc_lengths[doc_id] = length
+                self._doc_meta[doc_id] = (version, text_hash)
+                self.doc_terms[doc_id] = {}
+                self._total_length += length
+            for doc_id, term, tf in self._conn.execute("SELECT doc_id, term, tf FROM terms"):
+                if doc_id not in self.doc_terms:
+                    continue
+                self.doc_terms[doc_id][term] = tf
+                self.postings.setdefault(term, {})[doc_id] = tf
+    
+    def _analyze(self, data: Dict[str, Any]) -> Tuple[Dict[str, float], float, str]:
+        fields = _indexed_fields(data)
+        text_hash = hashlib.sha1(json.dumps(fields, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+        term_freqs: Dict[str, float] = {}
+        length = 0.0
+        for field, text in fields.items():
+            weight = FIELD_WEIGHTS[field]
+            for token in tokenize(text):
+                term_freqs[token] = term_freqs.get(token, 0.0) + weight
+                length += weight
+        return term_freqs, length, text_hash
+    
+    def sync(self, records: Dict[str, Dict[str, Any]]) -> int:
+        """Bring the index in line with the store after startup; returns the number of documents touched."""
+        with self._lock:
+            stale = [doc_id for doc_id in self.doc_lengths if doc_id not in records]
+            changed = {
+                doc_id: data for doc_id, data in records.items()
+                if self._doc_meta.get(doc_id, (None, None))[0] != _version(data)
+            }
+        for doc_id in stale:
+            self.remove(doc_id)
+        self.upsert_many(changed)
+        return len(stale) + len(changed)
+    
+    def upsert(self, doc_id: str, data: Dict[str, Any]):
+        self.upsert_many({doc_id: data})
+    
+    def upsert_many(self, records: Dict[str, Dict[str, Any]]):
+        if not records:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for doc_id, data in records.items():
+                    self._upsert_locked(doc_id, data)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+    
+    def _upsert_locked(self, doc_id: str, data: Dict[str, Any]):
+        version = _version(data)
+        term_freqs, length, text_hash = self._analyze(data)
+        
+        if self._doc_meta.get(doc_id, (None, None))[1] == text_hash:
+            # Only non-indexed fields changed (type, path, size...): keep postings, bump the version
+            self._doc_meta[doc_id] = (version, text_hash)
+            self._conn.execute("UPDATE docs SET version = ? WHERE id = ?", (version, doc_id))
+            return
+        
+        self._remove_from_memory(doc_id)
+        self.doc_terms[doc_id] = term_freqs
+        self.doc_lengths[doc_id] = length
+        self._doc_meta[doc_id] = (version, text_hash)
+        self._total_length += length
+        for term, tf in term_freqs.items():
+            if term not in self.postings:
+                self._vocabulary = None
+            self.postings.setdefault(term, {})[doc_id] = tf
+        
+        self._conn.execute("DELETE FROM terms WHERE doc_id = ?", (doc_id,))
+        self._conn.execute(
+            "INSERT OR REPLACE INTO docs (id, length, version, text_hash) VALUES (?, ?, ?, ?)",
+            (doc_id, length, version, text_hash)
+        )
+        self._conn.executemany(
+            "INSERT INTO terms (doc_id, term, tf) VALUES (?, ?, ?)",
+            [(doc_id, term, tf) for term, tf in term_freqs.items()]
+        )
+    
+    def _remove_from_memory(self, doc_id: str):
+        for term in self.doc_terms.pop(doc_id, {}):
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            posting.pop(doc_id, None)
+            if not posting:
+                del self.postings[term]
+                self._vocabulary = None
+        self._total_length -= self.doc_lengths.pop(doc_id, 0.0)
+        self._doc_meta.pop(doc_id, None)
+    
+    def remove(self, doc_id: str):
+        with self._lock:
+            self._remove_from_memory(doc_id)
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM terms WHERE doc_id = ?", (doc_id,))
+                self._conn.execute("DELETE FROM docs WHERE id = ?", (doc_id,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+    
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        matches = []
+        for term in self._vocabulary[start:]:
+            if not term.startswith(prefix):
+                break
+            matches.append(term)
+        return matches
+    
+    def search(self, query: str, offset: int = 0, limit: Optional[int] = None) -> Tuple[List[Tuple[str, float]], int]:
+        """Return ((doc_id, score) ranked by BM25 for the requested page, total number of hits)."""
+        query_terms = list(dict.fromkeys(tokenize(query, for_query=True)))
+        if not query_terms:
+            return [], 0
+        
+        with self._lock:
+            doc_count = len(self.doc_lengths)
+            if not doc_count:
+                return [], 0
+            avg_length = (self._total_length / doc_count) or 1.0
+            
+            # The trailing Latin word is treated as a prefix so partial words still match while typing
+            last = query_terms[-1]
+            expansions = {term: [term] for term in query_terms}
+            if last.isascii() and len(last) >= 2:
+                expansions[last] = self._expand_prefix(last) or [last]
+            
+            scores: Dict[str, float] = {}
+            for terms in expansions.values():
+                for term in terms:
+                    posting = self.postings.get(term)
+                    if not posting:
+                        continue
+                    idf = math.log(1 + (doc_count - len(posting) + 0.5) / (len(posting) + 0.5))
+                    for doc_id, tf in posting.items():
+                        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[doc_id] / avg_length)
+                        scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        end = None if limit is None else offset + limit
+        return ranked[offset:end], len(ranked)
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
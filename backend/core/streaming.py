@@ -0,0 +1,74 @@
+"""
+Streaming Helpers Module
+Incremental JSON parsing of streamed model output and server-sent event formatting
+"""
+
+import json
+from typing import Any, Dict, List, Optional
+
+
+def format_sse(event: str, payload: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False, default=str)}\n\n"
+
+
+class JSONArrayItemParser:
+    """
+    Feed model output chunk by chunk; ``feed`` returns every object that has just been closed
+    as an element of the item array, which is the first array seen to hold an object. Works for
+    a bare ``[{...}, ...]`` as well as a wrapper like ``{"creatives": [{...}]}``, and ignores
+    prose or code fences around the JSON.
+    """
+    
+    def __init__(self):
+        self.buffer: List[str] = []
+        self._text_length = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._item_depth: Optional[int] = None
+        self._item_start: Optional[int] = None
+    
+    @property
+    def text(self) -> str:
+        return "".join(self.buffer)
+    
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        items = []
+        offset = self._text_length
+        self.buffer.append(chunk)
+        self._text_length += len(chunk)
+        pending = None
+        
+        for i, char in enumerate(chunk):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            
+            if char == '"':
+                if self._stack:
+                    self._in_string = True
+            elif char in "{[":
+                if char == "{" and self._stack and self._stack[-1] == "[":
+                    if self._item_depth is None:
+                        self._item_depth = len(self._stack)
+                    if self._item_depth == len(self._stack):
+                        self._item_start = offset + i
+                self._stack.append(char)
+            elif char in "}]" and self._stack:
+                self._stack.pop()
+                if char == "}" and self._item_start is not None and len(self._stack) == self._item_depth:
+                    if pending is None:
+                        pending = self.text
+                    start, self._item_start = self._item_start, None
+                    try:
+                        item = json.loads(pending[start:offset + i + 1])
+                    except json.JSONDecodeError:
+                        continue
+                    items.append(item)
+        
+        return items
@@ -0,0 +1,130 @@
+"""
+Summary Cache Module
+Persistent LLM summary cache keyed by content hash, model and prompt version
+"""
+
+import hashlib
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+from .inspiration_store import open_sqlite
+
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+FILE_HASHES_TABLE = """CREATE TABLE IF NOT EXISTS file_hashes (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+)"""
+
+
+def memoized_content_hash(conn, lock: threading.Lock, file_path: Path) -> Optional[str]:
+    """SHA-256 of a file's bytes, memoized in ``conn``'s file_hashes table by (path, size, mtime)."""
+    try:
+        stat = file_path.stat()
+    except OSError:
+        return None
+    path_key = str(file_path.absolute())
+    
+    with lock:
+        row = conn.execute(
+            "SELECT sha256 FROM file_hashes WHERE path = ? AND size = ? AND mtime_ns = ?",
+            (path_key, stat.st_size, stat.st_mtime_ns)
+        ).fetchone()
+    if row:
+        return row[0]
+    
+    hasher = hashlib.sha256()
+    try:
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                hasher.update(chunk)
+    except OSError:
+        return None
+    digest = hasher.hexdigest()
+    
+    with lock:
+        conn.execute(
+            "INSERT OR REPLACE INTO file_hashes (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+            (path_key, stat.st_size, stat.st_mtime_ns, digest)
+        )
+    return digest
+
+
+class SummaryCache:
+    """
+    File keys hash the file bytes, so a summary survives renames, moves and re-uploads of the
+    same content. Folder keys hash the (name, key) pairs of their children: a folder is a hit
+    exactly when nothing below it changed, and a changed file invalidates only its ancestors.
+
+    Content hashes are memoized by (path, size, mtime) so an unchanged tree is only stat'ed.
+    """
+    
+    def __init__(self, db_path: str):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn = open_sqlite(self.db_path)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS summaries (
+                key TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                model TEXT,
+                created_at TEXT,
+                hits INTEGER NOT NULL DEFAULT 0
+            )"""
+        )
+        self._conn.execute(FILE_HASHES_TABLE)
+    
+    def content_hash(self, file_path: Path) -> Optional[str]:
+        return memoized_content_hash(self._conn, self._lock, file_path)
+    
+    @staticmethod
+    def _key(kind: str, digest: str, model: str, prompt_version: str) -> str:
+        return hashlib.sha256(f"{kind}\0{model}\0{prompt_version}\0{digest}".encode("utf-8")).hexdigest()
+    
+    def file_key(self, file_path: Path, model: str, prompt_version: str) -> Optional[str]:
+        digest = self.content_hash(file_path)
+        if digest is None:
+            return None
+        return self._key("file", digest, model, prompt_version)
+    
+    def folder_key(self, children: List[Tuple[str, Optional[str]]], model: str, prompt_version: str) -> Optional[str]:
+        """``children`` are (name, cache key) pairs; any child without a key makes the folder uncacheable."""
+        if any(key is None for _, key in children):
+            return None
+        digest = hashlib.sha256(
+            "\n".join(f"{name}\0{key}" for name, key in sorted(children)).encode("utf-8")
+        ).hexdigest()
+        return self._key("folder", digest, model, prompt_version)
+    
+    def get(self, key: Optional[str]) -> Optional[str]:
+        if key is None:
+            return None
+        with self._lock:
+            row = self._conn.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+            if row:
+                self._conn.execute("UPDATE summaries SET hits = hits + 1 WHERE key = ?", (key,))
+        return row[0] if row else None
+    
+    def put(self, key: Optional[str], summary: str, model: Optional[str] = None):
+        if key is None:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (key, summary, model, created_at, hits) VALUES (?, ?, ?, ?, 0)",
+                (key, summary, model, datetime.now().isoformat())
+            )
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, hits = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM summaries").fetchone()
+            hashed_files = self._conn.execute("SELECT COUNT(*) FROM file_hashes").fetchone()[0]
+        return {"entries": entries, "hits": hits, "hashed_files": hashed_files}
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,295 @@
+"""
+Watcher Module
+Keeps linked (copy_file=False) inspirations in sync with their source files
+"""
+
+import asyncio
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from ..models import Inspiration
+from .dir_scanner import directory_scanner, is_excluded, path_ignored
+from .executors import run_io
+
+try:
+    import watchfiles
+    WATCHFILES_AVAILABLE = True
+except ImportError:
+    watchfiles = None
+    WATCHFILES_AVAILABLE = False
+
+
+# Quiet period after the last change before an inspiration is refreshed
+DEBOUNCE_SECONDS = 2.0
+# Under continuous churn (a build writing files) refresh at least this often
+MAX_DEBOUNCE_SECONDS = 30.0
+POLL_INTERVAL = 10.0
+# Polling re-reads the linked inspirations this often; native watching waits for request_resync()
+RESYNC_INTERVAL = 30.0
+MAX_CHANGED_PATHS = 200
+
+
+class WatchTarget:
+    def __init__(self, inspiration_id: str, path: Path, is_dir: bool):
+        self.inspiration_id = inspiration_id
+        self.path = path
+        self.is_dir = is_dir
+    
+    def relative(self, changed: Path) -> Optional[str]:
+        """Path of ``changed`` inside this target, "" for the target itself, None if unrelated."""
+        if changed == self.path:
+            return ""
+        if not self.is_dir:
+            return None
+        try:
+            return changed.relative_to(self.path).as_posix()
+        except ValueError:
+            return None
+
+
+class InspirationWatcher:
+    """
+    Watches the sources of linked inspirations, with inotify/FSEvents through ``watchfiles``
+    when it is installed and by diffing periodic scans otherwise. Changes are collected per
+    inspiration and applied once the burst settles: metadata (size, type counts, fingerprint)
+    is refreshed and ``on_change`` is called with the changed paths so summaries can be
+    rebuilt. Changes under hidden or dependency folders never count.
+
+    Sources that changed while the server was down are caught on startup by comparing the
+    stored fingerprint with a fresh one.
+    """
+    
+    def __init__(
+        self,
+        inspiration_manager,
+        on_change: Optional[Callable[[Inspiration, List[str]], Any]] = None,
+        debounce: float = DEBOUNCE_SECONDS,
+        poll_interval: float = POLL_INTERVAL,
+        use_native: Optional[bool] = None
+    ):
+        self.manager = inspiration_manager
+        self.on_change = on_change
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        native = WATCHFILES_AVAILABLE if use_native is None else use_native and WATCHFILES_AVAILABLE
+        self.backend = "watchfiles" if native else "polling"
+        self._targets: Dict[str, WatchTarget] = {}
+        self._pending: Dict[str, Set[str]] = {}
+        self._first_change: Dict[str, float] = {}
+        self._last_change: Dict[str, float] = {}
+        self._poll_states: Dict[str, Optional[Dict[str, Tuple[int, float]]]] = {}
+        self._stop: Optional[asyncio.Event] = None
+        self._resync: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self.stats = {"events": 0, "ignored_events": 0, "refreshes": 0, "resummarize_requests": 0, "errors": 0}
+    
+    async def start(self):
+        if self._tasks:
+            return
+        self._stop = asyncio.Event()
+        self._resync = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._watch_loop()), asyncio.create_task(self._flush_loop())]
+        print(f"Inspiration watcher started ({self.backend})")
+    
+    async def stop(self):
+        if not self._tasks:
+            return
+        self._stop.set()
+        self._resync.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+    
+    def request_resync(self):
+        """Pick up added or deleted linked inspirations without waiting for the next resync."""
+        if self._resync is not None:
+            self._resync.set()
+    
+    def status(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "running": bool(self._tasks),
+            "targets": len(self._targets),
+            "pending": {inspiration_id: len(paths) for inspiration_id, paths in self._pending.items()},
+            **self.stats
+        }
+    
+    def _load_targets(self) -> Dict[str, WatchTarget]:
+        targets = {}
+        for inspiration in self.manager.list_linked_inspirations():
+            path = Path(inspiration.path).resolve()
+            if path.exists():
+                targets[inspiration.id] = WatchTarget(inspiration.id, path, path.is_dir())
+        return targets
+    
+    async def _watch_loop(self):
+        while not self._stop.is_set():
+            self._resync.clear()
+            try:
+                targets = await run_io(self._load_targets)
+                await self._adopt_targets(targets)
+                if not targets:
+                    await self._wait(self._resync, None if self.backend == "watchfiles" else RESYNC_INTERVAL)
+                elif self.backend == "watchfiles":
+                    await self._watch_native(targets)
+                else:
+                    await self._poll(targets)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"Inspiration watcher error: {e}")
+                await self._wait(self._stop, RESYNC_INTERVAL)
+    
+    async def _wait(self, event: asyncio.Event, timeout: Optional[float]):
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+    
+    async def _adopt_targets(self, targets: Dict[str, WatchTarget]):
+        added = [inspiration_id for inspiration_id in targets if inspiration_id not in self._targets]
+        self._targets = targets
+        for inspiration_id in list(self._poll_states):
+            if inspiration_id not in targets:
+                del self._poll_states[inspiration_id]
+        
+        for inspiration_id in added:
+            inspiration = self.manager.get_inspiration(inspiration_id)
+            if not inspiration:
+                continue
+            stored = (inspiration.metadata or {}).get("fingerprint")
+            if targets[inspiration_id].is_dir:
+                # Whatever changed while unwatched is invisible to directory mtimes; look afresh
+                directory_scanner.invalidate(inspiration.path)
+            refreshed = await run_io(self.manager.refresh_linked_metadata, inspiration_id)
+            # No stored fingerprint means this is the first look: record a baseline, nothing changed
+            if stored and refreshed and (refreshed.metadata or {}).get("fingerprint") != stored:
+                self._record(inspiration_id, [""])
+    
+    async def _watch_native(self, targets: Dict[str, WatchTarget]):
+        folders = sorted({str(t.path) for t in targets.values() if t.is_dir})
+        # Editors replace files by rename, which drops a watch on the file itself; watch its folder
+        file_parents = sorted({str(t.path.parent) for t in targets.values() if not t.is_dir})
+        
+        stop_event = asyncio.Event()
+        resync = asyncio.create_task(self._resync.wait())
+        
+        async def consume(paths: List[str], recursive: bool):
+            async for changes in watchfiles.awatch(*paths, stop_event=stop_event, recursive=recursive):
+                self._on_events(path for _change, path in changes)
+        
+        consumers = []
+        if folders:
+            consumers.append(asyncio.create_task(consume(folders, True)))
+        if file_parents:
+            consumers.append(asyncio.create_task(consume(file_parents, False)))
+        try:
+            done, _ = await asyncio.wait([resync, *consumers], return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task is not resync and task.exception():
+                    raise task.exception()
+        finally:
+            stop_event.set()
+            resync.cancel()
+            await asyncio.gather(resync, *consumers, return_exceptions=True)
+    
+    def _poll_state(self, target: WatchTarget) -> Optional[Dict[str, Tuple[int, float]]]:
+        """
+        (size, mtime) of every watched file, or None when the source is gone. Folders come from
+        the shared snapshot, which only rescans directories whose mtime moved; in-place edits
+        show up once its periodic full rescan runs.
+        """
+        if not target.is_dir:
+            try:
+                stat = target.path.stat()
+            except OSError:
+                return None
+            return {"": (stat.st_size, stat.st_mtime)}
+        try:
+            snapshot = directory_scanner.snapshot(str(target.path))
+        except OSError:
+            return None
+        return {entry.path: (entry.size, entry.mtime) for entry in snapshot.entry.files()}
+    
+    async def _poll(self, targets: Dict[str, WatchTarget]):
+        for inspiration_id, target in targets.items():
+            if inspiration_id not in self._poll_states:
+                self._poll_states[inspiration_id] = await run_io(self._poll_state, target)
+        
+        deadline = time.monotonic() + RESYNC_INTERVAL
+        while time.monotonic() < deadline:
+            await self._wait(self._resync, self.poll_interval)
+            if self._resync.is_set():
+                return
+            for inspiration_id, target in targets.items():
+                previous = self._poll_states.get(inspiration_id)
+                current = await run_io(self._poll_state, target)
+                self._poll_states[inspiration_id] = current
+                if previous is None or current is None:
+                    changed = [""] if previous is not current else []
+                else:
+                    changed = [path for path in previous.keys() | current.keys() if previous.get(path) != current.get(path)]
+                if changed:
+                    self._record(inspiration_id, changed)
+    
+    def _on_events(self, raw_paths):
+        for raw in raw_paths:
+            self.stats["events"] += 1
+            changed = Path(raw)
+            for target in self._targets.values():
+                relative = target.relative(changed)
+                if relative is None:
+                    continue
+                if relative and any(is_excluded(part) for part in relative.split('/')):
+                    self.stats["ignored_events"] += 1
+                    continue
+                self._record(target.inspiration_id, [relative])
+    
+    def _record(self, inspiration_id: str, relative_paths: List[str]):
+        now = time.monotonic()
+        self._pending.setdefault(inspiration_id, set()).update(relative_paths)
+        self._first_change.setdefault(inspiration_id, now)
+        self._last_change[inspiration_id] = now
+    
+    async def _flush_loop(self):
+        while not self._stop.is_set():
+            await self._wait(self._stop, max(0.1, min(1.0, self.debounce / 2)))
+            now = time.monotonic()
+            due = [
+                inspiration_id for inspiration_id in list(self._pending)
+                if now - self._last_change[inspiration_id] >= self.debounce
+                or now - self._first_change[inspiration_id] >= MAX_DEBOUNCE_SECONDS
+            ]
+            for inspiration_id in due:
+                changed = self._pending.pop(inspiration_id)
+                del self._first_change[inspiration_id]
+                del self._last_change[inspiration_id]
+                try:
+                    await self._apply(inspiration_id, changed)
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    print(f"Failed to refresh linked inspiration {inspiration_id}: {e}")
+    
+    async def _apply(self, inspiration_id: str, changed: Set[str]):
+        inspiration = self.manager.get_inspiration(inspiration_id)
+        if not inspiration:
+            return
+        ignored_paths = (inspiration.metadata or {}).get("ignored_paths") or []
+        relevant = sorted(path for path in changed if not path_ignored(path, ignored_paths))
+        if not relevant:
+            self.stats["ignored_events"] += len(changed)
+            return
+        
+        if Path(inspiration.path).is_dir():
+            directory_scanner.mark_changed(inspiration.path, relevant)
+        refreshed = await run_io(self.manager.refresh_linked_metadata, inspiration_id)
+        self.stats["refreshes"] += 1
+        print(f"Linked inspiration {inspiration.name} changed ({len(relevant)} paths)")
+        
+        # Only inspirations that were summarized before get rebuilt; the rest are summarized on demand
+        if refreshed and refreshed.summary and not (refreshed.metadata or {}).get("missing") and self.on_change:
+            self.stats["resummarize_requests"] += 1
+            self.on_change(refreshed, relevant[:MAX_CHANGED_PATHS])
@@ -7,13 +7,29 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from .api import router
+from .api.routes import inspiration_manager, config_manager, ai_summarizer, job_manager, inspiration_watcher
+from .core.llm_client import close_llm_clients
+from .core.llm_cache import close_response_cache
+from .core.executors import shutdown_executors
+from .core.extraction import close_extraction_service
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("Creative Master Backend starting...")
+    await job_manager.start()
+    await inspiration_watcher.start()
     yield
     print("Creative Master Backend shutting down...")
+    await inspiration_watcher.stop()
+    await job_manager.stop()
+    close_extraction_service()
+    shutdown_executors()
+    inspiration_manager.close()
+    config_manager.close()
+    ai_summarizer.close()
+    await close_llm_clients()
+    close_response_cache()
 
 
 app = FastAPI(
@@ -128,6 +128,11 @@ class AIModelConfig(BaseModel):
     is_relation_completer: bool = False
     is_topology_generator: bool = False
     is_inspiration_generator: bool = False
+    rpm_limit: Optional[int] = None
+    tpm_limit: Optional[int] = None
+    max_concurrency: int = 10
+    context_window: Optional[int] = None
+    source_token_budget: Optional[int] = None
 
 
 class UserFeedback(BaseModel):